@@ -0,0 +1,156 @@
+"""
+Compare the concurrent read throughput of the sync endpoints served over
+WSGI with their async variants served over ASGI.
+
+Start both servers against the same database, for example:
+
+    gunicorn oracle_cars.wsgi -b 127.0.0.1:8000 -w 2 --threads 8
+    gunicorn oracle_cars.asgi -b 127.0.0.1:8001 -w 2 -k uvicorn.workers.UvicornWorker
+
+then run:
+
+    python benchmarks/async_throughput.py \\
+        --wsgi http://127.0.0.1:8000/api/ \\
+        --asgi http://127.0.0.1:8001/api/async/ \\
+        --connections 10 100 500
+
+Each connection is a keep-alive HTTP/1.1 client sending GET requests back to
+back, cycling through the paths, for the given duration. Only the standard
+library is used, so the client isn't what's being measured.
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from itertools import cycle
+from urllib.parse import urlsplit
+
+DEFAULT_PATHS = ["cars/", "branches/", "schedules/", "branches/1/inventory"]
+
+
+async def read_response(reader):
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError("server closed the connection")
+    headers = {}
+    while (line := await reader.readline()) not in (b"\r\n", b""):
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    if headers.get("transfer-encoding") == "chunked":
+        while size := int((await reader.readline()).split(b";")[0], 16):
+            await reader.readexactly(size + 2)
+        await reader.readline()
+    else:
+        await reader.readexactly(int(headers.get("content-length", 0)))
+    return int(status_line.split()[1]), headers.get("connection") == "close"
+
+
+async def client(host, port, requests, deadline, latencies, errors):
+    reader = writer = None
+    for request in requests:
+        if time.perf_counter() >= deadline:
+            break
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection(host, port)
+            started = time.perf_counter()
+            writer.write(request)
+            status, closed = await read_response(reader)
+            latencies.append(time.perf_counter() - started)
+            if status != 200:
+                errors.append(status)
+        except (ConnectionError, asyncio.IncompleteReadError, OSError) as e:
+            errors.append(type(e).__name__)
+            closed = True
+        if closed and writer is not None:
+            writer.close()
+            reader = writer = None
+    if writer is not None:
+        writer.close()
+
+
+async def run(base_url, paths, connections, duration):
+    url = urlsplit(base_url)
+    requests = [
+        (
+            f"GET {url.path}{path} HTTP/1.1\r\n"
+            f"Host: {url.netloc}\r\n"
+            "Accept: application/json\r\n"
+            "Connection: keep-alive\r\n\r\n"
+        ).encode()
+        for path in paths
+    ]
+    latencies, errors = [], []
+    started = time.perf_counter()
+    deadline = started + duration
+    await asyncio.gather(
+        *(
+            client(
+                url.hostname,
+                url.port or 80,
+                cycle(requests[i % len(requests) :] + requests[: i % len(requests)]),
+                deadline,
+                latencies,
+                errors,
+            )
+            for i in range(connections)
+        )
+    )
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+
+    def percentile(p):
+        if not latencies:
+            return None
+        return round(
+            latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000, 2
+        )
+
+    return {
+        "connections": connections,
+        "requests": len(latencies),
+        "errors": len(errors),
+        "requests_per_second": round(len(latencies) / elapsed, 1),
+        "latency_ms": {
+            "mean": round(statistics.fmean(latencies) * 1000, 2) if latencies else None,
+            "p50": percentile(0.5),
+            "p95": percentile(0.95),
+            "p99": percentile(0.99),
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--wsgi", required=True, help="Base URL of the sync API.")
+    parser.add_argument("--asgi", required=True, help="Base URL of the async API.")
+    parser.add_argument("--paths", nargs="+", default=DEFAULT_PATHS)
+    parser.add_argument("--connections", nargs="+", type=int, default=[10, 100, 500])
+    parser.add_argument(
+        "--duration", type=float, default=10, help="Seconds per measurement."
+    )
+    parser.add_argument("--json", action="store_true", help="Print JSON results.")
+    args = parser.parse_args()
+
+    results = []
+    for connections in args.connections:
+        for name, base_url in [("wsgi", args.wsgi), ("asgi", args.asgi)]:
+            result = asyncio.run(run(base_url, args.paths, connections, args.duration))
+            results.append({"server": name, **result})
+            if not args.json:
+                print(
+                    f"{name}  {connections:>5} connections  "
+                    f"{result['requests_per_second']:>9} req/s  "
+                    f"p50 {result['latency_ms']['p50']} ms  "
+                    f"p99 {result['latency_ms']['p99']} ms  "
+                    f"{result['errors']} errors"
+                )
+    if args.json:
+        print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Rows per second of the list endpoints' serialization, from queryset to JSON
+bytes: ModelSerializer with DRF's JSONRenderer (before) against
+serialize_values with FastJSONRenderer (after).
+
+Runs against a throwaway test database filled with generated rows:
+
+    python benchmarks/serialization.py --rows 20000
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "oracle_cars.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.db import connection  # noqa: E402
+from rest_framework.renderers import JSONRenderer  # noqa: E402
+
+from car_api.models import Branch, Car, Schedule  # noqa: E402
+from car_api.renderers import FastJSONRenderer  # noqa: E402
+from car_api.serializers import (  # noqa: E402
+    BranchSerializer,
+    CarSerializer,
+    ScheduleSerializer,
+    serialize_values,
+)
+
+
+def fill(rows):
+    branches = Branch.objects.bulk_create(
+        Branch(name=f"Branch {i}") for i in range(max(1, rows // 100))
+    )
+    cars = Car.objects.bulk_create(
+        Car(id=f"C{i}", make="Škoda", model="Octavia", branch=branches[i % 10])
+        for i in range(rows)
+    )
+    start = datetime(2025, 1, 1)
+    Schedule.objects.bulk_create(
+        Schedule(
+            start_time=start + timedelta(hours=i),
+            end_time=start + timedelta(hours=i, minutes=90, microseconds=i),
+            car_id=cars[i],
+            origin_branch=branches[i % len(branches)],
+            destination_branch=branches[(i + 1) % len(branches)],
+        )
+        for i in range(rows)
+    )
+
+
+def before(model, serializer_class):
+    return JSONRenderer().render(serializer_class(model.objects.all(), many=True).data)
+
+
+def after(model, serializer_class):
+    return FastJSONRenderer().render(
+        serialize_values(model.objects.all(), serializer_class)
+    )
+
+
+def best_time(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - started)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="Print JSON results.")
+    args = parser.parse_args()
+
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        fill(args.rows)
+        results = []
+        for model, serializer_class in [
+            (Branch, BranchSerializer),
+            (Car, CarSerializer),
+            (Schedule, ScheduleSerializer),
+        ]:
+            if before(model, serializer_class) != after(model, serializer_class):
+                raise SystemExit(f"{model.__name__}: output differs")
+            count = model.objects.count()
+            slow = best_time(lambda: before(model, serializer_class), args.repeat)
+            fast = best_time(lambda: after(model, serializer_class), args.repeat)
+            results.append(
+                {
+                    "model": model.__name__,
+                    "rows": count,
+                    "before_rows_per_second": round(count / slow),
+                    "after_rows_per_second": round(count / fast),
+                    "speedup": round(slow / fast, 2),
+                }
+            )
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for r in results:
+        print(
+            f"{r['model']:<10} {r['rows']:>7} rows  "
+            f"before {r['before_rows_per_second']:>9} rows/s  "
+            f"after {r['after_rows_per_second']:>9} rows/s  "
+            f"x{r['speedup']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
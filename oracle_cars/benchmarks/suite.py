@@ -0,0 +1,399 @@
+"""
+Time the inventory lookups and every API endpoint against generated fleets
+of increasing size, and write the results as JSON so runs from different
+commits can be compared.
+
+Each size gets a throwaway test database filled by the generate_fleet
+command. The inventory cache is cleared before every call, so the numbers
+are for cold lookups, and writes are rolled back after each call.
+
+    python benchmarks/suite.py --sizes 1000 10000 100000 --output after.json
+    python benchmarks/suite.py --compare before.json after.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from unittest.mock import patch
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "oracle_cars.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.core.cache import cache  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+from django.db import connection, transaction  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+
+from car_api.models import Branch, Car, Schedule  # noqa: E402
+from car_api.utils import get_free_car_ids, get_inventory_at_date  # noqa: E402
+
+FLEET_START = datetime(2025, 1, 1)
+# Mocked as the current time, two weeks into the generated bookings.
+NOW = FLEET_START + timedelta(days=14)
+DEFAULT_SIZES = [1000, 10000, 100000]
+
+
+def fleet_options(size):
+    cars = max(10, size // 20)
+    return {
+        "schedules": size,
+        "cars": cars,
+        "branches": max(5, cars // 100),
+        "density": 0.5,
+        "seed": 0,
+        "start": FLEET_START.isoformat(),
+    }
+
+
+def cases():
+    """
+    (name, call) pairs. Each call gets a fresh random.Random so the same
+    parameters are used on every run, and returns something to consume.
+    """
+    branch_ids = list(Branch.objects.values_list("pk", flat=True))
+    car_ids = list(Car.objects.values_list("pk", flat=True))
+    schedule_ids = list(Schedule.objects.values_list("pk", flat=True))
+    client = Client()
+
+    def when(r):
+        return NOW + timedelta(hours=r.randint(0, 24 * 40))
+
+    def get(url):
+        response = client.get(url)
+        if response.streaming:
+            return b"".join(response.streaming_content)
+        return response.content
+
+    def post(url, data):
+        return client.post(url, data, content_type="application/json").content
+
+    def booking(r):
+        return {
+            "start_time": when(r).isoformat(sep=" "),
+            "duration": "02:00:00",
+            "origin_branch": r.choice(branch_ids),
+            "destination_branch": r.choice(branch_ids),
+        }
+
+    return [
+        (
+            "get_inventory_at_date",
+            lambda r: get_inventory_at_date(r.choice(branch_ids), when(r)),
+        ),
+        (
+            "get_free_car_ids",
+            lambda r: get_free_car_ids(
+                r.choice(branch_ids), (t := when(r)), t + timedelta(hours=3)
+            ),
+        ),
+        ("GET /api/cars/", lambda r: get("/api/cars/")),
+        ("GET /api/cars/?page_size=100", lambda r: get("/api/cars/?page_size=100")),
+        ("GET /api/cars/?stream=1", lambda r: get("/api/cars/?stream=1")),
+        ("GET /api/cars/<pk>/", lambda r: get(f"/api/cars/{r.choice(car_ids)}/")),
+        (
+            "GET /api/cars/<pk>/calendar",
+            lambda r: get(f"/api/cars/{r.choice(car_ids)}/calendar"),
+        ),
+        (
+            "POST /api/cars/",
+            lambda r: post(
+                "/api/cars/",
+                {
+                    "id": f"C{10**9 + r.randint(0, 10**6)}",
+                    "make": "Skoda",
+                    "model": "Octavia",
+                    "branch": r.choice(branch_ids),
+                },
+            ),
+        ),
+        (
+            "PUT /api/cars/<pk>/",
+            lambda r: client.put(
+                f"/api/cars/{r.choice(car_ids)}/",
+                {"branch": r.choice(branch_ids)},
+                content_type="application/json",
+            ).content,
+        ),
+        (
+            "DELETE /api/cars/<pk>/",
+            lambda r: client.delete(f"/api/cars/{r.choice(car_ids)}/").content,
+        ),
+        ("GET /api/branches/", lambda r: get("/api/branches/")),
+        (
+            "GET /api/branches/<pk>/",
+            lambda r: get(f"/api/branches/{r.choice(branch_ids)}/"),
+        ),
+        ("POST /api/branches/", lambda r: post("/api/branches/", {"name": "Zlin"})),
+        (
+            "DELETE /api/branches/<pk>/",
+            lambda r: client.delete(f"/api/branches/{r.choice(branch_ids)}/").content,
+        ),
+        (
+            "GET /api/branches/<pk>/inventory",
+            lambda r: get(f"/api/branches/{r.choice(branch_ids)}/inventory"),
+        ),
+        (
+            "POST /api/branches/<pk>/inventory",
+            lambda r: post(
+                f"/api/branches/{r.choice(branch_ids)}/inventory",
+                {"at_time": when(r).isoformat(sep=" ")},
+            ),
+        ),
+        ("GET /api/schedules/", lambda r: get("/api/schedules/")),
+        (
+            "GET /api/schedules/?page_size=100",
+            lambda r: get("/api/schedules/?page_size=100"),
+        ),
+        ("GET /api/schedules/?stream=1", lambda r: get("/api/schedules/?stream=1")),
+        (
+            "GET /api/schedules/?car=<pk>",
+            lambda r: get(f"/api/schedules/?car={r.choice(car_ids)}"),
+        ),
+        (
+            "GET /api/schedules/?car=<pk>&from=&to=",
+            lambda r: get(
+                f"/api/schedules/?car={r.choice(car_ids)}"
+                f"&from={(t := when(r)).isoformat()}"
+                f"&to={(t + timedelta(days=2)).isoformat()}"
+            ),
+        ),
+        (
+            "GET /api/schedules/?origin_branch=<pk>&from=&to=",
+            lambda r: get(
+                f"/api/schedules/?origin_branch={r.choice(branch_ids)}"
+                f"&from={(t := when(r)).isoformat()}"
+                f"&to={(t + timedelta(days=2)).isoformat()}"
+            ),
+        ),
+        (
+            "GET /api/schedules/?destination_branch=<pk>&from=&to=&ordering=end_time",
+            lambda r: get(
+                f"/api/schedules/?destination_branch={r.choice(branch_ids)}"
+                f"&from={(t := when(r)).isoformat()}"
+                f"&to={(t + timedelta(days=2)).isoformat()}&ordering=end_time"
+            ),
+        ),
+        (
+            "GET /api/schedules/?from=&to=&ordering=start_time",
+            lambda r: get(
+                f"/api/schedules/?from={(t := when(r)).isoformat()}"
+                f"&to={(t + timedelta(days=2)).isoformat()}&ordering=start_time"
+            ),
+        ),
+        (
+            "GET /api/schedules/<pk>/",
+            lambda r: get(f"/api/schedules/{r.choice(schedule_ids)}/"),
+        ),
+        ("POST /api/schedules/", lambda r: post("/api/schedules/", booking(r))),
+        (
+            "POST /api/schedules/batch/",
+            lambda r: post("/api/schedules/batch/", [booking(r) for _ in range(10)]),
+        ),
+        (
+            "POST /api/availability/",
+            lambda r: post(
+                "/api/availability/",
+                [
+                    {
+                        "origin_branch": r.choice(branch_ids),
+                        "start_time": when(r).isoformat(sep=" "),
+                        "duration": "03:00:00",
+                    }
+                    for _ in range(10)
+                ],
+            ),
+        ),
+        ("GET /api/async/cars/", lambda r: get("/api/async/cars/")),
+        (
+            "GET /api/async/cars/<pk>/",
+            lambda r: get(f"/api/async/cars/{r.choice(car_ids)}/"),
+        ),
+        ("GET /api/async/branches/", lambda r: get("/api/async/branches/")),
+        (
+            "GET /api/async/branches/<pk>/",
+            lambda r: get(f"/api/async/branches/{r.choice(branch_ids)}/"),
+        ),
+        (
+            "GET /api/async/branches/<pk>/inventory",
+            lambda r: get(f"/api/async/branches/{r.choice(branch_ids)}/inventory"),
+        ),
+        ("GET /api/async/schedules/", lambda r: get("/api/async/schedules/")),
+        (
+            "GET /api/async/schedules/<pk>/",
+            lambda r: get(f"/api/async/schedules/{r.choice(schedule_ids)}/"),
+        ),
+        (
+            "GET /api/branches/occupancy/ (30 days, hourly)",
+            lambda r: get(
+                f"/api/branches/occupancy/?from={(t := when(r)).isoformat()}"
+                f"&to={(t + timedelta(days=30)).isoformat()}"
+            ),
+        ),
+        (
+            "GET /api/inventory",
+            lambda r: get(f"/api/inventory?at_time={when(r).isoformat()}"),
+        ),
+        (
+            "GET /api/reports/utilization/ (30 days, by branch)",
+            lambda r: get(
+                f"/api/reports/utilization/?from={(t := when(r)).isoformat()}"
+                f"&to={(t + timedelta(days=30)).isoformat()}&by=branch"
+            ),
+        ),
+        ("GET /api/inventory-cache/", lambda r: get("/api/inventory-cache/")),
+    ]
+
+
+class QueryCounter:
+    # Counts without keeping the SQL, which the debug cursor caps at 9000.
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def measure(call, repeat, seed):
+    times, queries = [], []
+    for i in range(repeat):
+        r = random.Random(seed * 1000 + i)
+        counter = QueryCounter()
+        cache.clear()
+        with transaction.atomic(), connection.execute_wrapper(counter):
+            started = time.perf_counter()
+            call(r)
+            times.append(time.perf_counter() - started)
+            transaction.set_rollback(True)
+        queries.append(counter.count)
+    times.sort()
+    return {
+        "runs": repeat,
+        "min_ms": round(times[0] * 1000, 3),
+        "median_ms": round(statistics.median(times) * 1000, 3),
+        "mean_ms": round(statistics.fmean(times) * 1000, 3),
+        "p95_ms": round(times[min(len(times) - 1, int(len(times) * 0.95))] * 1000, 3),
+        "queries": statistics.median_low(queries),
+    }
+
+
+def run(sizes, repeat, only):
+    # Lets the test client's host through ALLOWED_HOSTS, like the test runner.
+    setup_test_environment()
+    results = []
+    for size in sizes:
+        old_name = connection.creation.create_test_db(verbosity=0)
+        try:
+            options = fleet_options(size)
+            started = time.perf_counter()
+            call_command("generate_fleet", *[f"--{k}={v}" for k, v in options.items()])
+            print(
+                f"{size} schedules: generated in {time.perf_counter() - started:.1f}s",
+                file=sys.stderr,
+            )
+            with patch("car_api.utils.now", return_value=NOW):
+                for seed, (name, call) in enumerate(cases()):
+                    if only and not any(o in name for o in only):
+                        continue
+                    result = {"size": size, "name": name, **measure(call, repeat, seed)}
+                    print(
+                        f"  {name:<40} median {result['median_ms']:>10} ms  "
+                        f"{result['queries']} queries",
+                        file=sys.stderr,
+                    )
+                    results.append(result)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=Path(__file__).resolve().parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(before_path, after_path, threshold):
+    with open(before_path) as f:
+        before = {(r["size"], r["name"]): r for r in json.load(f)["results"]}
+    with open(after_path) as f:
+        after = {(r["size"], r["name"]): r for r in json.load(f)["results"]}
+
+    regressions = 0
+    for key in sorted(before.keys() & after.keys()):
+        ratio = after[key]["median_ms"] / max(before[key]["median_ms"], 1e-6)
+        flag = ""
+        if ratio > threshold:
+            flag = "  REGRESSION"
+            regressions += 1
+        print(
+            f"{key[0]:>7} {key[1]:<40} {before[key]['median_ms']:>10} ms -> "
+            f"{after[key]['median_ms']:>10} ms  x{ratio:.2f}{flag}"
+        )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", nargs="+", type=int, default=DEFAULT_SIZES)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--only", nargs="+", help="Only run the cases whose name contains one of these."
+    )
+    parser.add_argument("--output", help="Write the JSON results here, not stdout.")
+    parser.add_argument(
+        "--compare",
+        nargs=2,
+        metavar=("BEFORE", "AFTER"),
+        help="Compare two result files instead of running.",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=1.2,
+        help="Median slowdown flagged as a regression by --compare.",
+    )
+    args = parser.parse_args()
+
+    if args.compare:
+        sys.exit(1 if compare(*args.compare, args.threshold) else 0)
+
+    results = run(args.sizes, args.repeat, args.only)
+    report = {
+        "commit": git_commit(),
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "django": django.get_version(),
+        "database": connection.vendor,
+        "repeat": args.repeat,
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,8 @@
 from django.contrib import admin
 
-from .models import Car, Schedule, Branch
+from .models import Car, Schedule, Branch, TransferTime
 
 admin.site.register(Car)
 admin.site.register(Schedule)
 admin.site.register(Branch)
+admin.site.register(TransferTime)
@@ -0,0 +1,137 @@
+from bisect import bisect_left, bisect_right
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from .models import Schedule
+
+# Which of the free cars a booking gets when it doesn't ask for one. The
+# policy is picked per deployment with settings.CAR_ALLOCATION_POLICY, the
+# dotted path of an AllocationPolicy subclass.
+
+# Bookings further away than this don't count as a car's neighbours, so a
+# gap longer than it is just long.
+FIT_HORIZON = timedelta(days=7)
+
+
+class AllocationPolicy:
+    """
+    Orders the free cars for bookings, best first. rank() gets a list of
+    (origin, start_time, end_time, destination, car_ids) bookings and returns
+    the car IDs of each one in the order they should be tried.
+    """
+
+    def rank(self, bookings):
+        raise NotImplementedError
+
+
+class FirstFreePolicy(AllocationPolicy):
+    """The lowest car ID first, which is what bookings always used to get."""
+
+    def rank(self, bookings):
+        return [sorted(car_ids) for *_, car_ids in bookings]
+
+
+class BestFitPolicy(AllocationPolicy):
+    """
+    Keeps long free stretches for long bookings and saves moving cars about.
+    Cars whose next booking leaves from this booking's destination come
+    first, as they'll be where they're needed anyway, then cars with no
+    booking soon after, and last cars this booking would leave at the wrong
+    branch for their next one. Within those, the car with the smallest gaps
+    either side of the booking wins, so it fills a hole in a car's schedule
+    rather than cutting a long free stretch in two.
+    """
+
+    def rank(self, bookings):
+        bookings = list(bookings)
+        car_ids = set().union(*(cars for *_, cars in bookings))
+        if not car_ids:
+            return [[] for _ in bookings]
+        neighbours = Neighbours(
+            car_ids,
+            min(start for _, start, *_ in bookings),
+            max(end for _, _, end, *_ in bookings),
+        )
+        return [
+            sorted(cars, key=self.score(neighbours, start, end, destination))
+            for _, start, end, destination, cars in bookings
+        ]
+
+    def score(self, neighbours, start_time, end_time, destination):
+        horizon = FIT_HORIZON.total_seconds()
+
+        def key(car):
+            gap_before, gap_after, next_origin = neighbours.around(
+                car, start_time, end_time
+            )
+            if next_origin is None:
+                placement = 1
+            else:
+                placement = 0 if next_origin == destination else 2
+            before = horizon if gap_before is None else gap_before.total_seconds()
+            after = horizon if gap_after is None else gap_after.total_seconds()
+            return placement, before + after, car
+
+        return key
+
+
+class Neighbours:
+    """
+    The bookings of some cars from FIT_HORIZON before to FIT_HORIZON after
+    a time span, fetched in one query, for finding what's either side of a
+    booking with a bisect per car.
+    """
+
+    def __init__(self, car_ids, start_time, end_time):
+        rows = (
+            Schedule.objects.filter(
+                car_id__in=car_ids,
+                end_time__gte=start_time - FIT_HORIZON,
+                start_time__lte=end_time + FIT_HORIZON,
+            )
+            .order_by("car_id", "start_time")
+            .values_list("car_id", "start_time", "end_time", "origin_branch")
+        )
+        self.cars = {}
+        for car, start, end, origin in rows:
+            starts, ends, origins = self.cars.setdefault(car, ([], [], []))
+            starts.append(start)
+            ends.append(end)
+            origins.append(origin)
+        # Sorted on their own for the bisect, the order of the bookings is
+        # only needed for the starts.
+        for _, ends, _ in self.cars.values():
+            ends.sort()
+
+    def around(self, car, start_time, end_time):
+        """
+        The gap since the car's last booking ended, the gap until its next
+        one starts and the branch that one leaves from, each None if there's
+        no such booking within the horizon.
+        """
+        if car not in self.cars:
+            return None, None, None
+        starts, ends, origins = self.cars[car]
+        gap_before = gap_after = next_origin = None
+        i = bisect_left(ends, start_time)
+        if i > 0 and start_time - ends[i - 1] <= FIT_HORIZON:
+            gap_before = start_time - ends[i - 1]
+        j = bisect_right(starts, end_time)
+        if j < len(starts) and starts[j] - end_time <= FIT_HORIZON:
+            gap_after = starts[j] - end_time
+            next_origin = origins[j]
+        return gap_before, gap_after, next_origin
+
+
+def get_policy():
+    return import_string(settings.CAR_ALLOCATION_POLICY)()
+
+
+def rank(origin, start_time, end_time, destination, car_ids):
+    """The car IDs free for a single booking, in the order to try them."""
+    (ranked,) = get_policy().rank(
+        [(origin, start_time, end_time, destination, car_ids)]
+    )
+    return ranked
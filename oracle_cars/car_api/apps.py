@@ -1,6 +1,13 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
 
 
 class CarApiConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "car_api"
+
+    def ready(self):
+        from . import checks, signals  # noqa: F401
+        from . import timing
+
+        connection_created.connect(timing.install)
@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+# Caches that keep their data inside one process. The inventory cache is
+# invalidated by writing to the cache, so with one of these and several
+# workers the other workers never see the writes.
+PROCESS_LOCAL_CACHES = {
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+}
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    backend = settings.CACHES.get("default", {}).get("BACKEND")
+    if backend not in PROCESS_LOCAL_CACHES:
+        return []
+    return [
+        Warning(
+            f"The default cache ({backend}) isn't shared between processes.",
+            hint=(
+                "Inventory invalidations won't reach other workers. "
+                "Use Redis or Memcached."
+            ),
+            id="car_api.W001",
+        )
+    ]
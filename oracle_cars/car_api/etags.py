@@ -0,0 +1,108 @@
+import hashlib
+import secrets
+from functools import wraps
+
+from django.db import connection, transaction
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import Version
+
+# Versions of each table, kept in the Version table and replaced on every
+# write (see signals.py), and the values of single rows. ETags are built from
+# them, so a conditional GET is answered with a primary key lookup, without
+# the view's queries or the serializers. Being in the database, a bump is
+# seen by every worker.
+#
+# Every booking writes to the schedules, so bumping their version inside the
+# booking's transaction would have all bookings queue on the lock of that one
+# row until commit. Bumps happen after the commit instead, in a transaction
+# of their own. In between, a conditional GET can still be answered 304 with
+# the old list.
+
+
+def _key(model):
+    return model._meta.label_lower
+
+
+def versions(model):
+    """The current version of the whole table."""
+    found = Version.objects.filter(key=_key(model)).values_list("value", flat=True)
+    # Tables that were never written to have no version yet.
+    return [found.first() or 0]
+
+
+def row(model, pk):
+    """
+    The current values of one row, empty if there is none. They stand in for
+    a version of the row: reading them is the same primary key lookup, and
+    they change exactly when the row does.
+    """
+    return list(model.objects.filter(pk=pk).values_list())
+
+
+def _upsert(model):
+    # Random rather than counted up, so a version from a rolled back write
+    # can't come round again for different data, in one upsert.
+    Version.objects.bulk_create(
+        [Version(key=_key(model), value=secrets.randbits(62) + 1)],
+        update_conflicts=True,
+        update_fields=["value"],
+        # MySQL upserts on any unique key and won't take a target.
+        unique_fields=(
+            ["key"]
+            if connection.features.supports_update_conflicts_with_target
+            else None
+        ),
+    )
+
+
+def bump(model, in_transaction=False):
+    """
+    Move the table on to a new version once the current transaction commits,
+    or inside it with in_transaction, so it commits or rolls back with the
+    write.
+    """
+    if in_transaction:
+        _upsert(model)
+    else:
+        transaction.on_commit(lambda: _upsert(model))
+
+
+def make_etag(request, parts):
+    # The same versions can still render differently for a different query
+    # string or output format.
+    raw = repr((request.get_full_path(), request.accepted_renderer.format, parts))
+    return quote_etag(hashlib.sha1(raw.encode()).hexdigest())
+
+
+def etag_from_versions(get_versions):
+    """
+    Give a view method's responses an ETag built from
+    get_versions(*args, **kwargs), and answer 304 Not Modified when the
+    request's If-None-Match already has it.
+    """
+
+    def decorator(fn):
+        @wraps(fn)
+        def wrapped_fn(self, request, *args, **kwargs):
+            # Read before the data, so a write racing with this request can
+            # only make the ETag older than the response, never newer.
+            etag = make_etag(request, get_versions(*args, **kwargs))
+            if_none_match = request.headers.get("If-None-Match")
+            if if_none_match:
+                known = {e.removeprefix("W/") for e in parse_etags(if_none_match)}
+                if etag in known:
+                    return Response(
+                        status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag}
+                    )
+
+            response = fn(self, request, *args, **kwargs)
+            if response.status_code == status.HTTP_200_OK:
+                response["ETag"] = etag
+            return response
+
+        return wrapped_fn
+
+    return decorator
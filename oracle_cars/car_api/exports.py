@@ -0,0 +1,138 @@
+import csv
+import io
+
+from django.db.models import Q
+
+from .models import Schedule
+from .pagination import keyset_chunks
+from .serializers import ScheduleSerializer
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:  # pragma: no cover
+    pyarrow = None
+
+# Schedules exported as CSV, or as Parquet or Arrow IPC stream files when
+# pyarrow is installed, for the export_schedules command and the export
+# endpoint. Rows are read as values_list tuples one chunk per query, picking
+# up after the last ID of the chunk before (see pagination.keyset_chunks),
+# and written a chunk at a time, so memory use doesn't grow with the number
+# of schedules on any backend.
+
+# Rows fetched from the database and written per chunk.
+EXPORT_CHUNK_SIZE = 10000
+
+CONTENT_TYPES = {
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+EXTENSIONS = {"csv": ".csv", "parquet": ".parquet", "arrow": ".arrows"}
+FIELDS = list(ScheduleSerializer().fields)
+
+
+def available_formats():
+    return ["csv", "parquet", "arrow"] if pyarrow else ["csv"]
+
+
+def schedules(since=None, until=None, branch=None):
+    """
+    Schedules running at some point between since and until, leaving from or
+    arriving at branch, in ID order. Each filter is optional.
+    """
+    queryset = Schedule.objects.order_by("pk")
+    if since is not None:
+        queryset = queryset.filter(end_time__gt=since)
+    if until is not None:
+        queryset = queryset.filter(start_time__lt=until)
+    if branch is not None:
+        queryset = queryset.filter(
+            Q(origin_branch=branch) | Q(destination_branch=branch)
+        )
+    return queryset
+
+
+def _csv(queryset, chunk_size):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(FIELDS)
+    for chunk in keyset_chunks(queryset, FIELDS, chunk_size):
+        writer.writerows(chunk)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+class _Sink(io.RawIOBase):
+    """
+    Write-only file handing back what was written since the last take().
+    Keeps counting the position, which the Parquet writer uses for the
+    offsets in the file footer.
+    """
+
+    def __init__(self):
+        self.parts = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def take(self):
+        data = b"".join(self.parts)
+        self.parts = []
+        return data
+
+
+def arrow_schema():
+    types = {
+        "id": pyarrow.int64(),
+        "start_time": pyarrow.timestamp("us"),
+        "end_time": pyarrow.timestamp("us"),
+        "car_id": pyarrow.string(),
+        "origin_branch": pyarrow.int64(),
+        "destination_branch": pyarrow.int64(),
+    }
+    return pyarrow.schema((name, types[name]) for name in FIELDS)
+
+
+def _arrow(queryset, chunk_size, fmt):
+    schema = arrow_schema()
+    sink = _Sink()
+    if fmt == "parquet":
+        writer = pyarrow.parquet.ParquetWriter(sink, schema)
+    else:
+        writer = pyarrow.ipc.new_stream(sink, schema)
+    for chunk in keyset_chunks(queryset, FIELDS, chunk_size):
+        columns = zip(*chunk)
+        # One Parquet row group, or one Arrow record batch, per chunk.
+        writer.write_batch(
+            pyarrow.record_batch(
+                [pyarrow.array(c, f.type) for c, f in zip(columns, schema)],
+                schema=schema,
+            )
+        )
+        yield sink.take()
+    writer.close()
+    yield sink.take()
+
+
+def render(queryset, fmt, chunk_size=None):
+    """The export of queryset in the given format, as an iterator of bytes."""
+    if fmt not in available_formats():
+        raise ValueError(f"Unsupported export format {fmt!r}.")
+    chunk_size = chunk_size or EXPORT_CHUNK_SIZE
+    if fmt == "csv":
+        return _csv(queryset, chunk_size)
+    return _arrow(queryset, chunk_size, fmt)
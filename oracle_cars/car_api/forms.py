@@ -35,3 +35,111 @@ class TimeframeForm(forms.Form):
         if self.cleaned_data.get("end_time"):
             return self.cleaned_data["end_time"]
         return self.cleaned_data["start_time"] + self.cleaned_data["duration"]
+
+
+# A timeframe starting from a given branch. Only checks the branch ID is a
+# number, so callers validating many of these can look the branches up at once.
+class BranchTimeframeForm(TimeframeForm):
+    origin_branch = forms.IntegerField()
+
+
+# A timeframe to check availability for, optionally ending at another branch.
+class AvailabilityForm(BranchTimeframeForm):
+    destination_branch = forms.IntegerField(required=False)
+
+
+# Everything needed to book a schedule, for validating a batch of bookings
+# without a serializer (and its per-field database lookups) for each one.
+class BookingForm(BranchTimeframeForm):
+    destination_branch = forms.IntegerField()
+    car_id = forms.CharField(required=False)
+
+
+# An optional 'from'/'to' time window. 'from' isn't a valid attribute name,
+# so the fields are added in __init__.
+class TimeWindowForm(forms.Form):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields["from"] = forms.DateTimeField(required=False)
+        self.fields["to"] = forms.DateTimeField(required=False)
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if cleaned_data.get("from") and cleaned_data.get("to") and cleaned_data.get(
+            "from"
+        ) > cleaned_data.get("to"):
+            raise forms.ValidationError("from cannot be after to.")
+        return cleaned_data
+
+
+# A time window that has to be given.
+class RequiredTimeWindowForm(TimeWindowForm):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields["from"].required = True
+        self.fields["to"].required = True
+
+
+# The time window and bucket size of a branch occupancy series, optionally
+# for a single branch.
+class OccupancyForm(RequiredTimeWindowForm):
+    step = forms.DurationField(required=False)
+    branch = forms.IntegerField(required=False)
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if cleaned_data.get("step") is not None and cleaned_data.get(
+            "step"
+        ) <= datetime.timedelta(seconds=0):
+            raise forms.ValidationError("step must be positive.")
+        return cleaned_data
+
+
+# The time window of a utilization report, whether it's per car or per
+# branch, and its format.
+class UtilizationForm(RequiredTimeWindowForm):
+    by = forms.ChoiceField(
+        choices=[("car", "Car"), ("branch", "Branch")], required=False
+    )
+    output = forms.ChoiceField(
+        choices=[("json", "JSON"), ("csv", "CSV")], required=False
+    )
+
+
+# The time to take a snapshot of the whole fleet's inventory at.
+class InventoryForm(forms.Form):
+    at_time = forms.DateTimeField()
+
+
+# Filters and ordering for the schedule list, all optional.
+class ScheduleFilterForm(TimeWindowForm):
+    car = forms.CharField(required=False)
+    origin_branch = forms.IntegerField(required=False)
+    destination_branch = forms.IntegerField(required=False)
+    ordering = forms.ChoiceField(
+        choices=[
+            (field, field)
+            for name in ["id", "start_time", "end_time"]
+            for field in [name, f"-{name}"]
+        ],
+        required=False,
+    )
+
+
+# Filters and file format for a schedule export, all optional.
+class ScheduleExportForm(forms.Form):
+    since = forms.DateTimeField(required=False)
+    until = forms.DateTimeField(required=False)
+    branch = forms.IntegerField(required=False)
+    output = forms.ChoiceField(
+        choices=[("csv", "CSV"), ("parquet", "Parquet"), ("arrow", "Arrow IPC stream")],
+        required=False,
+    )
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if cleaned_data.get("since") and cleaned_data.get("until") and cleaned_data.get(
+            "since"
+        ) > cleaned_data.get("until"):
+            raise forms.ValidationError("since cannot be after until.")
+        return cleaned_data
@@ -0,0 +1,108 @@
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+
+from . import locations
+
+# Read-through cache for inventory and free car answers, shared by every
+# worker using the same cache backend (see CACHES in settings/prod.py).
+# Answers are stored per branch and time bucket. Writes give the branches
+# they affect a new generation (see signals.py), which orphans all of those
+# branches' entries at once.
+#
+# A hit costs a round trip for the generations and one for the answer. With
+# the database cache those are a dozen queries against a single indexed
+# lookup in the segments, so there the cache is skipped altogether.
+UNCACHED_BACKENDS = {"django.core.cache.backends.db.DatabaseCache"}
+
+KEY_PREFIX = "car_api:inventory"
+TIME_BUCKET = timedelta(hours=1)
+TIMEOUT = 60 * 60
+
+
+def _generation_key(branch_id):
+    return f"{KEY_PREFIX}:generation:{branch_id}"
+
+
+def _generations(branch_id):
+    keys = [_generation_key("all"), _generation_key(branch_id)]
+    found = cache.get_many(keys)
+    for key in keys:
+        if key not in found:
+            # Never restart from a known value, entries from an evicted
+            # generation may still be around.
+            found[key] = cache.get_or_set(key, _new_generation(), None)
+    return [found[key] for key in keys]
+
+
+def _new_generation():
+    # Random rather than cache.incr: the database cache increments with a
+    # separate get and set, so two workers bumping at once could both land on
+    # the same number and one of the writes would go unnoticed.
+    return uuid.uuid4().hex
+
+
+def _bucket(at_time):
+    return datetime.min + (at_time - datetime.min) // TIME_BUCKET * TIME_BUCKET
+
+
+# Hit and miss counts, kept per process so a read never writes to the
+# shared cache.
+_stats = Counter()
+
+
+def enabled():
+    return settings.CACHES["default"]["BACKEND"] not in UNCACHED_BACKENDS
+
+
+def read_through(kind, branch_id, at_time, args, compute, now):
+    """
+    Return the cached answer for kind/branch/args, or compute and store it.
+    Answers also depend on the current time through the schedules that have
+    finished, so each one is only used until the next one-way schedule ends.
+    """
+    if not enabled():
+        return compute()
+    everything, branch = _generations(branch_id)
+    bucket = _bucket(at_time).isoformat()
+    key = f"{KEY_PREFIX}:{kind}:{branch_id}:{everything}:{branch}:{bucket}"
+    entries = cache.get(key) or {}
+    if args in entries:
+        answer, valid_until = entries[args]
+        if valid_until is None or now < valid_until:
+            _stats[kind, "hits"] += 1
+            return answer
+
+    _stats[kind, "misses"] += 1
+    answer = compute()
+    entries[args] = (answer, locations.next_change(now))
+    cache.set(key, entries, TIMEOUT)
+    return answer
+
+
+def invalidate_branches(branch_ids):
+    """Drop the cached answers for the given branches, or all if None."""
+    if not enabled():
+        return
+    cache.set_many(
+        {
+            _generation_key(branch_id): _new_generation()
+            for branch_id in (["all"] if branch_ids is None else branch_ids)
+        },
+        None,
+    )
+
+
+def stats():
+    """Hit and miss counts for each kind of cached answer, in this process."""
+    return {
+        kind: {outcome: _stats[kind, outcome] for outcome in ["hits", "misses"]}
+        for kind in ["inventory", "free_cars"]
+    }
+
+
+def reset_stats():
+    _stats.clear()
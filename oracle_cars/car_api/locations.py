@@ -0,0 +1,277 @@
+from itertools import groupby
+
+from django.db import transaction
+from django.db.models import F, Min, Q
+
+from .models import Branch, Car, CarLocationSegment, Schedule
+
+# Where each car is over time, read from the CarLocationSegment table.
+#
+# A car sits at its home branch until its first unfinished one-way schedule
+# departs. After that each one-way schedule takes it out of circulation while
+# it runs and drops it at the destination once it ends, which is what the
+# segments record. Round trips don't move the car. Schedules that finished
+# before now are ignored, so a segment only counts if it starts after now.
+#
+# The segments are kept up to date from the schedule signals (see
+# signals.py). Writes that skip signals (bulk_create, QuerySet.update) need
+# to call update_cars themselves.
+
+# Cars handled per query when rebuilding the whole table.
+REBUILD_CHUNK_SIZE = 500
+
+
+def one_way_schedules():
+    """Schedules that move the car somewhere else."""
+    return Schedule.objects.exclude(origin_branch=F("destination_branch"))
+
+
+def segment_rows(trips):
+    """
+    Given one car's one-way (schedule id, start, end, destination) trips
+    sorted by start, return the (branch, schedule id, since, until) segments
+    it spends at branches between them.
+    """
+    segments = []
+    for i, (pk, _, end, destination) in enumerate(trips):
+        until = trips[i + 1][1] if i + 1 < len(trips) else None
+        if until is None or end < until:
+            segments.append((destination, pk, end, until))
+    return segments
+
+
+def _trips(car_ids):
+    rows = (
+        one_way_schedules()
+        .filter(car_id__in=car_ids)
+        .order_by("car_id", "start_time", "end_time", "id")
+        .values_list("car_id", "id", "start_time", "end_time", "destination_branch")
+    )
+    return {
+        car: [row[1:] for row in car_rows]
+        for car, car_rows in groupby(rows, key=lambda row: row[0])
+    }
+
+
+def _wanted(car_ids):
+    return {
+        (car, *segment)
+        for car, trips in _trips(car_ids).items()
+        for segment in segment_rows(trips)
+    }
+
+
+def _stored(car_ids):
+    return {
+        row[1:]: row[0]
+        for row in CarLocationSegment.objects.filter(car__in=car_ids).values_list(
+            "pk", "car", "branch", "schedule", "since", "until"
+        )
+    }
+
+
+def update_cars(car_ids):
+    """
+    Bring the segments of the given cars in line with their schedules,
+    writing only the ones that changed. Returns the branches of the segments
+    that were added or removed.
+    """
+    car_ids = set(car_ids)
+    if not car_ids:
+        return set()
+    wanted = _wanted(car_ids)
+    stored = _stored(car_ids)
+
+    removed = stored.keys() - wanted
+    added = wanted - stored.keys()
+    if removed:
+        CarLocationSegment.objects.filter(pk__in=[stored[r] for r in removed]).delete()
+    if added:
+        CarLocationSegment.objects.bulk_create(
+            CarLocationSegment(
+                car_id=car, branch_id=branch, schedule_id=pk, since=since, until=until
+            )
+            for car, branch, pk, since, until in added
+        )
+    return {row[1] for row in removed | added}
+
+
+def _car_id_chunks():
+    car_ids = list(Car.objects.order_by("pk").values_list("pk", flat=True))
+    for start in range(0, len(car_ids), REBUILD_CHUNK_SIZE):
+        yield car_ids[start : start + REBUILD_CHUNK_SIZE]
+
+
+@transaction.atomic
+def rebuild():
+    """Recreate every segment from the schedules."""
+    CarLocationSegment.objects.all().delete()
+    for chunk in _car_id_chunks():
+        update_cars(chunk)
+
+
+def check():
+    """
+    Compare the stored segments with the ones the schedules imply. Returns
+    the (car, branch, schedule, since, until) segments that are missing and
+    those that shouldn't be there.
+    """
+    missing, unexpected = set(), set()
+    for chunk in _car_id_chunks():
+        wanted = _wanted(chunk)
+        stored = _stored(chunk).keys()
+        missing |= wanted - stored
+        unexpected |= stored - wanted
+    return missing, unexpected
+
+
+def departures(at_time, now):
+    """Unfinished one-way schedules that have departed by the given time."""
+    return one_way_schedules().filter(end_time__gt=now, start_time__lt=at_time)
+
+
+def arrivals(branch_id, at_time, now):
+    """Segments putting a car at the branch at the given time."""
+    return CarLocationSegment.objects.filter(
+        Q(until__isnull=True) | Q(until__gte=at_time),
+        branch=branch_id,
+        since__gt=now,
+        since__lt=at_time,
+    )
+
+
+def cars_at(branch_id, at_time, now):
+    """The cars at a branch at the given time."""
+    at_home = Q(branch=branch_id) & ~Q(pk__in=departures(at_time, now).values("car_id"))
+    arrived = Q(pk__in=arrivals(branch_id, at_time, now).values("car"))
+    return Car.objects.filter(at_home | arrived)
+
+
+def car_branch_at(car, at_time, now):
+    """
+    The branch a car is at, or last stood at if it's out on a one-way
+    schedule, at the given time.
+    """
+    arrival = (
+        CarLocationSegment.objects.filter(car=car.pk, since__gt=now, since__lt=at_time)
+        .order_by("-since")
+        .values_list("branch", flat=True)
+        .first()
+    )
+    return car.branch_id if arrival is None else arrival
+
+
+def car_ids_at_many(points, now):
+    """
+    Given a list of (branch, time) points, return the set of IDs of the cars
+    at each of them, in the same order, in two queries.
+    """
+    if not points:
+        return []
+    branch_ids = {b for b, _ in points}
+    earliest = min(t for _, t in points)
+    latest = max(t for _, t in points)
+
+    # Home cars with the start of their first unfinished one-way schedule.
+    homes = (
+        Car.objects.filter(branch__in=branch_ids)
+        .annotate(
+            departure=Min(
+                "schedule__start_time",
+                filter=Q(schedule__end_time__gt=now)
+                & ~Q(schedule__origin_branch=F("schedule__destination_branch")),
+            )
+        )
+        .values_list("pk", "branch", "departure")
+    )
+    segments = CarLocationSegment.objects.filter(
+        Q(until__isnull=True) | Q(until__gte=earliest),
+        branch__in=branch_ids,
+        since__gt=now,
+        since__lt=latest,
+    ).values_list("car", "branch", "since", "until")
+    homes_at, segments_at = {}, {}
+    for car, branch, departure in homes:
+        homes_at.setdefault(branch, []).append((car, departure))
+    for car, branch, since, until in segments:
+        segments_at.setdefault(branch, []).append((car, since, until))
+
+    return [
+        {
+            car
+            for car, departure in homes_at.get(branch_id, ())
+            if departure is None or at_time <= departure
+        }
+        | {
+            car
+            for car, since, until in segments_at.get(branch_id, ())
+            if since < at_time and (until is None or at_time <= until)
+        }
+        for branch_id, at_time in points
+    ]
+
+
+def fleet_at(at_time, now):
+    """
+    Where every car is at the given time, in three queries: a dict of each
+    branch's car IDs, home cars first as in cars_at, and the IDs of the cars
+    out on a one-way schedule, which aren't at any branch.
+    """
+    branches = {
+        branch_id: []
+        for branch_id in Branch.objects.order_by("pk").values_list("pk", flat=True)
+    }
+    homes = (
+        Car.objects.annotate(
+            departure=Min(
+                "schedule__start_time",
+                filter=Q(schedule__end_time__gt=now)
+                & ~Q(schedule__origin_branch=F("schedule__destination_branch")),
+            )
+        )
+        .order_by("pk")
+        .values_list("pk", "branch", "departure")
+    )
+    arrived = dict(
+        CarLocationSegment.objects.filter(
+            Q(until__isnull=True) | Q(until__gte=at_time),
+            since__gt=now,
+            since__lt=at_time,
+        ).values_list("car", "branch")
+    )
+
+    in_transit, placed = [], []
+    for car, home, departure in homes:
+        if departure is None or at_time <= departure:
+            placed.append((car, home, home))
+        elif car in arrived:
+            placed.append((car, home, arrived[car]))
+        else:
+            # Departed and not yet dropped off anywhere.
+            in_transit.append(car)
+    # Cars based at the branch first, including ones brought back to it.
+    for car, home, branch_id in sorted(placed, key=lambda p: p[1] != p[2]):
+        branches[branch_id].append(car)
+    return branches, in_transit
+
+
+def car_branches(car_id):
+    """The branches a car's inventory touches: its home and its segments."""
+    branches = set(
+        CarLocationSegment.objects.filter(car=car_id).values_list("branch", flat=True)
+    )
+    branches.update(Car.objects.filter(pk=car_id).values_list("branch", flat=True))
+    return branches
+
+
+def next_change(now):
+    """
+    The earliest time after now at which a one-way schedule finishes, which
+    is when answers from cars_at can change without any write. None if
+    nothing is scheduled to finish.
+    """
+    return (
+        one_way_schedules()
+        .filter(end_time__gt=now)
+        .aggregate(next_change=Min("end_time"))["next_change"]
+    )
@@ -0,0 +1,80 @@
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ... import exports
+
+
+class Command(BaseCommand):
+    help = (
+        "Export the schedules to a CSV file, or to a Parquet or Arrow IPC "
+        "stream file when pyarrow is installed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "output",
+            help="File to write, or - for stdout. Its extension picks the format.",
+        )
+        parser.add_argument(
+            "--format",
+            choices=list(exports.CONTENT_TYPES),
+            help="csv, parquet or arrow, when the output's extension doesn't say.",
+        )
+        parser.add_argument(
+            "--since",
+            type=datetime.fromisoformat,
+            help="Only schedules ending after this time.",
+        )
+        parser.add_argument(
+            "--until",
+            type=datetime.fromisoformat,
+            help="Only schedules starting before this time.",
+        )
+        parser.add_argument(
+            "--branch",
+            type=int,
+            help="Only schedules leaving from or arriving at this branch.",
+        )
+        parser.add_argument("--chunk-size", type=int, default=exports.EXPORT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        fmt = options["format"] or self.format_of(options["output"])
+        if fmt not in exports.available_formats():
+            raise CommandError(f"{fmt} exports need pyarrow installed.")
+
+        schedules = exports.schedules(
+            options["since"], options["until"], options["branch"]
+        )
+        count = schedules.count()
+        started = time.perf_counter()
+        chunks = exports.render(schedules, fmt, options["chunk_size"])
+        if options["output"] == "-":
+            for chunk in chunks:
+                sys.stdout.buffer.write(chunk)
+            sys.stdout.buffer.flush()
+        else:
+            with open(options["output"], "wb") as f:
+                for chunk in chunks:
+                    f.write(chunk)
+        elapsed = time.perf_counter() - started
+
+        # stderr, so it doesn't end up in an export written to stdout.
+        self.stderr.write(
+            f"Exported {count} schedules as {fmt} in {elapsed:.1f}s "
+            f"({count / max(elapsed, 1e-9):.0f} rows/s)."
+        )
+
+    def format_of(self, output):
+        suffix = Path(output).suffix.lower()
+        for fmt, extension in exports.EXTENSIONS.items():
+            if suffix == extension:
+                return fmt
+        if suffix == ".arrow":
+            return "arrow"
+        if output == "-":
+            return "csv"
+        raise CommandError(f"Can't tell the format of {output}, use --format.")
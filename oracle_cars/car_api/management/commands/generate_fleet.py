@@ -0,0 +1,178 @@
+import random
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from ... import etags, inventory_cache, locations
+from ...models import Branch, Car, CarLocationSegment, Schedule, TransferTime
+from ...signals import now_and_on_commit
+
+BRANCH_NAMES = [
+    "Prague",
+    "Brno",
+    "Ostrava",
+    "Plzen",
+    "Liberec",
+    "Olomouc",
+    "Ceske Budejovice",
+    "Hradec Kralove",
+    "Pardubice",
+    "Zlin",
+]
+MODELS = [
+    ("Honda", "Civic"),
+    ("Honda", "Accord"),
+    ("Ford", "Focus"),
+    ("Ford", "Falcon"),
+    ("Ford", "Mustang"),
+    ("Holden", "Barina"),
+    ("Holden", "Captiva"),
+    ("Skoda", "Octavia"),
+    ("Skoda", "Fabia"),
+]
+# (weight, shortest, longest) booking lengths in hours: errands, weekends and
+# holidays.
+DURATIONS = [(6, 1, 12), (3, 24, 72), (1, 72, 240)]
+MEAN_DURATION = sum(w * (lo + hi) / 2 for w, lo, hi in DURATIONS) / sum(
+    w for w, _, _ in DURATIONS
+)
+BATCH_SIZE = 5000
+
+
+def generate(branches, cars, schedules, density, one_way, seed, start):
+    """
+    Build an unsaved fleet: branches, cars spread over them and each car's
+    schedules. Every schedule starts where the car's last one left it and
+    they never overlap. density is the share of the time cars spend booked.
+    The same arguments always give the same fleet.
+    """
+    rng = random.Random(seed)
+    branch_objs = [
+        Branch(
+            pk=i + 1,
+            name=BRANCH_NAMES[i] if i < len(BRANCH_NAMES) else f"Branch {i + 1}",
+        )
+        for i in range(branches)
+    ]
+    car_objs = []
+    for i in range(cars):
+        make, model = rng.choice(MODELS)
+        car_objs.append(
+            Car(id=f"C{i + 1}", make=make, model=model, branch=rng.choice(branch_objs))
+        )
+
+    mean_gap = MEAN_DURATION * (1 - density) / density
+    weights = [w for w, _, _ in DURATIONS]
+    schedule_objs = []
+    for i, car in enumerate(car_objs):
+        location = car.branch
+        cursor = start + timedelta(hours=rng.uniform(0, mean_gap))
+        for _ in range(schedules // cars + (i < schedules % cars)):
+            _, shortest, longest = rng.choices(DURATIONS, weights)[0]
+            start_time = cursor + timedelta(hours=rng.expovariate(1 / mean_gap))
+            # Bookings start on the next quarter hour.
+            start_time = start_time.replace(second=0, microsecond=0) + timedelta(
+                minutes=-start_time.minute % 15
+            )
+            end_time = start_time + timedelta(
+                minutes=15 * rng.randint(shortest * 4, longest * 4)
+            )
+            destination = location
+            if branches > 1 and rng.random() < one_way:
+                destination = rng.choice([b for b in branch_objs if b is not location])
+            schedule_objs.append(
+                Schedule(
+                    start_time=start_time,
+                    end_time=end_time,
+                    car_id=car,
+                    origin_branch=location,
+                    destination_branch=destination,
+                )
+            )
+            location = destination
+            # Leave a minute so back to back bookings don't touch.
+            cursor = end_time + timedelta(minutes=1)
+    return branch_objs, car_objs, schedule_objs
+
+
+class Command(BaseCommand):
+    help = "Fill the database with a generated fleet of branches, cars and schedules."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--branches", type=int, default=10)
+        parser.add_argument("--cars", type=int, default=100)
+        parser.add_argument("--schedules", type=int, default=1000)
+        parser.add_argument(
+            "--density",
+            type=float,
+            default=0.5,
+            help="Share of the time cars spend booked, between 0 and 1.",
+        )
+        parser.add_argument(
+            "--one-way",
+            type=float,
+            default=0.2,
+            help="Share of schedules ending at another branch.",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--start",
+            type=datetime.fromisoformat,
+            default=datetime(2025, 1, 1),
+            help="When the first bookings start, e.g. 2025-01-01.",
+        )
+        parser.add_argument(
+            "--clear",
+            action="store_true",
+            help="Delete the existing branches, cars and schedules first.",
+        )
+
+    def handle(self, *args, **options):
+        if options["branches"] < 1 or options["cars"] < 1:
+            raise CommandError("At least one branch and one car are needed.")
+        if not 0 < options["density"] < 1:
+            raise CommandError("--density must be between 0 and 1.")
+        if not options["clear"] and Branch.objects.exists():
+            raise CommandError("The database isn't empty, use --clear to replace it.")
+
+        branches, cars, schedules = generate(
+            options["branches"],
+            options["cars"],
+            options["schedules"],
+            options["density"],
+            options["one_way"],
+            options["seed"],
+            options["start"],
+        )
+        with transaction.atomic():
+            if options["clear"]:
+                # Straight DELETEs, children first, everything derived is
+                # rebuilt below and going through the signals one row at a
+                # time takes ages. Transfer times are between the old
+                # branches, so they go too.
+                with connection.cursor() as cursor:
+                    for model in [
+                        CarLocationSegment,
+                        TransferTime,
+                        Schedule,
+                        Car,
+                        Branch,
+                    ]:
+                        table = connection.ops.quote_name(model._meta.db_table)
+                        cursor.execute(f"DELETE FROM {table}")
+                etags.bump(TransferTime, in_transaction=True)
+            for model, objs in [(Branch, branches), (Car, cars), (Schedule, schedules)]:
+                model.objects.bulk_create(objs, batch_size=BATCH_SIZE)
+            # bulk_create skips the signals.
+            locations.rebuild()
+            for model in [Branch, Car, Schedule]:
+                etags.bump(model)
+            now_and_on_commit(inventory_cache.invalidate_branches, None)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Generated {len(branches)} branches, {len(cars)} cars and "
+                f"{len(schedules)} schedules."
+            )
+        )
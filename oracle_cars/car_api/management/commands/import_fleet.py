@@ -0,0 +1,247 @@
+import csv
+import json
+from collections import defaultdict
+from itertools import islice
+from pathlib import Path
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from ... import signals
+from ...models import Branch, Car, Schedule
+from ...utils import get_overlapping_schedules
+
+# Rows validated, inserted and committed together.
+BATCH_SIZE = 5000
+
+
+def read_rows(path):
+    """
+    Yield (line number, row) for each row of a CSV file with a header line
+    or of a JSON lines file, reading the file as it goes. A JSON line that
+    isn't an object comes back as None.
+    """
+    path = Path(path)
+    suffix = path.suffix.lower()
+    if suffix not in (".csv", ".jsonl", ".ndjson"):
+        raise CommandError(f"{path}: expected a .csv or .jsonl file.")
+    with open(path, newline="", encoding="utf-8") as f:
+        if suffix == ".csv":
+            reader = csv.DictReader(f)
+            for row in reader:
+                yield reader.line_num, row
+            return
+        for line_num, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                row = None
+            yield line_num, row if isinstance(row, dict) else None
+
+
+def batches(rows, size):
+    rows = iter(rows)
+    while batch := list(islice(rows, size)):
+        yield batch
+
+
+def error_message(error):
+    if hasattr(error, "message_dict"):
+        return "; ".join(
+            (
+                f"{field}: {' '.join(messages)}"
+                if field != "__all__"
+                else " ".join(messages)
+            )
+            for field, messages in error.message_dict.items()
+        )
+    return " ".join(error.messages)
+
+
+def foreign_key(model, field, row):
+    # Just the value's type here, whether the row exists is checked per batch.
+    if row.get(field) in (None, ""):
+        raise ValidationError({field: ["This field is required."]})
+    try:
+        return model._meta.get_field(field).to_python(row[field])
+    except ValidationError as e:
+        raise ValidationError({field: e.messages})
+
+
+class Importer:
+    """
+    Validate and insert rows of one model a batch at a time. Rows that fail
+    validation are reported and skipped, the rest of their batch is still
+    inserted.
+    """
+
+    def __init__(self, report):
+        self.report = report
+        self.branch_ids = set(Branch.objects.values_list("pk", flat=True))
+        self.seen = defaultdict(set)
+
+    def clean(self, model, row, exclude):
+        if row is None:
+            raise ValidationError("Not a JSON object.")
+        names = {f.name for f in model._meta.concrete_fields} - set(exclude)
+        # Empty CSV cells count as missing, and unknown columns are ignored.
+        obj = model(**{k: v for k, v in row.items() if k in names and v != ""})
+        # Model validation minus the foreign keys, which would be a query per
+        # row. validate_car_id and Schedule.clean run here.
+        obj.clean_fields(exclude=exclude)
+        obj.clean()
+        if obj.pk is not None:
+            if obj.pk in self.seen[model]:
+                raise ValidationError({"id": ["Appears more than once."]})
+            self.seen[model].add(obj.pk)
+        return obj
+
+    def existing(self, model, objs):
+        pks = [obj.pk for obj in objs if obj.pk is not None]
+        return set(model.objects.filter(pk__in=pks).values_list("pk", flat=True))
+
+    def keep_new(self, model, cleaned):
+        """Drop the rows whose primary key is already taken."""
+        existing = self.existing(model, [obj for _, obj in cleaned])
+        kept = []
+        for line, obj in cleaned:
+            if obj.pk in existing:
+                self.report(line, f"id: {model.__name__} {obj.pk} already exists.")
+            else:
+                kept.append((line, obj))
+        return kept
+
+    def run(self, model, rows, clean_batch, created, batch_size):
+        imported = errors = 0
+        for batch in batches(rows, batch_size):
+            cleaned = []
+            for line, row in batch:
+                try:
+                    cleaned.append((line, clean_batch(row)))
+                except ValidationError as e:
+                    self.report(line, error_message(e))
+            cleaned = self.keep_new(model, cleaned)
+            if model is Schedule:
+                cleaned = self.without_conflicts(cleaned)
+            errors += len(batch) - len(cleaned)
+
+            objs = [obj for _, obj in cleaned]
+            with transaction.atomic():
+                model.objects.bulk_create(objs, batch_size=batch_size)
+                created(objs)
+            imported += len(objs)
+        return imported, errors
+
+    def branch(self, row):
+        return self.clean(Branch, row, exclude=[])
+
+    def car(self, row):
+        car = self.clean(Car, row, exclude=["branch"])
+        car.branch_id = foreign_key(Car, "branch", row)
+        if car.branch_id not in self.branch_ids:
+            raise ValidationError({"branch": [f"No branch {car.branch_id}."]})
+        return car
+
+    def schedule(self, row):
+        fks = ["car_id", "origin_branch", "destination_branch"]
+        schedule = self.clean(Schedule, row, exclude=fks)
+        schedule.car_id_id = foreign_key(Schedule, "car_id", row)
+        for field in fks[1:]:
+            branch_id = foreign_key(Schedule, field, row)
+            if branch_id not in self.branch_ids:
+                raise ValidationError({field: [f"No branch {branch_id}."]})
+            setattr(schedule, f"{field}_id", branch_id)
+        return schedule
+
+    def without_conflicts(self, cleaned):
+        """
+        Drop the schedules whose car doesn't exist, and those overlapping
+        another schedule of the same car, stored or earlier in the batch.
+        """
+        if not cleaned:
+            return cleaned
+        car_ids = {s.car_id_id for _, s in cleaned}
+        cars = set(Car.objects.filter(pk__in=car_ids).values_list("pk", flat=True))
+        timeframe = (
+            min(s.start_time for _, s in cleaned),
+            max(s.end_time for _, s in cleaned),
+        )
+        booked = defaultdict(list)
+        for car, start, end in (
+            get_overlapping_schedules(timeframe)
+            .filter(car_id__in=cars)
+            .values_list("car_id", "start_time", "end_time")
+        ):
+            booked[car].append((start, end))
+
+        kept = []
+        for line, s in cleaned:
+            if s.car_id_id not in cars:
+                self.report(line, f"car_id: No car {s.car_id_id}.")
+            elif any(
+                start <= s.end_time and end >= s.start_time
+                for start, end in booked[s.car_id_id]
+            ):
+                self.report(line, f"Overlaps another schedule of {s.car_id_id}.")
+            else:
+                booked[s.car_id_id].append((s.start_time, s.end_time))
+                kept.append((line, s))
+        return kept
+
+
+class Command(BaseCommand):
+    help = (
+        "Import branches, cars and schedules from CSV (with a header line) or "
+        "JSON lines files, validating and inserting them in batches."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--branches", help="Rows with a name and optional id.")
+        parser.add_argument("--cars", help="Rows with an id, make, model and branch.")
+        parser.add_argument(
+            "--schedules",
+            help=(
+                "Rows with a car_id, start_time, end_time, origin_branch, "
+                "destination_branch and optional id."
+            ),
+        )
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        files = [
+            (Branch, "branches", "branch", signals.branches_bulk_created),
+            (Car, "cars", "car", signals.cars_bulk_created),
+            (Schedule, "schedules", "schedule", signals.schedules_bulk_created),
+        ]
+        if not any(options[name] for _, name, _, _ in files):
+            raise CommandError("Give at least one of --branches, --cars, --schedules.")
+
+        total_errors = 0
+        for model, name, kind, created in files:
+            path = options[name]
+            if not path:
+                continue
+
+            def report(line, message, path=path):
+                self.stderr.write(f"{path}:{line}: {message}")
+
+            importer = Importer(report)
+            imported, errors = importer.run(
+                model,
+                read_rows(path),
+                getattr(importer, kind),
+                created,
+                options["batch_size"],
+            )
+            total_errors += errors
+            self.stdout.write(
+                f"Imported {imported} {name} from "
+                f"{path}, skipped {errors} rows with errors."
+            )
+        if total_errors:
+            self.stdout.write(self.style.WARNING(f"{total_errors} rows skipped."))
+        else:
+            self.stdout.write(self.style.SUCCESS("Import complete."))
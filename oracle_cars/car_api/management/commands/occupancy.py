@@ -0,0 +1,91 @@
+import csv
+import time
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_duration
+
+from ... import occupancy, utils
+from ...models import Branch
+
+
+def duration(value):
+    parsed = parse_duration(value)
+    if parsed is None or parsed.total_seconds() <= 0:
+        raise ValueError(value)
+    return parsed
+
+
+class Command(BaseCommand):
+    help = (
+        "Write the number of cars at each branch over a time range as CSV, a "
+        "row per bucket and a column per branch."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--from",
+            dest="start_time",
+            type=datetime.fromisoformat,
+            required=True,
+            help="Start of the range, e.g. 2025-01-01.",
+        )
+        parser.add_argument(
+            "--to",
+            dest="end_time",
+            type=datetime.fromisoformat,
+            required=True,
+            help="End of the range.",
+        )
+        parser.add_argument(
+            "--step",
+            type=duration,
+            default=occupancy.DEFAULT_STEP,
+            help="Bucket size, e.g. 01:00:00 or 1 00:00:00 for a day.",
+        )
+        parser.add_argument(
+            "--branch",
+            type=int,
+            action="append",
+            help="Only this branch, can be given more than once.",
+        )
+        parser.add_argument(
+            "--output", default="-", help="File to write, or - for stdout."
+        )
+
+    def handle(self, *args, **options):
+        start_time, end_time = options["start_time"], options["end_time"]
+        step = options["step"]
+        if start_time > end_time:
+            raise CommandError("--from cannot be after --to.")
+        if options["branch"]:
+            missing = set(options["branch"]) - set(
+                Branch.objects.filter(pk__in=options["branch"]).values_list(
+                    "pk", flat=True
+                )
+            )
+            if missing:
+                raise CommandError(f"Unknown branches: {sorted(missing)}")
+        buckets = occupancy.bucket_count(start_time, end_time, step)
+
+        started = time.perf_counter()
+        branch_ids, counts = occupancy.counts(
+            start_time, end_time, step, utils.now(), options["branch"]
+        )
+        elapsed = time.perf_counter() - started
+
+        if options["output"] == "-":
+            self.write(self.stdout, start_time, step, branch_ids, counts)
+        else:
+            with open(options["output"], "w", newline="") as f:
+                self.write(f, start_time, step, branch_ids, counts)
+        # stderr, so it doesn't end up in a series written to stdout.
+        self.stderr.write(
+            f"{len(branch_ids)} branches x {buckets} buckets in {elapsed:.2f}s."
+        )
+
+    def write(self, f, start_time, step, branch_ids, counts):
+        writer = csv.writer(f)
+        writer.writerow(["time", *branch_ids])
+        for i, row in enumerate(zip(*counts)):
+            writer.writerow([(start_time + i * step).isoformat(sep=" "), *row])
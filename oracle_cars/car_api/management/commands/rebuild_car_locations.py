@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from ... import inventory_cache, locations
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the car location segments from the schedules, then check "
+        "they match."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check-only",
+            action="store_true",
+            help="Only check the stored segments, don't rebuild them.",
+        )
+
+    def handle(self, *args, **options):
+        if not options["check_only"]:
+            locations.rebuild()
+            inventory_cache.invalidate_branches(None)
+            self.stdout.write("Rebuilt the car location segments.")
+
+        missing, unexpected = locations.check()
+        for segment in sorted(missing, key=str):
+            self.stderr.write(f"Missing: {self.describe(segment)}")
+        for segment in sorted(unexpected, key=str):
+            self.stderr.write(f"Unexpected: {self.describe(segment)}")
+        if missing or unexpected:
+            raise CommandError(
+                f"{len(missing)} missing and {len(unexpected)} unexpected segments."
+            )
+        self.stdout.write(self.style.SUCCESS("Car location segments are consistent."))
+
+    def describe(self, segment):
+        car, branch, schedule, since, until = segment
+        return (
+            f"car {car} at branch {branch} from {since} until {until or 'later'} "
+            f"(schedule {schedule})"
+        )
@@ -0,0 +1,179 @@
+import cProfile
+import json
+import logging
+import random
+import re
+import threading
+from datetime import datetime
+from pathlib import Path
+from time import perf_counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from . import timing
+
+logger = logging.getLogger("car_api.timing")
+
+
+class ServerTimingMiddleware:
+    """
+    Report each request's query count, database time, serializer and
+    renderer time and the time left over in the view as a Server-Timing
+    header, e.g.
+
+        Server-Timing: db;dur=3.10;desc="2 queries", serialize;dur=0.85,
+            render;dur=0.40, view;dur=1.22, total;dur=5.57
+
+    and, when the car_api.timing logger is enabled for INFO, as a JSON log
+    line. Goes first in MIDDLEWARE so total covers the rest of the stack.
+    The body of a streaming response is read after the header is sent, so
+    its queries aren't included.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timings = timing.Timings()
+        token = timing.current.set(timings)
+        started = perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            timings.total = perf_counter() - started
+            timing.current.reset(token)
+        self.report(request, response, timings)
+        return response
+
+    async def __acall__(self, request):
+        timings = timing.Timings()
+        token = timing.current.set(timings)
+        started = perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            timings.total = perf_counter() - started
+            timing.current.reset(token)
+        self.report(request, response, timings)
+        return response
+
+    def report(self, request, response, timings):
+        ms = {
+            name: timings.durations.get(name, 0.0) * 1000
+            for name in ["db", "serialize", "render"]
+        }
+        ms["view"] = timings.view * 1000
+        ms["total"] = timings.total * 1000
+
+        metrics = [
+            f'db;dur={ms["db"]:.2f};desc="{timings.queries} '
+            f'{"query" if timings.queries == 1 else "queries"}"'
+        ]
+        metrics += [f"{name};dur={ms[name]:.2f}" for name in list(ms)[1:]]
+        if response.has_header("Server-Timing"):
+            metrics.insert(0, response["Server-Timing"])
+        response["Server-Timing"] = ", ".join(metrics)
+
+        if logger.isEnabledFor(logging.INFO):
+            fields = {
+                "method": request.method,
+                "path": request.path,
+                "status": response.status_code,
+                "queries": timings.queries,
+                **{f"{name}_ms": round(value, 2) for name, value in ms.items()},
+            }
+            logger.info(json.dumps(fields), extra={"timing": fields})
+
+
+class ProfilerMiddleware:
+    """
+    Run a request under cProfile when it asks for it with an X-Profile: 1
+    header or ?profile=1, and the user is staff or settings.PROFILER_OPEN is
+    set. The profile goes to settings.PROFILER_DIR as a .prof file, which
+    pstats, snakeviz and friends can load, and its name is sent back in the
+    X-Profile header.
+
+    Only settings.PROFILER_SAMPLE_RATE of the requests asking are profiled,
+    one at a time, and only the newest settings.PROFILER_MAX_FILES profiles
+    are kept, so leaving it on under load is safe. Goes after
+    AuthenticationMiddleware in MIDDLEWARE. For async views only the event
+    loop's thread is profiled, not the threads running their queries.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.lock = threading.Lock()
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.should_profile(request):
+            return self.get_response(request)
+        try:
+            profiler = cProfile.Profile()
+            started = perf_counter()
+            response = profiler.runcall(self.get_response, request)
+            self.save(request, response, profiler, perf_counter() - started)
+        finally:
+            self.lock.release()
+        return response
+
+    async def __acall__(self, request):
+        if not self.should_profile(request):
+            return await self.get_response(request)
+        try:
+            profiler = cProfile.Profile()
+            started = perf_counter()
+            profiler.enable()
+            try:
+                response = await self.get_response(request)
+            finally:
+                profiler.disable()
+            self.save(request, response, profiler, perf_counter() - started)
+        finally:
+            self.lock.release()
+        return response
+
+    def should_profile(self, request):
+        """Whether to profile the request. Takes the lock when it says yes."""
+        if not (
+            request.headers.get("X-Profile") == "1" or request.GET.get("profile") == "1"
+        ):
+            return False
+        user = getattr(request, "user", None)
+        if not (settings.PROFILER_OPEN or (user and user.is_staff)):
+            return False
+        if random.random() >= settings.PROFILER_SAMPLE_RATE:
+            return False
+        # Profiles of requests running side by side would be each other's
+        # noise, and Python 3.12+ only allows one profiler at a time anyway.
+        return self.lock.acquire(blocking=False)
+
+    def save(self, request, response, profiler, elapsed):
+        directory = Path(settings.PROFILER_DIR)
+        directory.mkdir(parents=True, exist_ok=True)
+        path = re.sub(r"[^A-Za-z0-9]+", "-", request.path).strip("-")
+        name = (
+            f"{datetime.now():%Y%m%dT%H%M%S.%f}-{request.method}-{path}-"
+            f"{elapsed * 1000:.0f}ms.prof"
+        )
+        profiler.dump_stats(directory / name)
+        response["X-Profile"] = name
+
+        # The names start with the time, so they sort oldest first.
+        profiles = sorted(directory.glob("*.prof"))
+        for old in profiles[: max(0, len(profiles) - settings.PROFILER_MAX_FILES)]:
+            old.unlink(missing_ok=True)
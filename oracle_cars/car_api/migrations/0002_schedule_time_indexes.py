@@ -0,0 +1,37 @@
+# Generated by Django 5.1.5 on 2026-10-18 06:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("car_api", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="schedule",
+            index=models.Index(
+                fields=["car_id", "start_time", "end_time"],
+                name="schedule_car_time_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="schedule",
+            index=models.Index(
+                fields=["origin_branch", "start_time"], name="schedule_origin_start_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="schedule",
+            index=models.Index(
+                fields=["destination_branch", "end_time"],
+                name="schedule_destination_end_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="schedule",
+            index=models.Index(fields=["end_time"], name="schedule_end_idx"),
+        ),
+    ]
@@ -0,0 +1,101 @@
+# Generated by Django 5.1.5 on 2026-10-18 07:04
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import F
+
+
+def segment_rows(trips):
+    # A frozen copy of car_api.locations.segment_rows as of this migration.
+    # Given one car's one-way (schedule id, start, end, destination) trips
+    # sorted by start, the (branch, schedule id, since, until) segments it
+    # spends at branches between them.
+    segments = []
+    for i, (pk, _, end, destination) in enumerate(trips):
+        until = trips[i + 1][1] if i + 1 < len(trips) else None
+        if until is None or end < until:
+            segments.append((destination, pk, end, until))
+    return segments
+
+
+def build_segments(apps, schema_editor):
+    Schedule = apps.get_model("car_api", "Schedule")
+    CarLocationSegment = apps.get_model("car_api", "CarLocationSegment")
+
+    trips = {}
+    rows = (
+        Schedule.objects.exclude(origin_branch=F("destination_branch"))
+        .order_by("car_id", "start_time", "end_time", "id")
+        .values_list("car_id", "id", "start_time", "end_time", "destination_branch")
+    )
+    for car, *trip in rows.iterator():
+        trips.setdefault(car, []).append(tuple(trip))
+    CarLocationSegment.objects.bulk_create(
+        (
+            CarLocationSegment(
+                car_id=car, branch_id=branch, schedule_id=pk, since=since, until=until
+            )
+            for car, car_trips in trips.items()
+            for branch, pk, since, until in segment_rows(car_trips)
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("car_api", "0002_schedule_time_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CarLocationSegment",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("since", models.DateTimeField()),
+                ("until", models.DateTimeField(null=True)),
+                (
+                    "branch",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="car_api.branch",
+                    ),
+                ),
+                (
+                    "car",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="car_api.car",
+                    ),
+                ),
+                (
+                    "schedule",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="car_api.schedule",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["branch", "since"], name="segment_branch_since_idx"
+                    ),
+                    models.Index(fields=["car", "since"], name="segment_car_since_idx"),
+                ],
+            },
+        ),
+        migrations.RunPython(build_segments, migrations.RunPython.noop),
+    ]
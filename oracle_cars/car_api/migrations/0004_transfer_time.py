@@ -0,0 +1,63 @@
+# Generated by Django 5.1.5 on 2026-10-18 07:30
+
+import datetime
+import django.core.validators
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("car_api", "0003_car_location_segment"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TransferTime",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "duration",
+                    models.DurationField(
+                        validators=[
+                            django.core.validators.MinValueValidator(
+                                datetime.timedelta(0)
+                            )
+                        ]
+                    ),
+                ),
+                (
+                    "destination",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="car_api.branch",
+                    ),
+                ),
+                (
+                    "origin",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="car_api.branch",
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("origin", "destination"), name="transfer_time_unique"
+                    )
+                ],
+            },
+        ),
+    ]
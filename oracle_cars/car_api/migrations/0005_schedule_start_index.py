@@ -0,0 +1,17 @@
+# Generated by Django 5.1.5 on 2026-10-18 07:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("car_api", "0004_transfer_time"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="schedule",
+            index=models.Index(fields=["start_time"], name="schedule_start_idx"),
+        ),
+    ]
@@ -0,0 +1,19 @@
+from django.db import migrations
+
+
+def drop_row_versions(apps, schema_editor):
+    # Rows' ETags come from their values now, only the tables' versions are
+    # kept.
+    Version = apps.get_model("car_api", "Version")
+    Version.objects.filter(key__contains=":").delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("car_api", "0006_version"),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_row_versions, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,8 @@
+from datetime import timedelta
+
 from django.db import models
 from django.core.exceptions import ValidationError
+from django.core.validators import MinValueValidator
 
 
 # Why not just make this a CharField? Because a modeled object is more
@@ -46,7 +49,80 @@ class Schedule(models.Model):
         Branch, on_delete=models.CASCADE, related_name="+"
     )
 
+    class Meta:
+        # Availability and inventory lookups are all range queries on the
+        # schedule times, scoped either to a car or to a branch. The schedule
+        # list filters on the same columns, or on the times alone.
+        indexes = [
+            models.Index(
+                fields=["car_id", "start_time", "end_time"],
+                name="schedule_car_time_idx",
+            ),
+            models.Index(
+                fields=["origin_branch", "start_time"],
+                name="schedule_origin_start_idx",
+            ),
+            models.Index(
+                fields=["destination_branch", "end_time"],
+                name="schedule_destination_end_idx",
+            ),
+            models.Index(fields=["end_time"], name="schedule_end_idx"),
+            models.Index(fields=["start_time"], name="schedule_start_idx"),
+        ]
+
     def clean(self):
         super().clean()
         if self.start_time > self.end_time:
             raise ValidationError("start_time cannot be before end_time.")
+
+
+class CarLocationSegment(models.Model):
+    """
+    A car standing at a branch after a one-way schedule dropped it there,
+    from the end of that schedule until the next one-way schedule of the car
+    departs (or indefinitely). Maintained from the schedules by
+    car_api.locations, never written to directly.
+    """
+
+    car = models.ForeignKey(Car, on_delete=models.CASCADE, related_name="+")
+    branch = models.ForeignKey(Branch, on_delete=models.CASCADE, related_name="+")
+    # The schedule that brought the car here.
+    schedule = models.ForeignKey(Schedule, on_delete=models.CASCADE, related_name="+")
+    since = models.DateTimeField()
+    until = models.DateTimeField(null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["branch", "since"], name="segment_branch_since_idx"),
+            models.Index(fields=["car", "since"], name="segment_car_since_idx"),
+        ]
+
+
+class TransferTime(models.Model):
+    """
+    How long it takes to move a car from one branch to another, for checking
+    a car can still make its next booking. Pairs without a row take no time.
+    """
+
+    origin = models.ForeignKey(Branch, on_delete=models.CASCADE, related_name="+")
+    destination = models.ForeignKey(Branch, on_delete=models.CASCADE, related_name="+")
+    duration = models.DurationField(validators=[MinValueValidator(timedelta(0))])
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["origin", "destination"], name="transfer_time_unique"
+            )
+        ]
+
+
+class Version(models.Model):
+    """
+    A version of a table, replaced on every write, which list ETags and the
+    transfer time matrix are built from. Kept in the database rather than the
+    cache so every worker sees every change. Maintained by car_api.etags.
+    """
+
+    # The model's label.
+    key = models.CharField(primary_key=True, max_length=255)
+    value = models.BigIntegerField()
@@ -0,0 +1,48 @@
+from rest_framework.renderers import JSONRenderer
+
+from . import timing
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+# orjson writes datetimes, UUIDs and dict/list subclasses itself, in C. Its
+# output for compact, non-ASCII-escaping JSON matches json.dumps byte for
+# byte, apart from the two line separators DRF escapes and that we escape
+# the same way after. Non-string keys, like the branch IDs in the fleet
+# inventory, are turned into strings the way json.dumps does it.
+ORJSON_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS if orjson else None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer producing the same bytes through orjson where it can. Falls
+    back to the regular renderer for indented output, for non-default JSON
+    settings, or when orjson isn't installed.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        with timing.span("render"):
+            return self._render(data, accepted_media_type, renderer_context)
+
+    def _render(self, data, accepted_media_type, renderer_context):
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if (
+            orjson is None
+            or data is None
+            or indent is not None
+            or self.ensure_ascii
+            or not self.compact
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(
+                data, default=self.encoder_class().default, option=ORJSON_OPTIONS
+            )
+        except TypeError:
+            # e.g. integers past 64 bits, which only json handles.
+            return super().render(data, accepted_media_type, renderer_context)
+        return ret.replace("\u2028".encode(), b"\\u2028").replace(
+            "\u2029".encode(), b"\\u2029"
+        )
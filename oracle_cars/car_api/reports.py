@@ -0,0 +1,197 @@
+import csv
+import io
+from datetime import timedelta
+
+from django.db import connection
+from django.db.models import Count, FloatField, Func, Sum, Value
+from django.db.models.functions import Greatest, Least
+
+from .models import Car, Schedule
+
+# Fleet utilization over a time window: the hours each car was booked out of
+# the hours in the window, with its trip count and average trip length, and
+# the same summed up over the cars of each home branch.
+#
+# Schedules are cut to the window and summed per car inside the database,
+# so only a row per car comes back however many schedules there are. On
+# other backends than SQLite, MySQL and PostgreSQL the schedules are read a
+# chunk at a time and summed here instead.
+
+# Schedules read per chunk when summing outside the database.
+REPORT_CHUNK_SIZE = 10000
+
+CAR_FIELDS = [
+    "car_id",
+    "branch",
+    "trips",
+    "booked_hours",
+    "available_hours",
+    "utilization",
+    "average_trip_hours",
+]
+BRANCH_FIELDS = [
+    "branch",
+    "cars",
+    "trips",
+    "booked_hours",
+    "available_hours",
+    "utilization",
+    "average_trip_hours",
+]
+
+
+def schedules(start_time, end_time):
+    """Schedules running at some point between start_time and end_time."""
+    return Schedule.objects.filter(end_time__gt=start_time, start_time__lt=end_time)
+
+
+class SecondsBetween(Func):
+    """
+    The seconds from a start datetime to an end one, in the database's own
+    date arithmetic. Django's datetime subtraction calls back into Python for
+    every row on SQLite.
+    """
+
+    output_field = FloatField()
+    vendors = {"sqlite", "mysql", "postgresql"}
+
+    def __init__(self, start, end):
+        super().__init__(end, start)
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return self.as_sql(
+            compiler,
+            connection,
+            template="((julianday(%(expressions)s)) * 86400.0)",
+            arg_joiner=") - julianday(",
+            **extra_context,
+        )
+
+    def as_mysql(self, compiler, connection, **extra_context):
+        # TIMESTAMPDIFF(unit, a, b) is b - a, and the arguments are end, start.
+        return self.as_sql(
+            compiler,
+            connection,
+            template="(-TIMESTAMPDIFF(MICROSECOND, %(expressions)s) / 1000000.0)",
+            **extra_context,
+        )
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        return self.as_sql(
+            compiler,
+            connection,
+            template="EXTRACT(EPOCH FROM (%(expressions)s))",
+            arg_joiner=" - ",
+            **extra_context,
+        )
+
+
+def _totals_in_db(start_time, end_time):
+    rows = (
+        schedules(start_time, end_time)
+        .values("car_id")
+        .annotate(
+            trips=Count("pk"),
+            booked=Sum(
+                SecondsBetween(
+                    Greatest("start_time", Value(start_time)),
+                    Least("end_time", Value(end_time)),
+                )
+            ),
+            length=Sum(SecondsBetween("start_time", "end_time")),
+        )
+        .order_by()
+        .values_list("car_id", "trips", "booked", "length")
+    )
+    # The float seconds are rounded to the millisecond, as SQLite's julianday
+    # leaves tens of microseconds of noise in long sums.
+    return {
+        car: (
+            trips,
+            timedelta(milliseconds=round(booked * 1000)),
+            timedelta(milliseconds=round(length * 1000)),
+        )
+        for car, trips, booked, length in rows
+    }
+
+
+def _totals_in_chunks(start_time, end_time, chunk_size):
+    totals = {}
+    rows = (
+        schedules(start_time, end_time)
+        .values_list("car_id", "start_time", "end_time")
+        .iterator(chunk_size=chunk_size)
+    )
+    for car, start, end in rows:
+        trips, booked, length = totals.get(car, (0, timedelta(0), timedelta(0)))
+        totals[car] = (
+            trips + 1,
+            booked + min(end, end_time) - max(start, start_time),
+            length + end - start,
+        )
+    return totals
+
+
+def car_totals(start_time, end_time, chunk_size=None):
+    """
+    The (trips, booked time, total trip length) of each car with a schedule
+    between start_time and end_time, by car ID. Booked time only counts the
+    part of each schedule inside the window, trip length the whole schedule.
+    """
+    if connection.vendor in SecondsBetween.vendors:
+        return _totals_in_db(start_time, end_time)
+    return _totals_in_chunks(start_time, end_time, chunk_size or REPORT_CHUNK_SIZE)
+
+
+def _hours(duration):
+    return round(duration.total_seconds() / 3600, 2)
+
+
+def _row(trips, booked, length, available):
+    return {
+        "trips": trips,
+        "booked_hours": _hours(booked),
+        "available_hours": _hours(available),
+        "utilization": round(booked / available, 4) if available else None,
+        "average_trip_hours": _hours(length / trips) if trips else None,
+    }
+
+
+def utilization(start_time, end_time, by="car", chunk_size=None):
+    """
+    Utilization rows between start_time and end_time, one per car, or one
+    per branch with cars based there when by is "branch". Rows have the
+    CAR_FIELDS or BRANCH_FIELDS and are in ID order.
+    """
+    totals = car_totals(start_time, end_time, chunk_size)
+    window = end_time - start_time
+    nothing = (0, timedelta(0), timedelta(0))
+    cars = Car.objects.order_by("pk").values_list("pk", "branch")
+    if by == "car":
+        return [
+            {"car_id": car, "branch": branch, **_row(*totals.get(car, nothing), window)}
+            for car, branch in cars
+        ]
+
+    branches = {}
+    for car, branch in cars:
+        count, trips, booked, length = branches.get(branch, (0, *nothing))
+        car_trips, car_booked, car_length = totals.get(car, nothing)
+        branches[branch] = (
+            count + 1,
+            trips + car_trips,
+            booked + car_booked,
+            length + car_length,
+        )
+    return [
+        {"branch": branch, "cars": count, **_row(trips, booked, length, window * count)}
+        for branch, (count, trips, booked, length) in sorted(branches.items())
+    ]
+
+
+def render_csv(rows, fields):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fields)
+    writer.writeheader()
+    writer.writerows(rows)
+    return buffer.getvalue()
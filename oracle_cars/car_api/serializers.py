@@ -1,21 +1,51 @@
 from rest_framework import serializers
 
+from . import timing
 from .models import Car, Schedule, Branch
 
 
-class CarSerializer(serializers.ModelSerializer):
+class TimedData:
+    """Count the time spent building .data towards the request's serialize time."""
+
+    @property
+    def data(self):
+        with timing.span("serialize"):
+            return super().data
+
+
+class TimedListSerializer(TimedData, serializers.ListSerializer):
+    pass
+
+
+class CarSerializer(TimedData, serializers.ModelSerializer):
     class Meta:
         model = Car
         fields = "__all__"
+        list_serializer_class = TimedListSerializer
 
 
-class ScheduleSerializer(serializers.ModelSerializer):
+class ScheduleSerializer(TimedData, serializers.ModelSerializer):
     class Meta:
         model = Schedule
         fields = "__all__"
+        list_serializer_class = TimedListSerializer
 
 
-class BranchSerializer(serializers.ModelSerializer):
+class BranchSerializer(TimedData, serializers.ModelSerializer):
     class Meta:
         model = Branch
         fields = "__all__"
+        list_serializer_class = TimedListSerializer
+
+
+def serialize_values(rows, serializer_class):
+    """
+    Represent the rows of a queryset the way serializer_class would, reading
+    them as values_list tuples rather than building model instances and
+    running each field. Only for serializers whose fields are all plain model
+    fields, like the ones above. Datetimes are left for the renderer, which
+    formats them the same way the serializer fields do.
+    """
+    fields = list(serializer_class().fields)
+    with timing.span("serialize"):
+        return [dict(zip(fields, row)) for row in rows.values_list(*fields)]
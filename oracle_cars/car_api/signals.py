@@ -0,0 +1,193 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from . import etags, inventory_cache, locations
+from .models import Branch, Car, Schedule, TransferTime
+
+# Keep the car location segments, the inventory cache, the ETag versions and
+# the transfer time matrix in step with writes to cars, schedules, branches
+# and transfer times.
+
+
+def now_and_on_commit(fn, *args):
+    # Once now so this transaction sees its own writes, and again after commit
+    # so anything cached from the old data in the meantime is dropped too.
+    # ETag versions don't need this, they're only bumped after the commit.
+    fn(*args)
+    transaction.on_commit(lambda: fn(*args))
+
+
+def invalidate_branches(branch_ids):
+    now_and_on_commit(inventory_cache.invalidate_branches, branch_ids)
+
+
+def update_locations(car_ids, *branch_ids):
+    # Moving cars about changes the inventory of their home branches and of
+    # every branch they gain or lose a segment at.
+    branches = locations.update_cars(car_ids) | set(branch_ids)
+    branches.update(Car.objects.filter(pk__in=car_ids).values_list("branch", flat=True))
+    invalidate_branches(branches)
+
+
+@receiver(pre_save, sender=Schedule)
+def remember_schedule_car(sender, instance, **kwargs):
+    # A schedule moved to another car changes where the old car is as well.
+    instance._previous_car_ids = set()
+    if not instance._state.adding:
+        instance._previous_car_ids.update(
+            Schedule.objects.filter(pk=instance.pk).values_list("car_id", flat=True)
+        )
+
+
+@receiver(post_save, sender=Schedule)
+def schedule_changed(sender, instance, **kwargs):
+    update_locations(
+        {instance.car_id_id} | getattr(instance, "_previous_car_ids", set()),
+        instance.origin_branch_id,
+        instance.destination_branch_id,
+    )
+    etags.bump(Schedule)
+
+
+@receiver(pre_save, sender=Car)
+def remember_car_branches(sender, instance, **kwargs):
+    instance._previous_branches = set()
+    if not instance._state.adding:
+        instance._previous_branches = locations.car_branches(instance.pk)
+
+
+@receiver(post_save, sender=Car)
+def car_changed(sender, instance, **kwargs):
+    branches = getattr(instance, "_previous_branches", set()) | {instance.branch_id}
+    invalidate_branches(branches)
+    etags.bump(Car)
+
+
+@receiver(post_save, sender=Branch)
+def branch_changed(sender, instance, **kwargs):
+    invalidate_branches([instance.pk])
+    etags.bump(Branch)
+
+
+def bump_transfer_times():
+    # Bookings check this version to know their transfer times are current
+    # (see transfers.py), so it moves with the write rather than after it.
+    # Transfer times are hardly ever written, so its lock holds nobody up.
+    etags.bump(TransferTime, in_transaction=True)
+
+
+@receiver(post_save, sender=TransferTime)
+def transfer_time_changed(sender, instance, **kwargs):
+    # Which cars can make their next booking changes at every branch.
+    invalidate_branches(None)
+    bump_transfer_times()
+
+
+# Deletes. Deleting a branch or a car cascades to every schedule of it, and
+# Django sends pre_delete for each deleted row before deleting any, then
+# post_delete for each in the same order. Rather than updating locations for
+# every row, the pre_delete receivers only note what each row touches, on the
+# object delete() was called on, and the whole lot is handled once after the
+# last row's post_delete.
+
+
+class PendingDelete:
+    def __init__(self):
+        self.last = None
+        self.rows = {}  # model -> deleted primary keys
+        self.car_ids = set()  # cars whose schedules were deleted
+        self.branch_ids = set()  # branches whose inventory changed
+        self.transfer_times = False
+
+    def apply(self):
+        deleted_cars = self.rows.get(Car, set())
+        update_locations(self.car_ids - deleted_cars, *self.branch_ids)
+        if self.transfer_times:
+            invalidate_branches(None)
+        for model in self.rows:
+            if model is TransferTime:
+                bump_transfer_times()
+            else:
+                etags.bump(model)
+
+
+def pending_delete(instance, origin):
+    # Without an origin (a Collector used directly) each row is handled on
+    # its own.
+    holder = instance if origin is None else origin
+    if not hasattr(holder, "_pending_delete"):
+        holder._pending_delete = PendingDelete()
+    return holder._pending_delete
+
+
+@receiver(pre_delete, sender=Schedule)
+def schedule_deleting(sender, instance, origin=None, **kwargs):
+    pending = pending_delete(instance, origin)
+    pending.car_ids.add(instance.car_id_id)
+    pending.branch_ids |= {instance.origin_branch_id, instance.destination_branch_id}
+    pending.rows.setdefault(Schedule, set()).add(instance.pk)
+    pending.last = instance
+
+
+@receiver(pre_delete, sender=Car)
+def car_deleting(sender, instance, origin=None, **kwargs):
+    # The branches the car's segments are at are the destinations of its
+    # schedules, which are deleted along with it.
+    pending = pending_delete(instance, origin)
+    pending.branch_ids.add(instance.branch_id)
+    pending.rows.setdefault(Car, set()).add(instance.pk)
+    pending.last = instance
+
+
+@receiver(pre_delete, sender=Branch)
+def branch_deleting(sender, instance, origin=None, **kwargs):
+    pending = pending_delete(instance, origin)
+    pending.branch_ids.add(instance.pk)
+    pending.rows.setdefault(Branch, set()).add(instance.pk)
+    pending.last = instance
+
+
+@receiver(pre_delete, sender=TransferTime)
+def transfer_time_deleting(sender, instance, origin=None, **kwargs):
+    pending = pending_delete(instance, origin)
+    pending.transfer_times = True
+    pending.rows.setdefault(TransferTime, set())
+    pending.last = instance
+
+
+def deleted(sender, instance, origin=None, **kwargs):
+    holder = instance if origin is None else origin
+    pending = getattr(holder, "_pending_delete", None)
+    if pending is not None and pending.last is instance:
+        del holder._pending_delete
+        pending.apply()
+
+
+for model in [Schedule, Car, Branch, TransferTime]:
+    post_delete.connect(deleted, sender=model, dispatch_uid=f"deleted-{model.__name__}")
+
+
+def schedules_bulk_created(schedules):
+    """
+    Do what the signals would have for schedules inserted with bulk_create,
+    which doesn't send any.
+    """
+    update_locations(
+        {s.car_id_id for s in schedules},
+        *{s.origin_branch_id for s in schedules},
+        *{s.destination_branch_id for s in schedules},
+    )
+    etags.bump(Schedule)
+
+
+def cars_bulk_created(cars):
+    """schedules_bulk_created for cars."""
+    invalidate_branches({c.branch_id for c in cars})
+    etags.bump(Car)
+
+
+def branches_bulk_created(branches):
+    """schedules_bulk_created for branches."""
+    # No cars or schedules refer to new branches yet, so no inventory to drop.
+    etags.bump(Branch)
@@ -0,0 +1,36 @@
+from django.http import StreamingHttpResponse
+
+from .pagination import keyset_chunks
+from .renderers import FastJSONRenderer
+
+# Rows fetched from the database and rendered per chunk of the response.
+STREAM_CHUNK_SIZE = 2000
+
+
+def is_stream_requested(request):
+    return request.query_params.get("stream") in ("1", "true")
+
+
+def stream_json_response(queryset, serializer_class, chunk_size=None):
+    """
+    Render a whole queryset as a JSON array, in its ordering, one chunk of
+    rows at a time. Rows are read as values_list tuples one chunk per query
+    (see pagination.keyset_chunks) so neither the rows nor the rendered data
+    for the full table are ever held in memory. The bytes match what the
+    serializer and the regular JSON renderer would produce for the same rows.
+    """
+    chunk_size = chunk_size or STREAM_CHUNK_SIZE
+    renderer = FastJSONRenderer()
+    fields = list(serializer_class().fields)
+
+    def chunks():
+        yield b"["
+        separator = b""
+        for chunk in keyset_chunks(queryset, fields, chunk_size):
+            data = [dict(zip(fields, row)) for row in chunk]
+            # Render as a list so the encoding matches, then drop the brackets.
+            yield separator + renderer.render(data)[1:-1]
+            separator = b","
+        yield b"]"
+
+    return StreamingHttpResponse(chunks(), content_type=renderer.media_type)
@@ -1,5 +1,23 @@
+from django.core.cache import cache
 from django.utils.dateparse import parse_datetime
 
+from .. import inventory_cache
+
 # A fair few tests rely on seeing which schedules are in the future. We mock
 # them to make the testing consistent.
 DEFAULT_NOW = parse_datetime("2025-01-25 00:00:00")
+
+
+def at(value):
+    """The datetime written as value, e.g. "2025-02-01 08:00"."""
+    return parse_datetime(value)
+
+
+def reset_inventory():
+    """
+    Forget the cached inventory answers and their hit counts. The cache
+    outlives a test's rolled back transaction, so it'd otherwise hold the last
+    test's data.
+    """
+    cache.clear()
+    inventory_cache.reset_stats()
@@ -0,0 +1,122 @@
+from django.test import TestCase
+from rest_framework.test import APIClient
+from unittest.mock import patch
+
+from . import DEFAULT_NOW, at, reset_inventory
+from .. import allocation
+from ..models import Car, Schedule, Branch
+
+
+@patch("car_api.utils.now", return_value=DEFAULT_NOW)
+class AllocationTests(TestCase):
+    def setUp(self):
+        reset_inventory()
+        self.b1 = Branch.objects.create(name="Prague")
+        self.b2 = Branch.objects.create(name="Brno")
+        self.cars = {
+            car_id: Car.objects.create(
+                id=car_id, make="test_make", model="test_model", branch=self.b1
+            )
+            for car_id in ["C1", "C2", "C3", "C4"]
+        }
+        self.client = APIClient()
+
+    def book(self, car_id, start, end, origin=None, destination=None):
+        return Schedule.objects.create(
+            start_time=at(start),
+            end_time=at(end),
+            car_id=self.cars[car_id],
+            origin_branch=origin or self.b1,
+            destination_branch=destination or self.b1,
+        )
+
+    def rank(self, destination=None, cars=("C1", "C2", "C3", "C4")):
+        return allocation.BestFitPolicy().rank(
+            [
+                (
+                    self.b1.pk,
+                    at("2025-02-10 08:00"),
+                    at("2025-02-10 18:00"),
+                    (destination or self.b1).pk,
+                    list(cars),
+                )
+            ]
+        )[0]
+
+    def test_smallest_gap_first(self, _):
+        # C2's last booking ends the evening before, C4's just before it
+        # starts. C1 and C3 are free for days.
+        self.book("C2", "2025-02-09 08:00", "2025-02-09 20:00")
+        self.book("C4", "2025-02-09 20:00", "2025-02-10 07:00")
+
+        self.assertEqual(["C4", "C2", "C1", "C3"], self.rank())
+
+    def test_next_booking_from_destination_first(self, _):
+        # C3's next booking leaves from Brno, so a one-way trip there suits it
+        # and a round trip would strand that booking.
+        self.book("C3", "2025-02-12 08:00", "2025-02-12 10:00", origin=self.b2)
+        self.book("C4", "2025-02-11 08:00", "2025-02-11 10:00")
+
+        self.assertEqual(["C3", "C1", "C2", "C4"], self.rank(destination=self.b2))
+        self.assertEqual(["C4", "C1", "C2", "C3"], self.rank())
+
+    def test_bookings_past_the_horizon_are_ignored(self, _):
+        self.book("C1", "2025-03-01 08:00", "2025-03-01 10:00", origin=self.b2)
+
+        self.assertEqual(["C1", "C2", "C3", "C4"], self.rank())
+
+    def test_no_candidates(self, _):
+        self.assertEqual([], self.rank(cars=[]))
+
+    def test_first_free_policy(self, _):
+        self.book("C4", "2025-02-11 08:00", "2025-02-11 10:00")
+
+        with self.settings(CAR_ALLOCATION_POLICY="car_api.allocation.FirstFreePolicy"):
+            response = self.client.post(
+                "/api/schedules/",
+                data={
+                    "start_time": "2025-02-10 08:00:00",
+                    "duration": "10:00:00",
+                    "origin_branch": self.b1.pk,
+                    "destination_branch": self.b1.pk,
+                },
+                format="json",
+            )
+
+        self.assertEqual("C1", response.json()["car_id"])
+
+    def test_post_uses_policy(self, _):
+        self.book("C4", "2025-02-11 08:00", "2025-02-11 10:00")
+
+        response = self.client.post(
+            "/api/schedules/",
+            data={
+                "start_time": "2025-02-10 08:00:00",
+                "duration": "10:00:00",
+                "origin_branch": self.b1.pk,
+                "destination_branch": self.b1.pk,
+            },
+            format="json",
+        )
+
+        self.assertEqual("C4", response.json()["car_id"])
+
+    def test_batch_uses_policy(self, _):
+        self.book("C3", "2025-02-11 08:00", "2025-02-11 10:00")
+        self.book("C4", "2025-02-12 08:00", "2025-02-12 10:00", origin=self.b2)
+        booking = {
+            "start_time": "2025-02-10 08:00:00",
+            "duration": "10:00:00",
+            "origin_branch": self.b1.pk,
+        }
+
+        response = self.client.post(
+            "/api/schedules/batch/",
+            data=[
+                {**booking, "destination_branch": self.b2.pk},
+                {**booking, "destination_branch": self.b1.pk},
+            ],
+            format="json",
+        )
+
+        self.assertEqual(["C4", "C3"], [r["car_id"] for r in response.json()])
@@ -0,0 +1,109 @@
+from django.test import TransactionTestCase
+from unittest.mock import patch
+
+from . import DEFAULT_NOW, reset_inventory
+from ..models import Car, Schedule, Branch
+
+
+class AsyncReadTests(TransactionTestCase):
+    reset_sequences = True
+
+    def setUp(self):
+        reset_inventory()
+        self.b1 = Branch.objects.create(name="Prague")
+        self.b2 = Branch.objects.create(name="Brno")
+
+        self.c1 = Car.objects.create(
+            id="C1", make="test_make", model="test_model", branch=self.b1
+        )
+        self.c2 = Car.objects.create(
+            id="C2", make="test_make", model="test_model", branch=self.b2
+        )
+        Schedule.objects.create(
+            start_time="2025-02-01 00:00:00",
+            end_time="2025-02-05 00:00:00",
+            car_id=self.c1,
+            origin_branch=self.b1,
+            destination_branch=self.b2,
+        )
+
+    async def test_lists_match_sync_views(self):
+        for resource in ["cars", "branches", "schedules"]:
+            with self.subTest(resource=resource):
+                sync = await self.async_client.get(f"/api/{resource}/")
+                response = await self.async_client.get(f"/api/async/{resource}/")
+
+                self.assertEqual(200, response.status_code)
+                self.assertEqual(sync["Content-Type"], response["Content-Type"])
+                self.assertEqual(sync.content, response.content)
+
+    async def test_schedules_in_id_order(self):
+        # Booked latest first, so start time order is the reverse.
+        for day in [20, 15, 10]:
+            await Schedule.objects.acreate(
+                start_time=f"2025-03-{day} 00:00:00",
+                end_time=f"2025-03-{day} 12:00:00",
+                car_id=self.c2,
+                origin_branch=self.b2,
+                destination_branch=self.b2,
+            )
+
+        sync = await self.async_client.get("/api/schedules/")
+        response = await self.async_client.get("/api/async/schedules/")
+
+        self.assertListEqual([1, 2, 3, 4], [s["id"] for s in response.json()])
+        self.assertEqual(sync.content, response.content)
+
+    async def test_details_match_sync_views(self):
+        for url in ["cars/C1/", "branches/1/", "schedules/1/", "branches/2/inventory"]:
+            with self.subTest(url=url):
+                sync = await self.async_client.get(f"/api/{url}")
+                response = await self.async_client.get(f"/api/async/{url}")
+
+                self.assertEqual(200, response.status_code)
+                self.assertEqual(sync.content, response.content)
+
+    @patch("car_api.utils.now", return_value=DEFAULT_NOW)
+    async def test_inventory_at_time_matches_sync_view(self, _):
+        for url, at_time in [
+            ("branches/1/inventory", "2025-02-03 00:00:00"),
+            ("branches/2/inventory", "2025-02-06 00:00:00"),
+            ("branches/2/inventory", "2025-02-03 00:00:00"),
+        ]:
+            for content_type, data in [
+                ("application/json", {"at_time": at_time}),
+                ("application/x-www-form-urlencoded", f"at_time={at_time}"),
+            ]:
+                with self.subTest(url=url, at_time=at_time, content_type=content_type):
+                    sync = await self.async_client.post(
+                        f"/api/{url}", data, content_type=content_type
+                    )
+                    response = await self.async_client.post(
+                        f"/api/async/{url}", data, content_type=content_type
+                    )
+
+                    self.assertEqual(sync.status_code, response.status_code)
+                    self.assertEqual(sync.content, response.content)
+
+    async def test_inventory_at_time_needs_valid_time(self):
+        for body in ['{"at_time": "soon"}', "{}", "[]", "not json"]:
+            with self.subTest(body=body):
+                response = await self.async_client.post(
+                    "/api/async/branches/1/inventory",
+                    body,
+                    content_type="application/json",
+                )
+
+                self.assertEqual(400, response.status_code)
+                self.assertIn("error", response.json())
+
+    async def test_missing_object(self):
+        response = await self.async_client.get("/api/async/cars/C9/")
+
+        self.assertEqual(404, response.status_code)
+        self.assertIn("error", response.json())
+
+    async def test_only_get(self):
+        response = await self.async_client.post("/api/async/cars/", {})
+
+        self.assertEqual(405, response.status_code)
@@ -2,7 +2,7 @@ from django.test import TransactionTestCase
 from rest_framework.test import APIClient
 from unittest.mock import patch
 
-from . import DEFAULT_NOW
+from . import DEFAULT_NOW, reset_inventory
 from ..models import Car, Schedule, Branch
 
 
@@ -11,6 +11,7 @@ class BranchInventoryAPITests(TransactionTestCase):
     reset_sequences = True
 
     def setUp(self):
+        reset_inventory()
         self.b1 = Branch.objects.create(name="Prague")
         self.b2 = Branch.objects.create(name="Prague")
 
@@ -62,3 +63,28 @@ class BranchInventoryAPITests(TransactionTestCase):
 
         self.assertListEqual(expected_b1, b1_response.data)
         self.assertListEqual(expected_b2, b2_response.data)
+
+
+class BranchGetTests(TransactionTestCase):
+    reset_sequences = True
+
+    def setUp(self):
+        Branch.objects.create(name="Prague")
+        Branch.objects.create(name="Brno")
+        self.client = APIClient()
+
+    def test_get_all_branches(self):
+        expected = [{"id": 1, "name": "Prague"}, {"id": 2, "name": "Brno"}]
+
+        response = self.client.get("/api/branches/")
+
+        self.assertListEqual(expected, response.data)
+
+    def test_get_branches_paginated(self):
+        response = self.client.get("/api/branches/?page_size=1")
+
+        self.assertListEqual([{"id": 1, "name": "Prague"}], response.data["results"])
+
+        response = self.client.get(response.data["next"])
+
+        self.assertListEqual([{"id": 2, "name": "Brno"}], response.data["results"])
@@ -0,0 +1,178 @@
+import logging
+import time
+from datetime import timedelta
+
+from django.test import TestCase
+from rest_framework.test import APIClient
+from unittest.mock import patch
+
+from . import DEFAULT_NOW, at, reset_inventory
+from ..calendars import busy_intervals, free_gaps
+from ..models import Car, Schedule, Branch
+from ..signals import schedules_bulk_created
+
+logger = logging.getLogger(__name__)
+
+
+class IntervalTests(TestCase):
+    def test_busy_intervals(self):
+        schedules = [
+            (at("2025-02-01 08:00"), at("2025-02-01 12:00"), 1, 1),
+            # Overlapping, and touching the next one.
+            (at("2025-02-01 10:00"), at("2025-02-01 14:00"), 1, 2),
+            (at("2025-02-01 14:00"), at("2025-02-01 16:00"), 2, 3),
+            # Inside the previous one, doesn't change where it ends.
+            (at("2025-02-01 14:30"), at("2025-02-01 15:00"), 3, 1),
+            (at("2025-02-02 08:00"), at("2025-02-02 09:00"), 3, 3),
+        ]
+
+        self.assertEqual(
+            [
+                (at("2025-02-01 08:00"), at("2025-02-01 16:00"), 1, 3),
+                (at("2025-02-02 08:00"), at("2025-02-02 09:00"), 3, 3),
+            ],
+            busy_intervals(schedules),
+        )
+
+    def test_free_gaps(self):
+        busy = [
+            (at("2025-01-31 20:00"), at("2025-02-01 08:00"), 1, 2),
+            (at("2025-02-01 12:00"), at("2025-02-01 16:00"), 3, 3),
+        ]
+
+        self.assertEqual(
+            [
+                (at("2025-02-01 08:00"), at("2025-02-01 12:00"), 2, 3),
+                (at("2025-02-01 16:00"), at("2025-02-02 00:00"), 3, 3),
+            ],
+            free_gaps(busy, at("2025-02-01 00:00"), at("2025-02-02 00:00"), 1),
+        )
+        self.assertEqual(
+            [(at("2025-02-01 00:00"), at("2025-02-02 00:00"), 1, 1)],
+            free_gaps([], at("2025-02-01 00:00"), at("2025-02-02 00:00"), 1),
+        )
+
+
+@patch("car_api.utils.now", return_value=DEFAULT_NOW)
+class CarCalendarTests(TestCase):
+    def setUp(self):
+        reset_inventory()
+        self.b1 = Branch.objects.create(name="Prague")
+        self.b2 = Branch.objects.create(name="Brno")
+        self.car = Car.objects.create(
+            id="C1", make="Honda", model="Civic", branch=self.b1
+        )
+        self.client = APIClient()
+
+    def book(self, start, end, origin, destination):
+        Schedule.objects.create(
+            start_time=at(start),
+            end_time=at(end),
+            car_id=self.car,
+            origin_branch=origin,
+            destination_branch=destination,
+        )
+
+    def calendar(self, query=""):
+        return self.client.get(f"/api/cars/C1/calendar{query}")
+
+    def test_calendar(self, _):
+        self.book("2025-02-01 08:00", "2025-02-01 20:00", self.b1, self.b2)
+        self.book("2025-02-03 08:00", "2025-02-03 10:00", self.b2, self.b2)
+        self.book("2025-02-03 10:00", "2025-02-04 10:00", self.b1, self.b1)
+
+        response = self.calendar("?from=2025-02-01 00:00&to=2025-02-05 00:00")
+
+        self.assertEqual(
+            {
+                "car_id": "C1",
+                "from": "2025-02-01T00:00:00",
+                "to": "2025-02-05T00:00:00",
+                "busy": [
+                    {
+                        "start_time": "2025-02-01T08:00:00",
+                        "end_time": "2025-02-01T20:00:00",
+                    },
+                    {
+                        "start_time": "2025-02-03T08:00:00",
+                        "end_time": "2025-02-04T10:00:00",
+                    },
+                ],
+                "free": [
+                    {
+                        "start_time": "2025-02-01T00:00:00",
+                        "end_time": "2025-02-01T08:00:00",
+                        "start_branch": self.b1.pk,
+                        "end_branch": self.b1.pk,
+                    },
+                    {
+                        "start_time": "2025-02-01T20:00:00",
+                        "end_time": "2025-02-03T08:00:00",
+                        "start_branch": self.b2.pk,
+                        "end_branch": self.b2.pk,
+                    },
+                    {
+                        "start_time": "2025-02-04T10:00:00",
+                        "end_time": "2025-02-05T00:00:00",
+                        "start_branch": self.b1.pk,
+                        "end_branch": self.b1.pk,
+                    },
+                ],
+            },
+            response.json(),
+        )
+
+    def test_starts_where_the_last_trip_left_it(self, _):
+        self.book("2025-02-01 08:00", "2025-02-01 20:00", self.b1, self.b2)
+
+        free = self.calendar("?from=2025-02-02&to=2025-02-03").json()["free"]
+
+        self.assertEqual(
+            [(self.b2.pk, self.b2.pk)],
+            [(gap["start_branch"], gap["end_branch"]) for gap in free],
+        )
+
+    def test_default_window(self, _):
+        data = self.calendar().json()
+
+        self.assertEqual("2025-01-25T00:00:00", data["from"])
+        self.assertEqual("2025-02-24T00:00:00", data["to"])
+        self.assertEqual(1, len(data["free"]))
+
+        data = self.calendar("?from=2025-03-01").json()
+
+        self.assertEqual("2025-03-31T00:00:00", data["to"])
+
+    def test_bad_window(self, _):
+        for query in ["?from=soon", "?from=2025-03-01&to=2025-02-01", "?to=2025-01-01"]:
+            with self.subTest(query=query):
+                self.assertEqual(400, self.calendar(query).status_code)
+
+    def test_unknown_car(self, _):
+        self.assertEqual(404, self.client.get("/api/cars/C9/calendar").status_code)
+
+    def test_many_schedules(self, _):
+        start = at("2025-02-01 00:00")
+        schedules = [
+            Schedule(
+                start_time=start + timedelta(hours=6 * i),
+                end_time=start + timedelta(hours=6 * i + 4),
+                car_id=self.car,
+                origin_branch=self.b1,
+                destination_branch=self.b1,
+            )
+            for i in range(5000)
+        ]
+        Schedule.objects.bulk_create(schedules)
+        schedules_bulk_created(schedules)
+
+        # The car, then its schedules.
+        with self.assertNumQueries(2):
+            began = time.perf_counter()
+            response = self.calendar("?from=2025-02-01&to=2030-01-01")
+            elapsed = time.perf_counter() - began
+
+        data = response.json()
+        self.assertEqual(5000, len(data["busy"]))
+        self.assertEqual(5000, len(data["free"]))
+        logger.info("Calendar of 5000 schedules in %.1fms", elapsed * 1000)
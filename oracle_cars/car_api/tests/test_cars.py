@@ -1,3 +1,6 @@
+import json
+from unittest.mock import patch
+
 from django.test import TestCase, TransactionTestCase
 from ..models import Car, Branch
 from rest_framework.test import APIClient
@@ -73,6 +76,52 @@ class CarGetTests(CarAPITests):
 
         self.assertListEqual(response.data, expected_data)
 
+    def test_get_cars_paginated(self):
+        response = self.client.get("/api/cars/?page_size=1", format="json")
+
+        self.assertListEqual(
+            response.data["results"],
+            [{"id": "C1996", "make": "Honda", "model": "Accord", "branch": 1}],
+        )
+        self.assertIsNone(response.data["previous"])
+
+        response = self.client.get(response.data["next"], format="json")
+
+        self.assertListEqual(
+            response.data["results"],
+            [{"id": "C2025", "make": "Ford", "model": "Falcon", "branch": 1}],
+        )
+        self.assertIsNone(response.data["next"])
+
+    def test_get_cars_page_size_capped(self):
+        for i in range(1100):
+            Car.objects.create(
+                id=f"C{i}", make="Honda", model="Accord", branch=self.branch
+            )
+
+        response = self.client.get("/api/cars/?page_size=5000", format="json")
+
+        self.assertEqual(len(response.data["results"]), 1000)
+
+    def test_get_cars_streamed(self):
+        response = self.client.get("/api/cars/?stream=1")
+        content = b"".join(response.streaming_content)
+
+        self.assertEqual(content, self.client.get("/api/cars/", format="json").content)
+
+    def test_get_cars_streamed_in_chunks(self):
+        for i in range(5):
+            Car.objects.create(
+                id=f"C{i}", make="Honda", model="Accord", branch=self.branch
+            )
+
+        with patch("car_api.streaming.STREAM_CHUNK_SIZE", 2):
+            response = self.client.get("/api/cars/?stream=1")
+            chunks = list(response.streaming_content)
+
+        self.assertEqual(len(chunks), 6)
+        self.assertEqual(len(json.loads(b"".join(chunks))), 7)
+
     def test_get_specific_car(self):
         expected_data = {"id": "C1996", "make": "Honda", "model": "Accord", "branch": 1}
 
@@ -0,0 +1,151 @@
+from django.db import transaction
+from django.test import TransactionTestCase, override_settings
+from rest_framework.test import APIClient
+
+from . import reset_inventory
+from .. import etags
+from ..models import Car, Schedule, Branch, Version
+
+
+class ConditionalGetTests(TransactionTestCase):
+    reset_sequences = True
+
+    def setUp(self):
+        reset_inventory()
+        self.b1 = Branch.objects.create(name="Prague")
+        self.b2 = Branch.objects.create(name="Brno")
+
+        self.c1 = Car.objects.create(
+            id="C1", make="test_make", model="test_model", branch=self.b1
+        )
+        self.s1 = Schedule.objects.create(
+            start_time="2025-02-01 00:00:00",
+            end_time="2025-02-05 00:00:00",
+            car_id=self.c1,
+            origin_branch=self.b1,
+            destination_branch=self.b2,
+        )
+        self.client = APIClient()
+
+    def assertNotModified(self, url, etag, queries=1):
+        # Only the versions are read, not the view's data.
+        with self.assertNumQueries(queries):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(304, response.status_code)
+        self.assertEqual(etag, response["ETag"])
+
+    def assertModified(self, url, etag):
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(200, response.status_code)
+        self.assertNotEqual(etag, response["ETag"])
+
+    def test_car_list(self):
+        etag = self.client.get("/api/cars/")["ETag"]
+
+        self.assertNotModified("/api/cars/", etag)
+        Car.objects.create(
+            id="C2", make="test_make", model="test_model", branch=self.b2
+        )
+        self.assertModified("/api/cars/", etag)
+
+    def test_branch_inventory(self):
+        etag = self.client.get("/api/branches/1/inventory")["ETag"]
+
+        self.assertNotModified("/api/branches/1/inventory", etag, queries=2)
+        self.c1.branch = self.b2
+        self.c1.save()
+        self.assertModified("/api/branches/1/inventory", etag)
+
+    def test_schedule_detail(self):
+        etag = self.client.get("/api/schedules/1/")["ETag"]
+
+        # Other schedules don't matter.
+        Schedule.objects.create(
+            start_time="2025-03-01 00:00:00",
+            end_time="2025-03-05 00:00:00",
+            car_id=self.c1,
+            origin_branch=self.b2,
+            destination_branch=self.b1,
+        )
+        self.assertNotModified("/api/schedules/1/", etag)
+
+        self.s1.delete()
+        response = self.client.get("/api/schedules/1/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(404, response.status_code)
+
+    def test_recreated_row(self):
+        etag = self.client.get("/api/cars/C1/")["ETag"]
+
+        self.c1.delete()
+        Car.objects.create(id="C1", make="Skoda", model="Fabia", branch=self.b1)
+
+        self.assertModified("/api/cars/C1/", etag)
+
+    def test_schedule_version_bumped_after_commit(self):
+        before = etags.versions(Schedule)
+
+        with transaction.atomic():
+            Schedule.objects.create(
+                start_time="2025-03-01 00:00:00",
+                end_time="2025-03-05 00:00:00",
+                car_id=self.c1,
+                origin_branch=self.b1,
+                destination_branch=self.b1,
+            )
+            # Not written, so other bookings aren't held up by its lock.
+            self.assertEqual(before, etags.versions(Schedule))
+
+        self.assertNotEqual(before, etags.versions(Schedule))
+
+    def test_one_version_per_table(self):
+        self.s1.end_time = "2025-02-06 00:00:00"
+        self.s1.save()
+        self.c1.delete()
+
+        self.assertSetEqual(
+            {"car_api.branch", "car_api.car", "car_api.schedule"},
+            set(Version.objects.values_list("key", flat=True)),
+        )
+
+    def test_etag_depends_on_query(self):
+        etag = self.client.get("/api/cars/")["ETag"]
+
+        self.assertModified("/api/cars/?page_size=1", etag)
+
+    def test_weak_and_listed_etags_match(self):
+        etag = self.client.get("/api/branches/")["ETag"]
+
+        response = self.client.get(
+            "/api/branches/", HTTP_IF_NONE_MATCH=f'"other", W/{etag}'
+        )
+
+        self.assertEqual(304, response.status_code)
+
+    def test_writes_reach_other_workers(self):
+        # Two workers, each with a cache of its own.
+        worker_a = override_settings(
+            CACHES={
+                "default": {
+                    "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+                    "LOCATION": "worker-a",
+                }
+            }
+        )
+        worker_b = override_settings(
+            CACHES={
+                "default": {
+                    "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+                    "LOCATION": "worker-b",
+                }
+            }
+        )
+        with worker_a:
+            etag = self.client.get("/api/cars/C1/")["ETag"]
+            self.assertNotModified("/api/cars/C1/", etag)
+
+        with worker_b:
+            self.c1.make = "Skoda"
+            self.c1.save()
+
+        with worker_a:
+            self.assertModified("/api/cars/C1/", etag)
@@ -0,0 +1,188 @@
+import csv
+import io
+import tempfile
+from io import StringIO
+from pathlib import Path
+from unittest import skipUnless
+from unittest.mock import patch
+
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils.dateparse import parse_datetime
+
+from . import reset_inventory
+from .. import exports
+from ..models import Car, Schedule, Branch
+
+
+class ExportTestCase(TestCase):
+    def setUp(self):
+        reset_inventory()
+        self.b1 = Branch.objects.create(name="Prague")
+        self.b2 = Branch.objects.create(name="Brno")
+        self.b3 = Branch.objects.create(name="Ostrava")
+        c1 = Car.objects.create(id="C1", make="Honda", model="Civic", branch=self.b1)
+        self.schedules = [
+            Schedule.objects.create(
+                start_time=parse_datetime(start),
+                end_time=parse_datetime(end),
+                car_id=c1,
+                origin_branch=origin,
+                destination_branch=destination,
+            )
+            for start, end, origin, destination in [
+                ("2025-02-01 08:00", "2025-02-01 20:00", self.b1, self.b2),
+                ("2025-02-03 08:00", "2025-02-04 08:30", self.b2, self.b2),
+                ("2025-02-06 08:00", "2025-02-06 09:00", self.b2, self.b3),
+            ]
+        ]
+
+    def rows(self, content):
+        return list(csv.DictReader(io.StringIO(content.decode())))
+
+
+class ScheduleExportTests(ExportTestCase):
+    def get(self, query="", **kwargs):
+        return self.client.get(f"/api/schedules/export/{query}", **kwargs)
+
+    def test_csv(self):
+        response = self.get()
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual("text/csv", response["Content-Type"])
+        self.assertIn('filename="schedules.csv"', response["Content-Disposition"])
+        rows = self.rows(b"".join(response.streaming_content))
+        self.assertEqual(
+            {
+                "id": str(self.schedules[0].pk),
+                "start_time": "2025-02-01 08:00:00",
+                "end_time": "2025-02-01 20:00:00",
+                "car_id": "C1",
+                "origin_branch": str(self.b1.pk),
+                "destination_branch": str(self.b2.pk),
+            },
+            rows[0],
+        )
+        self.assertEqual(3, len(rows))
+
+    def test_chunks(self):
+        content = b"".join(exports.render(exports.schedules(), "csv", chunk_size=2))
+
+        self.assertEqual(3, len(self.rows(content)))
+        self.assertEqual(
+            b"id,start_time,end_time,car_id,origin_branch,destination_branch\r\n",
+            b"".join(exports.render(Schedule.objects.none(), "csv")),
+        )
+
+    def test_chunks_are_separate_queries(self):
+        # A query per chunk, each starting after the last ID of the one
+        # before, rather than one cursor the backend may read all of up front.
+        with CaptureQueriesContext(connection) as queries:
+            content = b"".join(exports.render(exports.schedules(), "csv", chunk_size=2))
+
+        self.assertEqual(
+            [str(s.pk) for s in self.schedules],
+            [row["id"] for row in self.rows(content)],
+        )
+        self.assertEqual(2, len(queries))
+        self.assertIn("LIMIT 2", queries[0]["sql"])
+        self.assertIn(f'"id" > {self.schedules[1].pk}', queries[1]["sql"])
+
+    def test_filters(self):
+        for query, expected in [
+            ("?since=2025-02-04 08:00", [1, 2]),
+            ("?until=2025-02-03 08:00", [0]),
+            ("?since=2025-02-02&until=2025-02-05", [1]),
+            (f"?branch={self.b1.pk}", [0]),
+            (f"?branch={self.b3.pk}&until=2025-02-06 08:30", [2]),
+        ]:
+            with self.subTest(query=query):
+                rows = self.rows(b"".join(self.get(query).streaming_content))
+
+                self.assertEqual(
+                    [str(self.schedules[i].pk) for i in expected],
+                    [row["id"] for row in rows],
+                )
+
+    def test_bad_filters(self):
+        for query in [
+            "?since=soon",
+            "?branch=Prague",
+            "?output=xml",
+            "?since=2025-03-01&until=2025-02-01",
+        ]:
+            with self.subTest(query=query):
+                self.assertEqual(400, self.get(query).status_code)
+
+    def test_ignores_accept_header(self):
+        response = self.get(headers={"Accept": "text/csv"})
+
+        self.assertEqual(200, response.status_code)
+
+    @patch("car_api.exports.pyarrow", None)
+    def test_columnar_needs_pyarrow(self):
+        response = self.get("?output=parquet")
+
+        self.assertEqual(400, response.status_code)
+        self.assertIn("pyarrow", response.json()["error"])
+
+    @skipUnless(exports.pyarrow, "pyarrow isn't installed")
+    def test_parquet(self):
+        import pyarrow.parquet
+
+        response = self.get("?output=parquet")
+
+        self.assertEqual("application/vnd.apache.parquet", response["Content-Type"])
+        table = pyarrow.parquet.read_table(
+            io.BytesIO(b"".join(response.streaming_content))
+        )
+        self.assertEqual(exports.FIELDS, table.column_names)
+        self.assertEqual(
+            [s.end_time for s in self.schedules], table["end_time"].to_pylist()
+        )
+
+    @skipUnless(exports.pyarrow, "pyarrow isn't installed")
+    def test_arrow(self):
+        import pyarrow.ipc
+
+        content = b"".join(exports.render(exports.schedules(), "arrow", chunk_size=2))
+
+        table = pyarrow.ipc.open_stream(content).read_all()
+        self.assertEqual(["C1"] * 3, table["car_id"].to_pylist())
+        self.assertEqual([s.pk for s in self.schedules], table["id"].to_pylist())
+
+
+class ExportSchedulesCommandTests(ExportTestCase):
+    def export(self, *args):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        err = StringIO()
+        path = Path(directory.name) / "schedules.csv"
+        call_command("export_schedules", str(path), *args, stderr=err)
+        return path, err.getvalue()
+
+    def test_command(self):
+        path, err = self.export(f"--branch={self.b2.pk}", "--since=2025-02-05")
+
+        self.assertEqual(
+            [str(self.schedules[2].pk)],
+            [row["id"] for row in self.rows(path.read_bytes())],
+        )
+        self.assertIn("Exported 1 schedules as csv", err)
+
+    def test_round_trip_through_import(self):
+        path, _ = self.export()
+        Schedule.objects.all().delete()
+
+        call_command("import_fleet", f"--schedules={path}", stdout=StringIO())
+
+        self.assertEqual(
+            [(s.pk, s.start_time, s.end_time) for s in self.schedules],
+            list(Schedule.objects.values_list("pk", "start_time", "end_time")),
+        )
+
+    def test_unknown_format(self):
+        with self.assertRaises(CommandError):
+            call_command("export_schedules", "schedules.xml", stderr=StringIO())
@@ -0,0 +1,133 @@
+from datetime import datetime, timedelta
+
+from django.test import TestCase
+from rest_framework.test import APIClient
+from unittest.mock import patch
+
+from . import DEFAULT_NOW, at, reset_inventory
+from .. import locations
+from ..management.commands.generate_fleet import generate
+from ..models import Car, Schedule, Branch
+from ..utils import get_inventory_at_date
+
+
+@patch("car_api.utils.now", return_value=DEFAULT_NOW)
+class FleetInventoryTests(TestCase):
+    def setUp(self):
+        reset_inventory()
+        self.b1 = Branch.objects.create(name="Prague")
+        self.b2 = Branch.objects.create(name="Brno")
+        self.b3 = Branch.objects.create(name="Ostrava")
+        self.c1 = Car.objects.create(
+            id="C1", make="Honda", model="Civic", branch=self.b1
+        )
+        self.c2 = Car.objects.create(
+            id="C2", make="Honda", model="Jazz", branch=self.b1
+        )
+        self.c3 = Car.objects.create(
+            id="C3", make="Skoda", model="Fabia", branch=self.b2
+        )
+        self.book(self.c1, "2025-02-01 08:00", "2025-02-01 12:00", self.b1, self.b2)
+        # A round trip doesn't take the car anywhere.
+        self.book(self.c3, "2025-02-01 09:00", "2025-02-01 11:00", self.b2, self.b2)
+        self.client = APIClient()
+
+    def book(self, car, start, end, origin, destination):
+        Schedule.objects.create(
+            start_time=at(start),
+            end_time=at(end),
+            car_id=car,
+            origin_branch=origin,
+            destination_branch=destination,
+        )
+
+    def inventory(self, query):
+        return self.client.get(f"/api/inventory{query}")
+
+    def test_snapshot(self, _):
+        for at_time, branches, in_transit in [
+            (
+                "2025-02-01 08:00",
+                {self.b1.pk: ["C1", "C2"], self.b2.pk: ["C3"], self.b3.pk: []},
+                [],
+            ),
+            (
+                "2025-02-01 10:00",
+                {self.b1.pk: ["C2"], self.b2.pk: ["C3"], self.b3.pk: []},
+                ["C1"],
+            ),
+            (
+                "2025-02-01 13:00",
+                {self.b1.pk: ["C2"], self.b2.pk: ["C3", "C1"], self.b3.pk: []},
+                [],
+            ),
+        ]:
+            with self.subTest(at_time=at_time):
+                self.assertEqual(
+                    (branches, in_transit),
+                    locations.fleet_at(at(at_time), DEFAULT_NOW),
+                )
+
+    def test_constant_queries(self, _):
+        # The branches, the cars with their departures and the segments.
+        with self.assertNumQueries(3):
+            locations.fleet_at(at("2025-02-01 10:00"), DEFAULT_NOW)
+
+    def test_endpoint(self, _):
+        response = self.inventory("?at_time=2025-02-01 10:00")
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(
+            {
+                "at_time": "2025-02-01T10:00:00",
+                "branches": {
+                    str(self.b1.pk): ["C2"],
+                    str(self.b2.pk): ["C3"],
+                    str(self.b3.pk): [],
+                },
+                "in_transit": ["C1"],
+            },
+            response.json(),
+        )
+
+    def test_bad_parameters(self, _):
+        for query in ["", "?at_time=tomorrow"]:
+            with self.subTest(query=query):
+                response = self.inventory(query)
+
+                self.assertEqual(400, response.status_code)
+                self.assertIn("error", response.json())
+
+
+@patch("car_api.utils.now", return_value=DEFAULT_NOW)
+class GeneratedFleetInventoryTests(TestCase):
+    def setUp(self):
+        reset_inventory()
+        branches, cars, schedules = generate(
+            branches=4,
+            cars=16,
+            schedules=300,
+            density=0.6,
+            one_way=0.4,
+            seed=11,
+            start=datetime(2025, 1, 1),
+        )
+        for model, objs in [(Branch, branches), (Car, cars), (Schedule, schedules)]:
+            model.objects.bulk_create(objs)
+        locations.rebuild()
+        self.car_ids = {car.pk for car in cars}
+
+    def test_matches_inventory(self, _):
+        for hours in range(0, 24 * 40, 17):
+            at_time = datetime(2025, 1, 20) + timedelta(hours=hours)
+            branches, in_transit = locations.fleet_at(at_time, DEFAULT_NOW)
+            with self.subTest(at_time=at_time):
+                for branch_id, car_ids in branches.items():
+                    self.assertEqual(
+                        [car.pk for car in get_inventory_at_date(branch_id, at_time)],
+                        car_ids,
+                    )
+                # Every car is somewhere, and only in one place.
+                placed = [car for car_ids in branches.values() for car in car_ids]
+                self.assertEqual(len(self.car_ids), len(placed) + len(in_transit))
+                self.assertEqual(self.car_ids, set(placed) | set(in_transit))
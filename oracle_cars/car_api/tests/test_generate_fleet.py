@@ -0,0 +1,125 @@
+from datetime import datetime, timedelta
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from . import reset_inventory
+from .. import locations, transfers
+from ..management.commands.generate_fleet import generate
+from ..models import Car, Schedule, Branch, TransferTime
+
+
+class GenerateFleetTests(TestCase):
+    def setUp(self):
+        reset_inventory()
+
+    def fleet(self, **kwargs):
+        options = dict(
+            branches=5,
+            cars=20,
+            schedules=400,
+            density=0.6,
+            one_way=0.3,
+            seed=1,
+            start=datetime(2025, 1, 1),
+        )
+        options.update(kwargs)
+        return generate(**options)
+
+    def rows(self, fleet):
+        branches, cars, schedules = fleet
+        return (
+            [b.name for b in branches],
+            [(c.id, c.make, c.model, c.branch.pk) for c in cars],
+            [
+                (
+                    s.car_id.id,
+                    s.start_time,
+                    s.end_time,
+                    s.origin_branch.pk,
+                    s.destination_branch.pk,
+                )
+                for s in schedules
+            ],
+        )
+
+    def test_deterministic(self):
+        self.assertEqual(self.rows(self.fleet()), self.rows(self.fleet()))
+        self.assertNotEqual(self.rows(self.fleet()), self.rows(self.fleet(seed=2)))
+
+    def test_schedules_follow_each_car(self):
+        _, cars, schedules = self.fleet()
+        self.assertEqual(400, len(schedules))
+
+        for car in cars:
+            trips = [s for s in schedules if s.car_id is car]
+            location = car.branch
+            for previous, trip in zip([None] + trips, trips):
+                self.assertIs(location, trip.origin_branch)
+                self.assertLess(trip.start_time, trip.end_time)
+                if previous:
+                    self.assertLess(previous.end_time, trip.start_time)
+                location = trip.destination_branch
+
+    def test_density(self):
+        _, cars, schedules = self.fleet(density=0.25, schedules=2000)
+
+        booked = sum((s.end_time - s.start_time for s in schedules), timedelta())
+        span = max(s.end_time for s in schedules) - datetime(2025, 1, 1)
+
+        self.assertAlmostEqual(0.25, booked / (span * len(cars)), delta=0.1)
+
+    def test_command(self):
+        out = StringIO()
+
+        call_command("generate_fleet", "--cars=10", "--schedules=100", stdout=out)
+
+        self.assertEqual(10, Branch.objects.count())
+        self.assertEqual(10, Car.objects.count())
+        self.assertEqual(100, Schedule.objects.count())
+        self.assertEqual((set(), set()), locations.check())
+        self.assertIn(
+            "Generated 10 branches, 10 cars and 100 schedules.", out.getvalue()
+        )
+
+    def test_command_needs_clear(self):
+        call_command("generate_fleet", "--cars=2", "--schedules=4", stdout=StringIO())
+
+        with self.assertRaises(CommandError):
+            call_command("generate_fleet", stdout=StringIO())
+
+        call_command(
+            "generate_fleet", "--cars=3", "--schedules=6", "--clear", stdout=StringIO()
+        )
+        self.assertEqual(3, Car.objects.count())
+        self.assertEqual(6, Schedule.objects.count())
+        self.assertEqual((set(), set()), locations.check())
+
+    def test_clear_replaces_transfer_times_and_etags(self):
+        call_command("generate_fleet", "--cars=4", "--schedules=8", stdout=StringIO())
+        b1, b2 = Branch.objects.order_by("pk")[:2]
+        TransferTime.objects.create(
+            origin=b1, destination=b2, duration=timedelta(hours=1)
+        )
+        self.assertEqual({(b1.pk, b2.pk): timedelta(hours=1)}, transfers.matrix())
+        client = APIClient()
+        url = f"/api/cars/{Car.objects.order_by('pk').first().pk}/"
+        etag = client.get(url)["ETag"]
+
+        call_command(
+            "generate_fleet",
+            "--cars=4",
+            "--schedules=8",
+            "--seed=2",
+            "--clear",
+            stdout=StringIO(),
+        )
+
+        self.assertFalse(TransferTime.objects.exists())
+        self.assertEqual({}, transfers.matrix())
+        self.assertEqual(4, Car.objects.count())
+        self.assertEqual((set(), set()), locations.check())
+        # The regenerated car has the same ID, its ETag follows its values.
+        self.assertNotEqual(etag, client.get(url)["ETag"])
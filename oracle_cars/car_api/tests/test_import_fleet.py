@@ -0,0 +1,174 @@
+import json
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from django.utils.dateparse import parse_datetime
+from unittest.mock import patch
+
+from . import DEFAULT_NOW, reset_inventory
+from .. import locations
+from ..models import Car, Schedule, Branch
+from ..utils import get_inventory_car_ids
+
+
+class ImportFleetTests(TestCase):
+    def setUp(self):
+        reset_inventory()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.dir = Path(directory.name)
+
+    def write(self, name, text):
+        path = self.dir / name
+        path.write_text(text)
+        return str(path)
+
+    def import_fleet(self, *args):
+        out, err = StringIO(), StringIO()
+        call_command("import_fleet", *args, stdout=out, stderr=err)
+        return out.getvalue(), err.getvalue()
+
+    def test_csv(self):
+        branches = self.write("branches.csv", "id,name\n1,Prague\n2,Brno\n")
+        cars = self.write(
+            "cars.csv", "id,make,model,branch\nC1,Honda,Civic,1\nC2,Ford,Focus,2\n"
+        )
+        schedules = self.write(
+            "schedules.csv",
+            "car_id,start_time,end_time,origin_branch,destination_branch\n"
+            "C1,2025-02-01 08:00,2025-02-01 20:00,1,2\n"
+            "C2,2025-02-02 08:00,2025-02-03 08:00,2,2\n",
+        )
+
+        out, err = self.import_fleet(
+            f"--branches={branches}", f"--cars={cars}", f"--schedules={schedules}"
+        )
+
+        self.assertEqual("", err)
+        self.assertIn("Imported 2 schedules", out)
+        self.assertEqual(["Prague", "Brno"], [b.name for b in Branch.objects.all()])
+        self.assertEqual(2, Car.objects.count())
+        schedule = Schedule.objects.get(car_id="C1")
+        self.assertEqual(parse_datetime("2025-02-01 20:00"), schedule.end_time)
+        self.assertEqual(2, schedule.destination_branch_id)
+        self.assertEqual((set(), set()), locations.check())
+
+    def test_jsonl(self):
+        b1 = Branch.objects.create(name="Prague")
+        cars = self.write(
+            "cars.jsonl",
+            json.dumps({"id": "C1", "make": "Honda", "model": "Civic", "branch": b1.pk})
+            + "\n\n"
+            + json.dumps(
+                {"id": "C2", "make": "Ford", "model": "Focus", "branch": b1.pk}
+            )
+            + "\n",
+        )
+
+        out, err = self.import_fleet(f"--cars={cars}", "--batch-size=1")
+
+        self.assertEqual("", err)
+        self.assertEqual(["C1", "C2"], [c.id for c in Car.objects.order_by("id")])
+
+    def test_reports_bad_rows_and_imports_the_rest(self):
+        b1 = Branch.objects.create(name="Prague")
+        Car.objects.create(id="C1", make="Honda", model="Civic", branch=b1)
+        cars = self.write(
+            "cars.csv",
+            "id,make,model,branch\n"
+            f"C2,Ford,Focus,{b1.pk}\n"
+            f"X3,Ford,Focus,{b1.pk}\n"
+            f"C1,Ford,Focus,{b1.pk}\n"
+            "C4,Ford,Focus,999\n"
+            f"C5,,Focus,{b1.pk}\n"
+            f"C2,Ford,Focus,{b1.pk}\n",
+        )
+
+        out, err = self.import_fleet(f"--cars={cars}")
+
+        self.assertEqual(["C1", "C2"], [c.id for c in Car.objects.order_by("id")])
+        self.assertIn("skipped 5 rows with errors", out)
+        lines = sorted(err.splitlines())
+        self.assertEqual(5, len(lines))
+        self.assertIn(f"{cars}:3: id: Car ID must start with C.", lines)
+        self.assertIn(f"{cars}:4: id: Car C1 already exists.", lines)
+        self.assertIn(f"{cars}:5: branch: No branch 999.", lines)
+        self.assertIn(f"{cars}:6: make: This field cannot be blank.", lines)
+        self.assertIn(f"{cars}:7: id: Appears more than once.", lines)
+
+    def test_schedule_rules(self):
+        b1 = Branch.objects.create(name="Prague")
+        Car.objects.create(id="C1", make="Honda", model="Civic", branch=b1)
+        Schedule.objects.create(
+            start_time="2025-02-01 00:00",
+            end_time="2025-02-02 00:00",
+            car_id_id="C1",
+            origin_branch=b1,
+            destination_branch=b1,
+        )
+        rows = [
+            ("C1", "2025-02-03 00:00", "2025-02-04 00:00"),
+            ("C1", "2025-02-06 00:00", "2025-02-05 00:00"),
+            ("C1", "2025-02-01 12:00", "2025-02-01 13:00"),
+            ("C1", "2025-02-03 12:00", "2025-02-03 13:00"),
+            ("C9", "2025-02-10 00:00", "2025-02-11 00:00"),
+            ("C1", "tomorrow", "2025-02-11 00:00"),
+        ]
+        schedules = self.write(
+            "schedules.jsonl",
+            "".join(
+                json.dumps(
+                    {
+                        "car_id": car,
+                        "start_time": start,
+                        "end_time": end,
+                        "origin_branch": b1.pk,
+                        "destination_branch": b1.pk,
+                    }
+                )
+                + "\n"
+                for car, start, end in rows
+            )
+            + "[]\n",
+        )
+
+        out, err = self.import_fleet(f"--schedules={schedules}")
+
+        self.assertEqual(2, Schedule.objects.count())
+        lines = err.splitlines()
+        self.assertEqual(6, len(lines))
+        self.assertIn(f"{schedules}:2: start_time cannot be before end_time.", lines)
+        self.assertIn(f"{schedules}:3: Overlaps another schedule of C1.", lines)
+        self.assertIn(f"{schedules}:4: Overlaps another schedule of C1.", lines)
+        self.assertIn(f"{schedules}:5: car_id: No car C9.", lines)
+        self.assertTrue(
+            any(line.startswith(f"{schedules}:6: start_time:") for line in lines)
+        )
+        self.assertIn(f"{schedules}:7: Not a JSON object.", lines)
+
+    @patch("car_api.utils.now", return_value=DEFAULT_NOW)
+    def test_updates_inventory(self, _):
+        b1 = Branch.objects.create(name="Prague")
+        b2 = Branch.objects.create(name="Brno")
+        Car.objects.create(id="C1", make="Honda", model="Civic", branch=b1)
+        at_time = parse_datetime("2025-02-10 00:00")
+        self.assertEqual({"C1"}, get_inventory_car_ids(b1.pk, at_time))
+
+        schedules = self.write(
+            "schedules.csv",
+            "car_id,start_time,end_time,origin_branch,destination_branch\n"
+            f"C1,2025-02-01 08:00,2025-02-01 20:00,{b1.pk},{b2.pk}\n",
+        )
+        self.import_fleet(f"--schedules={schedules}")
+
+        self.assertEqual(set(), get_inventory_car_ids(b1.pk, at_time))
+        self.assertEqual({"C1"}, get_inventory_car_ids(b2.pk, at_time))
+
+    def test_needs_a_file(self):
+        with self.assertRaises(CommandError):
+            self.import_fleet()
+        with self.assertRaises(CommandError):
+            self.import_fleet(f"--cars={self.write('cars.xml', '')}")
@@ -0,0 +1,228 @@
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import run_checks
+from django.test import TestCase, override_settings
+from django.utils.dateparse import parse_datetime
+from rest_framework.test import APIClient
+from unittest.mock import patch
+
+from . import DEFAULT_NOW, reset_inventory
+from .. import checks, inventory_cache
+from ..models import Car, Schedule, Branch
+from ..utils import get_free_car_ids, get_inventory_at_date
+
+
+@patch("car_api.utils.now", return_value=DEFAULT_NOW)
+class InventoryCacheTests(TestCase):
+    def setUp(self):
+        reset_inventory()
+        self.b1 = Branch.objects.create(name="Prague")
+        self.b2 = Branch.objects.create(name="Brno")
+        self.b3 = Branch.objects.create(name="Ostrava")
+
+        self.c1 = Car.objects.create(
+            id="C1", make="test_make", model="test_model", branch=self.b1
+        )
+        self.c2 = Car.objects.create(
+            id="C2", make="test_make", model="test_model", branch=self.b3
+        )
+
+    def schedule(self, car, start, end, origin, destination):
+        return Schedule.objects.create(
+            start_time=start,
+            end_time=end,
+            car_id=car,
+            origin_branch=origin,
+            destination_branch=destination,
+        )
+
+    def inventory(self, branch, at_time):
+        cars = get_inventory_at_date(branch, parse_datetime(at_time))
+        return [c.id for c in cars]
+
+    def test_repeated_lookups_are_cached(self, mock_now):
+        self.assertListEqual(["C1"], self.inventory(self.b1, "2025-02-01"))
+
+        free = get_free_car_ids(
+            self.b1.id, parse_datetime("2025-02-01"), parse_datetime("2025-02-02")
+        )
+
+        with self.assertNumQueries(0):
+            self.assertListEqual(["C1"], self.inventory(self.b1, "2025-02-01"))
+            self.assertListEqual(
+                free,
+                get_free_car_ids(
+                    self.b1.id,
+                    parse_datetime("2025-02-01"),
+                    parse_datetime("2025-02-02"),
+                ),
+            )
+
+        self.assertDictEqual(
+            {
+                "inventory": {"hits": 1, "misses": 1},
+                "free_cars": {"hits": 1, "misses": 1},
+            },
+            inventory_cache.stats(),
+        )
+
+    def test_schedule_invalidates_affected_branches(self, mock_now):
+        self.assertListEqual(["C1"], self.inventory(self.b1, "2025-02-03"))
+        self.assertListEqual([], self.inventory(self.b2, "2025-02-03"))
+        self.assertListEqual(["C2"], self.inventory(self.b3, "2025-02-03"))
+
+        self.schedule(self.c1, "2025-02-01", "2025-02-02", self.b1, self.b2)
+
+        self.assertListEqual([], self.inventory(self.b1, "2025-02-03"))
+        self.assertListEqual(["C1"], self.inventory(self.b2, "2025-02-03"))
+        with self.assertNumQueries(0):
+            self.assertListEqual(["C2"], self.inventory(self.b3, "2025-02-03"))
+
+    def test_reassigned_schedule_invalidates_old_car(self, mock_now):
+        s = self.schedule(self.c1, "2025-02-01", "2025-02-02", self.b1, self.b2)
+        self.assertListEqual([], self.inventory(self.b1, "2025-02-03"))
+
+        s.car_id = self.c2
+        s.save()
+
+        self.assertListEqual(["C1"], self.inventory(self.b1, "2025-02-03"))
+        self.assertListEqual(["C2"], self.inventory(self.b2, "2025-02-03"))
+
+    def test_car_change_invalidates_branches(self, mock_now):
+        self.assertListEqual(["C1"], self.inventory(self.b1, "2025-02-03"))
+
+        self.c1.branch = self.b2
+        self.c1.save()
+
+        self.assertListEqual([], self.inventory(self.b1, "2025-02-03"))
+        self.assertListEqual(["C1"], self.inventory(self.b2, "2025-02-03"))
+
+    def test_answers_expire_when_a_trip_ends(self, mock_now):
+        self.schedule(self.c1, "2025-02-01", "2025-02-02", self.b1, self.b2)
+        self.assertListEqual(["C1"], self.inventory(self.b2, "2025-02-10"))
+
+        # Still running, the cached answer stands.
+        mock_now.return_value = parse_datetime("2025-02-01 12:00")
+        with self.assertNumQueries(0):
+            self.assertListEqual(["C1"], self.inventory(self.b2, "2025-02-10"))
+
+        # Once it's finished the schedule no longer counts.
+        mock_now.return_value = parse_datetime("2025-02-03")
+        self.assertListEqual([], self.inventory(self.b2, "2025-02-10"))
+
+    def test_stats_endpoint(self, mock_now):
+        self.inventory(self.b1, "2025-02-01")
+        self.inventory(self.b1, "2025-02-01")
+
+        response = APIClient().get("/api/inventory-cache/")
+
+        self.assertDictEqual({"hits": 1, "misses": 1}, response.data["inventory"])
+
+
+# Local memory caches with the same location share their data, standing in
+# for Redis shared by several workers.
+SHARED_CACHE = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "car_api_test_shared",
+    }
+}
+
+
+@override_settings(CACHES=SHARED_CACHE)
+@patch("car_api.utils.now", return_value=DEFAULT_NOW)
+class SharedInventoryCacheTests(TestCase):
+    def setUp(self):
+        reset_inventory()
+        self.b1 = Branch.objects.create(name="Prague")
+        self.b2 = Branch.objects.create(name="Brno")
+        Car.objects.create(id="C1", make="Honda", model="Civic", branch=self.b1)
+        # Another worker's connection to the same cache.
+        self.other_worker = LocMemCache("car_api_test_shared", {})
+
+    def inventory(self, branch):
+        cars = get_inventory_at_date(branch, parse_datetime("2025-02-10"))
+        return [c.id for c in cars]
+
+    def test_writes_reach_other_workers(self, _):
+        with patch.object(inventory_cache, "cache", self.other_worker):
+            self.assertListEqual([], self.inventory(self.b2))
+
+        # Booked through this worker.
+        Schedule.objects.create(
+            start_time=parse_datetime("2025-02-01"),
+            end_time=parse_datetime("2025-02-02"),
+            car_id=Car.objects.get(pk="C1"),
+            origin_branch=self.b1,
+            destination_branch=self.b2,
+        )
+
+        with patch.object(inventory_cache, "cache", self.other_worker):
+            self.assertListEqual(["C1"], self.inventory(self.b2))
+
+    def test_hits_only_read(self, _):
+        self.inventory(self.b1)
+        keys = set(self.other_worker._cache)
+
+        with patch.object(self.other_worker, "set") as set_, patch.object(
+            inventory_cache, "cache", self.other_worker
+        ):
+            for _ in range(3):
+                self.assertListEqual(["C1"], self.inventory(self.b1))
+
+        set_.assert_not_called()
+        self.assertSetEqual(keys, set(self.other_worker._cache))
+        self.assertEqual(3, inventory_cache.stats()["inventory"]["hits"])
+
+
+@override_settings(
+    CACHES={
+        "default": {
+            "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+            "LOCATION": "car_api_test_cache",
+        }
+    }
+)
+@patch("car_api.utils.now", return_value=DEFAULT_NOW)
+class DatabaseCacheSkippedTests(TestCase):
+    def test_lookups_skip_the_cache(self, _):
+        branch = Branch.objects.create(name="Prague")
+        Car.objects.create(id="C1", make="Honda", model="Civic", branch=branch)
+
+        # Just the lookup in the segments, no cache table to read or write.
+        with self.assertNumQueries(1):
+            get_inventory_at_date(branch, parse_datetime("2025-02-10"))
+        with self.assertNumQueries(0):
+            inventory_cache.invalidate_branches(None)
+
+
+class SharedCacheCheckTests(TestCase):
+    def warnings(self):
+        return [
+            message.id
+            for message in run_checks(include_deployment_checks=True)
+            if message.id.startswith("car_api.")
+        ]
+
+    def test_process_local_cache_warns(self):
+        with override_settings(
+            CACHES={
+                "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+            }
+        ):
+            self.assertListEqual(["car_api.W001"], self.warnings())
+
+    def test_shared_cache_passes(self):
+        with override_settings(
+            CACHES={
+                "default": {
+                    "BACKEND": "django.core.cache.backends.redis.RedisCache",
+                    "LOCATION": "redis://127.0.0.1:6379",
+                }
+            }
+        ):
+            self.assertListEqual([], self.warnings())
+
+    def test_prod_cache_is_shared(self):
+        from oracle_cars.settings import prod
+
+        self.assertNotIn(prod.CACHES["default"]["BACKEND"], checks.PROCESS_LOCAL_CACHES)
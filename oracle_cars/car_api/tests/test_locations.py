@@ -0,0 +1,236 @@
+from datetime import datetime
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from django.utils.dateparse import parse_datetime
+from unittest.mock import patch
+
+from . import DEFAULT_NOW, reset_inventory
+from .. import locations, transfers
+from ..management.commands.generate_fleet import generate
+from ..models import Car, CarLocationSegment, Schedule, Branch
+from ..utils import (
+    get_free_car_ids_bulk,
+    get_inventory_at_date,
+    get_inventory_car_ids,
+)
+
+
+@patch("car_api.utils.now", return_value=DEFAULT_NOW)
+class CarLocationTests(TestCase):
+    def setUp(self):
+        reset_inventory()
+        self.b1 = Branch.objects.create(name="Prague")
+        self.b2 = Branch.objects.create(name="Brno")
+        self.b3 = Branch.objects.create(name="Ostrava")
+
+        self.c1 = Car.objects.create(
+            id="C1", make="test_make", model="test_model", branch=self.b1
+        )
+        self.c2 = Car.objects.create(
+            id="C2", make="test_make", model="test_model", branch=self.b1
+        )
+
+    def schedule(self, car, start, end, origin, destination):
+        return Schedule.objects.create(
+            start_time=start,
+            end_time=end,
+            car_id=car,
+            origin_branch=origin,
+            destination_branch=destination,
+        )
+
+    def inventory(self, branch, at_time):
+        return get_inventory_car_ids(branch, parse_datetime(at_time))
+
+    def test_multi_hop_trip(self, mock_now):
+        self.schedule(self.c1, "2025-02-01", "2025-02-02", self.b1, self.b2)
+        self.schedule(self.c1, "2025-02-03", "2025-02-04", self.b2, self.b3)
+        self.schedule(self.c1, "2025-02-05", "2025-02-06", self.b3, self.b1)
+
+        self.assertSetEqual({"C1", "C2"}, self.inventory(self.b1, "2025-02-01"))
+        self.assertSetEqual({"C2"}, self.inventory(self.b1, "2025-02-01 12:00"))
+        self.assertSetEqual({"C1"}, self.inventory(self.b2, "2025-02-02 12:00"))
+        self.assertSetEqual(set(), self.inventory(self.b2, "2025-02-03 12:00"))
+        self.assertSetEqual({"C1"}, self.inventory(self.b3, "2025-02-04 12:00"))
+        self.assertSetEqual({"C1", "C2"}, self.inventory(self.b1, "2025-02-07"))
+        self.assertSetEqual(set(), self.inventory(self.b3, "2025-02-07"))
+
+    def test_round_trip_keeps_car(self, mock_now):
+        self.schedule(self.c1, "2025-02-01", "2025-02-03", self.b1, self.b1)
+
+        self.assertSetEqual({"C1", "C2"}, self.inventory(self.b1, "2025-02-02"))
+
+    def test_finished_schedules_are_ignored(self, mock_now):
+        # Ends before DEFAULT_NOW, so the car is back at its home branch.
+        self.schedule(self.c1, "2025-01-01", "2025-01-02", self.b1, self.b2)
+
+        self.assertSetEqual({"C1", "C2"}, self.inventory(self.b1, "2025-02-01"))
+        self.assertSetEqual(set(), self.inventory(self.b2, "2025-02-01"))
+
+    def test_new_schedule_updates_index(self, mock_now):
+        self.assertSetEqual({"C1", "C2"}, self.inventory(self.b1, "2025-02-03"))
+
+        s = self.schedule(self.c1, "2025-02-01", "2025-02-02", self.b1, self.b2)
+
+        self.assertSetEqual({"C2"}, self.inventory(self.b1, "2025-02-03"))
+        self.assertSetEqual({"C1"}, self.inventory(self.b2, "2025-02-03"))
+
+        s.delete()
+
+        self.assertSetEqual({"C1", "C2"}, self.inventory(self.b1, "2025-02-03"))
+        self.assertSetEqual(set(), self.inventory(self.b2, "2025-02-03"))
+
+    def test_car_changes_update_index(self, mock_now):
+        self.assertSetEqual({"C1", "C2"}, self.inventory(self.b1, "2025-02-03"))
+
+        self.c1.branch = self.b2
+        self.c1.save()
+        self.c2.delete()
+
+        self.assertSetEqual(set(), self.inventory(self.b1, "2025-02-03"))
+        self.assertSetEqual({"C1"}, self.inventory(self.b2, "2025-02-03"))
+
+    def segments(self):
+        return sorted(
+            CarLocationSegment.objects.values_list("car", "branch", "since", "until"),
+            key=str,
+        )
+
+    def test_segments_follow_schedule_writes(self, mock_now):
+        s1 = self.schedule(self.c1, "2025-02-01", "2025-02-02", self.b1, self.b2)
+        s2 = self.schedule(self.c1, "2025-02-05", "2025-02-06", self.b2, self.b3)
+        self.schedule(self.c1, "2025-02-03", "2025-02-03 12:00", self.b2, self.b2)
+
+        self.assertListEqual(
+            [
+                (
+                    "C1",
+                    self.b2.id,
+                    parse_datetime("2025-02-02"),
+                    parse_datetime("2025-02-05"),
+                ),
+                ("C1", self.b3.id, parse_datetime("2025-02-06"), None),
+            ],
+            self.segments(),
+        )
+
+        s1.delete()
+        self.assertListEqual(
+            [("C1", self.b3.id, parse_datetime("2025-02-06"), None)], self.segments()
+        )
+
+        s2.car_id = self.c2
+        s2.save()
+        self.assertListEqual(
+            [("C2", self.b3.id, parse_datetime("2025-02-06"), None)], self.segments()
+        )
+        self.assertEqual((set(), set()), locations.check())
+
+    def test_inventory_single_query(self, mock_now):
+        self.schedule(self.c1, "2025-02-01", "2025-02-02", self.b1, self.b2)
+
+        with self.assertNumQueries(1):
+            self.assertSetEqual({"C1"}, self.inventory(self.b2, "2025-02-03"))
+
+    def test_free_cars_constant_queries(self, mock_now):
+        self.schedule(self.c1, "2025-02-01", "2025-02-02", self.b1, self.b1)
+        windows = [
+            (
+                self.b1.id,
+                parse_datetime(f"2025-02-01 {hour:02}:00"),
+                parse_datetime(f"2025-02-01 {hour:02}:30"),
+            )
+            for hour in range(24)
+        ]
+
+        # Home cars and segments, the transfer times' version, then the
+        # bookings. The transfer times themselves are only read once per
+        # process.
+        transfers.matrix()
+        with self.assertNumQueries(4):
+            free = get_free_car_ids_bulk(windows)
+
+        self.assertListEqual([["C2"]] * 24, free)
+
+
+class RebuildCarLocationsCommandTests(TestCase):
+    def setUp(self):
+        b1 = Branch.objects.create(name="Prague")
+        b2 = Branch.objects.create(name="Brno")
+        car = Car.objects.create(
+            id="C1", make="test_make", model="test_model", branch=b1
+        )
+        Schedule.objects.create(
+            start_time="2025-02-01",
+            end_time="2025-02-02",
+            car_id=car,
+            origin_branch=b1,
+            destination_branch=b2,
+        )
+
+    def test_rebuild(self):
+        CarLocationSegment.objects.all().delete()
+        out = StringIO()
+
+        call_command("rebuild_car_locations", stdout=out)
+
+        self.assertEqual(1, CarLocationSegment.objects.count())
+        self.assertIn("consistent", out.getvalue())
+
+    def test_check_only_reports_problems(self):
+        CarLocationSegment.objects.update(until="2025-03-01")
+        err = StringIO()
+
+        with self.assertRaisesMessage(CommandError, "1 missing and 1 unexpected"):
+            call_command("rebuild_car_locations", "--check-only", stderr=err)
+
+        self.assertIn("Missing: car C1", err.getvalue())
+        self.assertIn("until 2025-03-01", err.getvalue())
+
+
+@patch("car_api.utils.now", return_value=DEFAULT_NOW)
+class CascadedDeleteTests(TestCase):
+    def setUp(self):
+        reset_inventory()
+        branches, cars, schedules = generate(
+            branches=5,
+            cars=20,
+            schedules=90,
+            density=0.6,
+            one_way=0.4,
+            seed=3,
+            start=datetime(2025, 1, 1),
+        )
+        for model, objs in [(Branch, branches), (Car, cars), (Schedule, schedules)]:
+            model.objects.bulk_create(objs)
+        locations.rebuild()
+        self.branch = Branch.objects.order_by("pk").first()
+        self.car = Car.objects.exclude(branch=self.branch).order_by("pk").first()
+
+    def assertConsistent(self):
+        self.assertEqual((set(), set()), locations.check())
+        at_time = parse_datetime("2025-02-10")
+        for branch in Branch.objects.all():
+            reset_inventory()
+            cached = get_inventory_car_ids(branch, at_time)
+            self.assertSetEqual(
+                {car.pk for car in get_inventory_at_date(branch.pk, at_time)}, cached
+            )
+
+    def test_branch_delete(self, mock_now):
+        # Collecting the branch's cars, schedules and transfer times, the
+        # deletes, then one rebuild of the cars that had trips to the branch.
+        # Nothing is done per schedule, and the version bumps wait for the
+        # commit.
+        with self.assertNumQueries(17):
+            self.branch.delete()
+
+        self.assertConsistent()
+
+    def test_car_delete(self, mock_now):
+        with self.assertNumQueries(5):
+            self.car.delete()
+
+        self.assertConsistent()
@@ -0,0 +1,136 @@
+import csv
+from datetime import datetime, timedelta
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from rest_framework.test import APIClient
+from unittest.mock import patch
+
+from . import DEFAULT_NOW, reset_inventory
+from .. import locations, occupancy
+from ..management.commands.generate_fleet import generate
+from ..models import Car, Schedule, Branch
+from ..utils import get_inventory_at_date
+
+
+@patch("car_api.utils.now", return_value=DEFAULT_NOW)
+class OccupancyTests(TestCase):
+    def setUp(self):
+        reset_inventory()
+        branches, cars, schedules = generate(
+            branches=4,
+            cars=12,
+            schedules=240,
+            density=0.6,
+            one_way=0.4,
+            seed=3,
+            start=datetime(2025, 1, 1),
+        )
+        for model, objs in [(Branch, branches), (Car, cars), (Schedule, schedules)]:
+            model.objects.bulk_create(objs)
+        locations.rebuild()
+        self.branch_ids = [b.pk for b in branches]
+        self.client = APIClient()
+
+    def test_matches_inventory(self, _):
+        start_time = datetime(2025, 1, 20)
+        step = timedelta(hours=7, minutes=15)
+
+        branch_ids, counts = occupancy.counts(
+            start_time, datetime(2025, 3, 1), step, DEFAULT_NOW
+        )
+
+        self.assertEqual(self.branch_ids, branch_ids)
+        self.assertEqual(133, len(counts[0]))
+        for branch_id, row in zip(branch_ids, counts):
+            for i, count in enumerate(row):
+                at_time = start_time + i * step
+                with self.subTest(branch=branch_id, at_time=at_time):
+                    self.assertEqual(
+                        len(get_inventory_at_date(branch_id, at_time)), count
+                    )
+
+    def test_constant_queries(self, _):
+        # The branches, the home cars and the segments.
+        with self.assertNumQueries(3):
+            occupancy.counts(
+                datetime(2023, 1, 1),
+                datetime(2026, 1, 1),
+                timedelta(hours=1),
+                DEFAULT_NOW,
+            )
+
+    def test_endpoint(self, _):
+        response = self.client.get(
+            "/api/branches/occupancy/?from=2025-02-01&to=2025-02-02"
+            f"&branch={self.branch_ids[1]}"
+        )
+
+        data = response.json()
+        self.assertEqual([self.branch_ids[1]], data["branches"])
+        self.assertEqual("01:00:00", data["step"])
+        self.assertEqual(
+            occupancy.counts(
+                datetime(2025, 2, 1),
+                datetime(2025, 2, 2),
+                timedelta(hours=1),
+                DEFAULT_NOW,
+                [self.branch_ids[1]],
+            )[1],
+            data["counts"],
+        )
+        self.assertEqual(24, len(data["counts"][0]))
+
+        response = self.client.get(
+            "/api/branches/occupancy/?from=2025-02-01&to=2025-02-02&step=06:00:00"
+        )
+
+        self.assertEqual(
+            [4] * len(self.branch_ids), [len(row) for row in response.json()["counts"]]
+        )
+
+    def test_bad_parameters(self, _):
+        for query, status_code in [
+            ("?to=2025-02-02", 400),
+            ("?from=2025-02-01&to=2025-02-02&step=00:00:00", 400),
+            ("?from=2025-02-02&to=2025-02-01", 400),
+            ("?from=2000-01-01&to=2025-01-01&step=00:01:00", 400),
+            ("?from=2025-02-01&to=2025-02-02&branch=99", 404),
+        ]:
+            with self.subTest(query=query):
+                response = self.client.get(f"/api/branches/occupancy/{query}")
+
+                self.assertEqual(status_code, response.status_code)
+
+    def test_command(self, _):
+        out, err = StringIO(), StringIO()
+
+        call_command(
+            "occupancy",
+            "--from=2025-02-01",
+            "--to=2025-02-02",
+            "--step=12:00:00",
+            stdout=out,
+            stderr=err,
+        )
+
+        rows = list(csv.reader(StringIO(out.getvalue())))
+        counts = occupancy.counts(
+            datetime(2025, 2, 1), datetime(2025, 2, 2), timedelta(hours=12), DEFAULT_NOW
+        )[1]
+        self.assertEqual(["time", *map(str, self.branch_ids)], rows[0])
+        self.assertEqual(
+            [
+                ["2025-02-01 00:00:00", *map(str, (row[0] for row in counts))],
+                ["2025-02-01 12:00:00", *map(str, (row[1] for row in counts))],
+            ],
+            rows[1:],
+        )
+        self.assertIn("4 branches x 2 buckets", err.getvalue())
+
+    def test_command_unknown_branch(self, _):
+        with self.assertRaises(CommandError):
+            call_command(
+                "occupancy", "--from=2025-02-01", "--to=2025-02-02", "--branch=99"
+            )
@@ -0,0 +1,86 @@
+import pstats
+import tempfile
+from pathlib import Path
+
+from django.contrib.auth.models import User
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from . import reset_inventory
+from ..models import Car, Branch
+
+
+class ProfilerTests(TestCase):
+    def setUp(self):
+        reset_inventory()
+        b1 = Branch.objects.create(name="Prague")
+        Car.objects.create(id="C1", make="test_make", model="test_model", branch=b1)
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.dir = Path(directory.name)
+        settings = override_settings(
+            PROFILER_OPEN=True,
+            PROFILER_DIR=self.dir,
+            PROFILER_SAMPLE_RATE=1.0,
+            PROFILER_MAX_FILES=50,
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def profiles(self):
+        return sorted(p.name for p in self.dir.glob("*.prof"))
+
+    def test_query_parameter(self):
+        response = self.client.get("/api/cars/?profile=1")
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual([response["X-Profile"]], self.profiles())
+        self.assertIn("-GET-api-cars-", response["X-Profile"])
+        stats = pstats.Stats(str(self.dir / response["X-Profile"]))
+        self.assertTrue(
+            any(func[2] == "get" and "car_views" in func[0] for func in stats.stats)
+        )
+
+    def test_header(self):
+        response = self.client.get("/api/cars/C1/", headers={"X-Profile": "1"})
+
+        self.assertEqual([response["X-Profile"]], self.profiles())
+
+    def test_not_requested(self):
+        response = self.client.get("/api/cars/")
+
+        self.assertFalse(response.has_header("X-Profile"))
+        self.assertEqual([], self.profiles())
+
+    def test_staff_only_unless_open(self):
+        with self.settings(PROFILER_OPEN=False):
+            self.client.get("/api/cars/?profile=1")
+            self.assertEqual([], self.profiles())
+
+            staff = User.objects.create_user("staff", is_staff=True)
+            self.client.force_login(staff)
+            self.client.get("/api/cars/?profile=1")
+            self.assertEqual(1, len(self.profiles()))
+
+    def test_sample_rate(self):
+        with self.settings(PROFILER_SAMPLE_RATE=0):
+            self.client.get("/api/cars/?profile=1")
+
+        self.assertEqual([], self.profiles())
+
+    def test_keeps_newest_profiles(self):
+        with self.settings(PROFILER_MAX_FILES=2):
+            names = [
+                self.client.get("/api/cars/?profile=1")["X-Profile"] for _ in range(3)
+            ]
+
+        self.assertEqual(names[1:], self.profiles())
+
+
+class AsyncProfilerTests(TransactionTestCase):
+    async def test_async_view(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with self.settings(PROFILER_OPEN=True, PROFILER_DIR=directory):
+                response = await self.async_client.get("/api/async/cars/?profile=1")
+
+            self.assertTrue((Path(directory) / response["X-Profile"]).exists())
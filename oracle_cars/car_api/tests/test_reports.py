@@ -0,0 +1,203 @@
+import csv
+from datetime import datetime
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from . import at, reset_inventory
+from .. import reports
+from ..management.commands.generate_fleet import generate
+from ..models import Car, Schedule, Branch
+
+
+class UtilizationTests(TestCase):
+    def setUp(self):
+        reset_inventory()
+        self.b1 = Branch.objects.create(name="Prague")
+        self.b2 = Branch.objects.create(name="Brno")
+        self.c1 = Car.objects.create(
+            id="C1", make="Honda", model="Civic", branch=self.b1
+        )
+        self.c2 = Car.objects.create(
+            id="C2", make="Honda", model="Jazz", branch=self.b1
+        )
+        self.c3 = Car.objects.create(
+            id="C3", make="Skoda", model="Fabia", branch=self.b2
+        )
+        # Starts a day before the window, so only 12 of its 36 hours count.
+        self.book(self.c1, "2025-01-31 00:00", "2025-02-01 12:00")
+        self.book(self.c1, "2025-02-02 08:00", "2025-02-02 20:00")
+        # Runs a day past the window.
+        self.book(self.c2, "2025-02-03 00:00", "2025-02-05 00:00")
+        # Outside the window, touching it.
+        self.book(self.c3, "2025-02-04 00:00", "2025-02-04 06:00")
+        self.client = APIClient()
+
+    def book(self, car, start, end):
+        Schedule.objects.create(
+            start_time=at(start),
+            end_time=at(end),
+            car_id=car,
+            origin_branch=car.branch,
+            destination_branch=car.branch,
+        )
+
+    def utilization(self, by="car", **kwargs):
+        return reports.utilization(
+            at("2025-02-01 00:00"), at("2025-02-04 00:00"), by, **kwargs
+        )
+
+    def test_by_car(self):
+        self.assertEqual(
+            [
+                {
+                    "car_id": "C1",
+                    "branch": self.b1.pk,
+                    "trips": 2,
+                    "booked_hours": 24.0,
+                    "available_hours": 72.0,
+                    "utilization": 0.3333,
+                    "average_trip_hours": 24.0,
+                },
+                {
+                    "car_id": "C2",
+                    "branch": self.b1.pk,
+                    "trips": 1,
+                    "booked_hours": 24.0,
+                    "available_hours": 72.0,
+                    "utilization": 0.3333,
+                    "average_trip_hours": 48.0,
+                },
+                {
+                    "car_id": "C3",
+                    "branch": self.b2.pk,
+                    "trips": 0,
+                    "booked_hours": 0.0,
+                    "available_hours": 72.0,
+                    "utilization": 0.0,
+                    "average_trip_hours": None,
+                },
+            ],
+            self.utilization(),
+        )
+
+    def test_by_branch(self):
+        self.assertEqual(
+            [
+                {
+                    "branch": self.b1.pk,
+                    "cars": 2,
+                    "trips": 3,
+                    "booked_hours": 48.0,
+                    "available_hours": 144.0,
+                    "utilization": 0.3333,
+                    "average_trip_hours": 32.0,
+                },
+                {
+                    "branch": self.b2.pk,
+                    "cars": 1,
+                    "trips": 0,
+                    "booked_hours": 0.0,
+                    "available_hours": 72.0,
+                    "utilization": 0.0,
+                    "average_trip_hours": None,
+                },
+            ],
+            self.utilization("branch"),
+        )
+
+    def test_chunks_match_database(self):
+        start_time, end_time = at("2025-02-01 00:00"), at("2025-02-04 00:00")
+
+        self.assertEqual(
+            reports._totals_in_db(start_time, end_time),
+            reports._totals_in_chunks(start_time, end_time, chunk_size=1),
+        )
+
+    def test_constant_queries(self):
+        # The per car sums and the cars.
+        with self.assertNumQueries(2):
+            self.utilization("branch")
+
+    def test_endpoint(self):
+        response = self.client.get(
+            "/api/reports/utilization/?from=2025-02-01&to=2025-02-04&by=branch"
+        )
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(self.utilization("branch"), response.json())
+
+    def test_csv_download(self):
+        response = self.client.get(
+            "/api/reports/utilization/?from=2025-02-01&to=2025-02-04&output=csv"
+        )
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual("text/csv", response["Content-Type"])
+        self.assertIn(
+            'filename="utilization-by-car.csv"', response["Content-Disposition"]
+        )
+        rows = list(csv.DictReader(StringIO(response.content.decode())))
+        self.assertEqual(["C1", "C2", "C3"], [row["car_id"] for row in rows])
+        self.assertEqual(reports.CAR_FIELDS, list(rows[0]))
+        self.assertEqual("", rows[2]["average_trip_hours"])
+
+    def test_bad_parameters(self):
+        for query in [
+            "?to=2025-02-04",
+            "?from=2025-02-04&to=2025-02-01",
+            "?from=2025-02-01&to=2025-02-01",
+            "?from=2025-02-01&to=2025-02-04&by=model",
+            "?from=2025-02-01&to=2025-02-04&output=xml",
+        ]:
+            with self.subTest(query=query):
+                response = self.client.get(f"/api/reports/utilization/{query}")
+
+                self.assertEqual(400, response.status_code)
+                self.assertIn("error", response.json())
+
+    def test_command(self):
+        out, err = StringIO(), StringIO()
+
+        call_command(
+            "utilization_report",
+            "--from=2025-02-01",
+            "--to=2025-02-04",
+            "--by=branch",
+            stdout=out,
+            stderr=err,
+        )
+
+        rows = list(csv.DictReader(StringIO(out.getvalue())))
+        self.assertEqual(
+            [str(self.b1.pk), str(self.b2.pk)], [row["branch"] for row in rows]
+        )
+        self.assertEqual("48.0", rows[0]["booked_hours"])
+        self.assertIn("2 rows in", err.getvalue())
+
+    def test_command_empty_window(self):
+        with self.assertRaises(CommandError):
+            call_command("utilization_report", "--from=2025-02-01", "--to=2025-02-01")
+
+
+class GeneratedUtilizationTests(TestCase):
+    def test_chunks_match_database(self):
+        branches, cars, schedules = generate(
+            branches=4,
+            cars=20,
+            schedules=400,
+            density=0.6,
+            one_way=0.3,
+            seed=5,
+            start=datetime(2025, 1, 1),
+        )
+        for model, objs in [(Branch, branches), (Car, cars), (Schedule, schedules)]:
+            model.objects.bulk_create(objs)
+        start_time, end_time = datetime(2025, 1, 10, 6), datetime(2025, 2, 20, 18)
+
+        self.assertEqual(
+            reports._totals_in_db(start_time, end_time),
+            reports._totals_in_chunks(start_time, end_time, chunk_size=37),
+        )
@@ -0,0 +1,177 @@
+from datetime import datetime
+
+from django.db import connection
+from django.test import TestCase
+from django.utils.dateparse import parse_datetime
+from rest_framework.test import APIClient
+from unittest.mock import patch
+
+from . import reset_inventory
+from ..management.commands.generate_fleet import generate
+from ..models import Car, Schedule, Branch
+from ..utils import filter_schedules
+
+
+class ScheduleFilterTests(TestCase):
+    def setUp(self):
+        reset_inventory()
+        self.b1 = Branch.objects.create(name="Prague")
+        self.b2 = Branch.objects.create(name="Brno")
+        c1 = Car.objects.create(id="C1", make="Honda", model="Civic", branch=self.b1)
+        c2 = Car.objects.create(id="C2", make="Ford", model="Focus", branch=self.b1)
+        self.schedules = [
+            Schedule.objects.create(
+                start_time=parse_datetime(start),
+                end_time=parse_datetime(end),
+                car_id=car,
+                origin_branch=origin,
+                destination_branch=destination,
+            )
+            for start, end, car, origin, destination in [
+                ("2025-02-03 08:00", "2025-02-04 08:00", c1, self.b1, self.b2),
+                ("2025-02-01 08:00", "2025-02-01 20:00", c2, self.b1, self.b1),
+                ("2025-02-06 08:00", "2025-02-06 09:00", c1, self.b2, self.b2),
+                ("2025-02-02 08:00", "2025-02-05 08:00", c2, self.b1, self.b2),
+            ]
+        ]
+        self.client = APIClient()
+
+    def ids(self, query):
+        response = self.client.get(f"/api/schedules/{query}")
+        self.assertEqual(200, response.status_code)
+        return [s["id"] for s in response.json()]
+
+    def expected(self, *indexes):
+        return [self.schedules[i].pk for i in indexes]
+
+    def test_filters(self):
+        for query, expected in [
+            ("?car=C1", [0, 2]),
+            (f"?origin_branch={self.b2.pk}", [2]),
+            (f"?destination_branch={self.b2.pk}", [0, 2, 3]),
+            ("?from=2025-02-04 12:00", [2, 3]),
+            ("?to=2025-02-02 08:00", [1]),
+            ("?from=2025-02-01 20:00&to=2025-02-03 08:00", [3]),
+            (f"?car=C2&destination_branch={self.b2.pk}&from=2025-02-04", [3]),
+            ("?car=C3", []),
+        ]:
+            with self.subTest(query=query):
+                self.assertEqual(self.expected(*expected), self.ids(query))
+
+    def test_ordering(self):
+        self.assertEqual(self.expected(1, 3, 0, 2), self.ids("?ordering=start_time"))
+        self.assertEqual(self.expected(2, 3, 0, 1), self.ids("?ordering=-end_time"))
+        self.assertEqual(self.expected(2, 0), self.ids("?car=C1&ordering=-id"))
+
+    def test_paginated_ordering(self):
+        response = self.client.get("/api/schedules/?ordering=start_time&page_size=3")
+
+        self.assertEqual(
+            self.expected(1, 3, 0), [s["id"] for s in response.data["results"]]
+        )
+
+        response = self.client.get(response.data["next"])
+
+        self.assertEqual(self.expected(2), [s["id"] for s in response.data["results"]])
+
+    def test_streamed(self):
+        response = self.client.get("/api/schedules/?car=C2&stream=1")
+
+        self.assertEqual(
+            b"".join(response.streaming_content),
+            self.client.get("/api/schedules/?car=C2").content,
+        )
+
+    def test_streamed_in_order_across_chunks(self):
+        # Starts with schedule 2, so start_time has a tie for the ID to break.
+        Schedule.objects.create(
+            start_time=parse_datetime("2025-02-06 08:00"),
+            end_time=parse_datetime("2025-02-07 08:00"),
+            car_id_id="C2",
+            origin_branch=self.b2,
+            destination_branch=self.b2,
+        )
+        for query in ["", "?ordering=start_time", "?ordering=-start_time"]:
+            for chunk_size in [1, 2, 3]:
+                with self.subTest(query=query, chunk_size=chunk_size):
+                    with patch("car_api.streaming.STREAM_CHUNK_SIZE", chunk_size):
+                        response = self.client.get(
+                            f"/api/schedules/{query}{'&' if query else '?'}stream=1"
+                        )
+                        content = b"".join(response.streaming_content)
+
+                    self.assertEqual(
+                        self.client.get(f"/api/schedules/{query}").content, content
+                    )
+
+    def test_bad_filters(self):
+        for query in [
+            "?from=soon",
+            "?origin_branch=Prague",
+            "?ordering=car_id",
+            "?from=2025-03-01&to=2025-02-01",
+        ]:
+            with self.subTest(query=query):
+                response = self.client.get(f"/api/schedules/{query}")
+
+                self.assertEqual(400, response.status_code)
+                self.assertIn("error", response.json())
+
+
+class ScheduleFilterScaleTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        branches, cars, schedules = generate(
+            branches=10,
+            cars=200,
+            schedules=20000,
+            density=0.5,
+            one_way=0.2,
+            seed=0,
+            start=datetime(2025, 1, 1),
+        )
+        Branch.objects.bulk_create(branches)
+        Car.objects.bulk_create(cars)
+        Schedule.objects.bulk_create(schedules, batch_size=5000)
+
+    def setUp(self):
+        reset_inventory()
+        self.client = APIClient()
+
+    def queries(self):
+        window = "from=2025-06-01&to=2025-06-03"
+        return [
+            "car=C7",
+            f"car=C7&{window}",
+            f"origin_branch=3&{window}",
+            f"destination_branch=3&{window}&ordering=end_time",
+            f"{window}&ordering=start_time",
+        ]
+
+    def test_constant_queries(self):
+        for query in self.queries():
+            with self.subTest(query=query):
+                # The ETag version, then the list.
+                with self.assertNumQueries(2):
+                    self.client.get(f"/api/schedules/?{query}")
+
+                with self.assertNumQueries(2):
+                    self.client.get(f"/api/schedules/?{query}&page_size=50")
+
+    def test_filters_use_indexes(self):
+        if connection.vendor not in ("sqlite", "mysql"):
+            self.skipTest("EXPLAIN output is only checked on SQLite and MySQL.")
+        window = {
+            "start_time": datetime(2025, 6, 1),
+            "end_time": datetime(2025, 6, 3),
+        }
+        for filters, index_name in [
+            ({"car": "C7", **window}, "schedule_car_time_idx"),
+            ({"origin_branch": 3, **window}, "schedule_origin_start_idx"),
+            ({"destination_branch": 3, **window}, "schedule_destination_end_idx"),
+            (window, "schedule_start_idx"),
+        ]:
+            with self.subTest(filters=filters):
+                queryset = filter_schedules(Schedule.objects.all(), **filters)
+
+                self.assertIn(index_name, queryset.explain())
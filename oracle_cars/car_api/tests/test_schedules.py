@@ -1,12 +1,20 @@
+import logging
+import threading
+import time
 from datetime import datetime
 
+from django.db import connection
 from django.test import TestCase, TransactionTestCase
+from django.utils.dateparse import parse_datetime
 from django.core.exceptions import ValidationError
 from rest_framework.test import APIClient
 from unittest.mock import patch
 
-from . import DEFAULT_NOW
+from . import DEFAULT_NOW, reset_inventory
 from ..models import Car, Schedule, Branch
+from ..utils import get_overlapping_schedules
+
+logger = logging.getLogger(__name__)
 
 
 class ScheduleObjectTests(TestCase):
@@ -52,6 +60,7 @@ class ScheduleAPITests(TransactionTestCase):
     reset_sequences = True
 
     def setUp(self):
+        reset_inventory()
         self.b1 = Branch.objects.create(name="Prague")
         self.b2 = Branch.objects.create(name="Brno")
         self.b3 = Branch.objects.create(name="Ostrava")
@@ -118,7 +127,31 @@ class ScheduleGetTests(ScheduleAPITests):
 
         response = self.client.get("/api/schedules/", format="json")
 
-        self.assertListEqual(response.data, expected_data)
+        # The list leaves datetimes for the renderer, so check what's sent.
+        self.assertListEqual(response.json(), expected_data)
+
+    def test_get_schedules_paginated(self):
+        response = self.client.get("/api/schedules/?page_size=2", format="json")
+
+        self.assertListEqual([1, 2], [s["id"] for s in response.data["results"]])
+
+        response = self.client.get(response.data["next"], format="json")
+
+        self.assertListEqual([3], [s["id"] for s in response.data["results"]])
+        self.assertIsNone(response.data["next"])
+
+    def test_get_schedules_bad_cursor(self):
+        response = self.client.get("/api/schedules/?cursor=nonsense", format="json")
+
+        self.assertEqual(response.status_code, 404)
+
+    def test_get_schedules_streamed(self):
+        response = self.client.get("/api/schedules/?stream=true")
+        content = b"".join(response.streaming_content)
+
+        self.assertEqual(
+            content, self.client.get("/api/schedules/", format="json").content
+        )
 
     def test_get_specific_schedule(self):
         expected_data = {
@@ -239,3 +272,379 @@ class SchedulePostTests(ScheduleAPITests):
 
         self.assertEqual(response.status_code, 400)
         self.assertEqual(response.json(), expected_response)
+
+
+@patch("car_api.utils.now", return_value=DEFAULT_NOW)
+class ScheduleBatchPostTests(ScheduleAPITests):
+    def test_post_batch(self, mock_now):
+        data = [
+            {
+                "start_time": "2025-11-29 00:00:00",
+                "duration": "24:00:00",
+                "origin_branch": 1,
+                "destination_branch": 1,
+            },
+            # C1 went to the first booking and C2 is busy with s3.
+            {
+                "start_time": "2025-11-29 12:00:00",
+                "duration": "24:00:00",
+                "origin_branch": 1,
+                "destination_branch": 1,
+            },
+            {
+                "start_time": "2025-11-29 12:00:00",
+                "duration": "01:00:00",
+                "car_id": "C1",
+                "origin_branch": 1,
+                "destination_branch": 1,
+            },
+            {
+                "start_time": "2025-12-05 00:00:00",
+                "end_time": "2025-12-06 00:00:00",
+                "car_id": "C2",
+                "origin_branch": 2,
+                "destination_branch": 1,
+            },
+            {
+                "start_time": "Not a datetime",
+                "duration": "24:00:00",
+                "origin_branch": 1,
+                "destination_branch": 1,
+            },
+            {
+                "start_time": "2025-12-05 00:00:00",
+                "duration": "24:00:00",
+                "origin_branch": 1,
+                "destination_branch": 99,
+            },
+        ]
+        expected_data = [
+            {
+                "id": 4,
+                "start_time": "2025-11-29T00:00:00",
+                "end_time": "2025-11-30T00:00:00",
+                "car_id": "C1",
+                "origin_branch": 1,
+                "destination_branch": 1,
+            },
+            {"error": "No cars available for this time frame."},
+            {"error": "Requested car is not available for this time frame."},
+            {
+                "id": 5,
+                "start_time": "2025-12-05T00:00:00",
+                "end_time": "2025-12-06T00:00:00",
+                "car_id": "C2",
+                "origin_branch": 2,
+                "destination_branch": 1,
+            },
+            {"error": "timeframe could not be parsed properly."},
+            {"error": "Branch does not exist."},
+        ]
+
+        response = self.client.post("/api/schedules/batch/", data=data, format="json")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertListEqual(response.json(), expected_data)
+        self.assertEqual(Schedule.objects.count(), 5)
+
+    def test_post_batch_does_not_reuse_moved_cars(self, mock_now):
+        data = [
+            {
+                "start_time": "2025-03-01 00:00:00",
+                "duration": "24:00:00",
+                "origin_branch": 1,
+                "destination_branch": 2,
+            },
+            {
+                "start_time": "2025-03-05 00:00:00",
+                "duration": "24:00:00",
+                "origin_branch": 1,
+                "destination_branch": 1,
+            },
+            {
+                "start_time": "2025-03-10 00:00:00",
+                "duration": "24:00:00",
+                "origin_branch": 1,
+                "destination_branch": 1,
+            },
+        ]
+
+        response = self.client.post("/api/schedules/batch/", data=data, format="json")
+
+        self.assertListEqual(["C1", "C2", "C2"], [r["car_id"] for r in response.json()])
+
+    def test_post_batch_constant_queries(self, mock_now):
+        data = [
+            {
+                "start_time": f"2025-03-{day:02} 00:00:00",
+                "duration": "01:00:00",
+                "origin_branch": 1,
+                "destination_branch": 1,
+            }
+            for day in range(1, 29)
+        ]
+        self.client.post("/api/availability/", data=data[:1], format="json")
+
+        # Branches, candidate cars, transfer times' version and bookings, the
+        # candidates' neighbouring bookings for ranking them, then locking the
+        # cars, re-checking them the same way, the insert and updating the
+        # booked cars' locations inside a transaction, and bumping the
+        # schedule version in one of its own after that.
+        with self.assertNumQueries(20):
+            response = self.client.post(
+                "/api/schedules/batch/", data=data, format="json"
+            )
+
+        self.assertEqual(len([r for r in response.json() if "id" in r]), 28)
+
+    def test_post_batch_reports_non_objects_per_booking(self, mock_now):
+        data = [
+            "C1",
+            None,
+            {
+                "start_time": "2025-11-29 00:00:00",
+                "duration": "24:00:00",
+                "origin_branch": 1,
+                "destination_branch": 1,
+            },
+        ]
+
+        response = self.client.post("/api/schedules/batch/", data=data, format="json")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertListEqual(
+            [{"error": "timeframe could not be parsed properly."}] * 2,
+            response.json()[:2],
+        )
+        self.assertEqual("C1", response.json()[2]["car_id"])
+        self.assertEqual(Schedule.objects.count(), 4)
+
+    def test_post_batch_requires_list(self, mock_now):
+        response = self.client.post("/api/schedules/batch/", data={}, format="json")
+
+        self.assertEqual(response.status_code, 400)
+
+    @patch("car_api.views.schedule_views.MAX_BATCH_SIZE", 3)
+    def test_post_batch_limits_list_length(self, mock_now):
+        data = [
+            {
+                "start_time": f"2025-03-0{day} 00:00:00",
+                "duration": "01:00:00",
+                "origin_branch": 1,
+                "destination_branch": 1,
+            }
+            for day in range(1, 5)
+        ]
+
+        with self.assertNumQueries(0):
+            response = self.client.post(
+                "/api/schedules/batch/", data=data, format="json"
+            )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("error", response.json())
+        self.assertEqual(Schedule.objects.count(), 3)
+
+
+@patch("car_api.utils.now", return_value=DEFAULT_NOW)
+class AvailabilityPostTests(ScheduleAPITests):
+    def test_post_many_timeframes(self, mock_now):
+        data = [
+            {"origin_branch": 1, "start_time": "2025-02-02", "duration": "24:00:00"},
+            {
+                "origin_branch": 1,
+                "start_time": "2025-01-05 00:00:00",
+                "end_time": "2025-01-05 05:00:00",
+            },
+            {"origin_branch": 2, "start_time": "2025-12-02", "duration": "01:00:00"},
+            {"origin_branch": 3, "start_time": "2025-12-02", "duration": "01:00:00"},
+        ]
+        expected_data = [
+            {
+                "origin_branch": 1,
+                "start_time": "2025-02-02T00:00:00",
+                "end_time": "2025-02-03T00:00:00",
+                "car_ids": ["C2"],
+            },
+            {
+                "origin_branch": 1,
+                "start_time": "2025-01-05T00:00:00",
+                "end_time": "2025-01-05T05:00:00",
+                "car_ids": ["C1", "C2"],
+            },
+            {
+                "origin_branch": 2,
+                "start_time": "2025-12-02T00:00:00",
+                "end_time": "2025-12-02T01:00:00",
+                "car_ids": ["C2"],
+            },
+            {
+                "origin_branch": 3,
+                "start_time": "2025-12-02T00:00:00",
+                "end_time": "2025-12-02T01:00:00",
+                "car_ids": [],
+            },
+        ]
+
+        response = self.client.post("/api/availability/", data=data, format="json")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertListEqual(response.json(), expected_data)
+
+    def test_post_shares_queries(self, mock_now):
+        data = [
+            {"origin_branch": 1, "start_time": f"2025-02-{day:02}", "duration": "1:00"}
+            for day in range(1, 29)
+        ]
+        self.client.post("/api/availability/", data=data[:1], format="json")
+
+        # One query for the branches, two for the cars at each of them, one
+        # for the transfer times' version and one for the bookings of every
+        # timeframe.
+        with self.assertNumQueries(5):
+            response = self.client.post("/api/availability/", data=data, format="json")
+
+        self.assertEqual(len(response.json()), 28)
+
+    def test_post_reports_errors_per_timeframe(self, mock_now):
+        data = [
+            {"origin_branch": 99, "start_time": "2025-02-02", "duration": "1:00:00"},
+            {"origin_branch": 1, "start_time": "Not a datetime", "duration": "1:00"},
+        ]
+        expected_data = [
+            {"error": "Branch does not exist."},
+            {"error": "timeframe could not be parsed properly."},
+        ]
+
+        response = self.client.post("/api/availability/", data=data, format="json")
+
+        self.assertListEqual(response.json(), expected_data)
+
+    def test_post_reports_non_objects_per_timeframe(self, mock_now):
+        data = [
+            "2025-02-02",
+            None,
+            [1],
+            {"origin_branch": 1, "start_time": "2025-02-02", "duration": "1:00:00"},
+        ]
+
+        response = self.client.post("/api/availability/", data=data, format="json")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertListEqual(
+            [{"error": "timeframe could not be parsed properly."}] * 3,
+            response.json()[:3],
+        )
+        self.assertListEqual(["C2"], response.json()[3]["car_ids"])
+
+    def test_post_requires_list(self, mock_now):
+        response = self.client.post(
+            "/api/availability/", data={"origin_branch": 1}, format="json"
+        )
+
+        self.assertEqual(response.status_code, 400)
+
+    @patch("car_api.views.schedule_views.MAX_BATCH_SIZE", 3)
+    def test_post_limits_list_length(self, mock_now):
+        data = [
+            {"origin_branch": 1, "start_time": "2025-02-02", "duration": "1:00:00"}
+        ] * 4
+
+        with self.assertNumQueries(0):
+            response = self.client.post("/api/availability/", data=data, format="json")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("error", response.json())
+
+
+@patch("car_api.utils.now", return_value=DEFAULT_NOW)
+class ConcurrentBookingTests(TransactionTestCase):
+    reset_sequences = True
+
+    def setUp(self):
+        reset_inventory()
+        self.branch = Branch.objects.create(name="Prague")
+        for i in range(5):
+            Car.objects.create(
+                id=f"C{i}", make="Honda", model="Accord", branch=self.branch
+            )
+
+    def book(self, start_time, results):
+        client = APIClient()
+        try:
+            response = client.post(
+                "/api/schedules/",
+                data={
+                    "start_time": start_time,
+                    "duration": "12:00:00",
+                    "origin_branch": self.branch.id,
+                    "destination_branch": self.branch.id,
+                },
+                format="json",
+            )
+            results.append(response.status_code)
+        finally:
+            connection.close()
+
+    def test_parallel_bookings_never_overlap(self, mock_now):
+        # Three overlapping windows competing for five cars.
+        starts = ["2025-03-01 00:00", "2025-03-01 06:00", "2025-03-01 11:00"]
+        results = []
+        threads = [
+            threading.Thread(target=self.book, args=(starts[i % 3], results))
+            for i in range(30)
+        ]
+
+        began = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - began
+
+        schedules = list(Schedule.objects.order_by("car_id", "start_time"))
+        for first, second in zip(schedules, schedules[1:]):
+            if first.car_id_id == second.car_id_id:
+                self.assertLess(first.end_time, second.start_time)
+        self.assertEqual(results.count(200), len(schedules))
+        self.assertEqual(results.count(200) + results.count(400), 30)
+        logger.info("%.1f bookings per second", len(results) / elapsed)
+
+
+class ScheduleIndexTests(TestCase):
+    def setUp(self):
+        self.branch = Branch.objects.create(name="Prague")
+        self.car = Car.objects.create(
+            id="C1", make="Honda", model="Accord", branch=self.branch
+        )
+
+    def assertUsesIndex(self, queryset, index_name):
+        if connection.vendor not in ("sqlite", "mysql"):
+            self.skipTest("EXPLAIN output is only checked on SQLite and MySQL.")
+        self.assertIn(index_name, queryset.explain())
+
+    def test_overlap_query_uses_car_time_index(self):
+        queryset = get_overlapping_schedules(
+            (
+                parse_datetime("2025-02-01 00:00:00"),
+                parse_datetime("2025-02-02 00:00:00"),
+            )
+        ).filter(car_id__in=["C1", "C2"])
+
+        self.assertUsesIndex(queryset, "schedule_car_time_idx")
+
+    def test_departure_query_uses_origin_index(self):
+        queryset = Schedule.objects.filter(
+            origin_branch=self.branch,
+            start_time__lt=parse_datetime("2025-02-01 00:00:00"),
+        )
+
+        self.assertUsesIndex(queryset, "schedule_origin_start_idx")
+
+    def test_arrival_query_uses_destination_index(self):
+        queryset = Schedule.objects.filter(
+            destination_branch=self.branch,
+            end_time__lt=parse_datetime("2025-02-01 00:00:00"),
+        )
+
+        self.assertUsesIndex(queryset, "schedule_destination_end_idx")
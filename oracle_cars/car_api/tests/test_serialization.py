@@ -0,0 +1,75 @@
+from django.test import TestCase
+from rest_framework.renderers import JSONRenderer
+from unittest.mock import patch
+
+from ..models import Car, Schedule, Branch
+from ..renderers import FastJSONRenderer
+from ..serializers import (
+    CarSerializer,
+    ScheduleSerializer,
+    BranchSerializer,
+    serialize_values,
+)
+
+
+class FastSerializationTests(TestCase):
+    def setUp(self):
+        b1 = Branch.objects.create(name='Praha "hlavní"\n')
+        b2 = Branch.objects.create(name="Line\u2028separated\u2029 \x07")
+        c1 = Car.objects.create(id="C1", make="Škoda", model="Octavia", branch=b1)
+        c2 = Car.objects.create(id="C2", make="日本", model="\\/", branch=b2)
+        Schedule.objects.create(
+            start_time="2025-02-01 00:00:00",
+            end_time="2025-02-05 12:30:00.123456",
+            car_id=c1,
+            origin_branch=b1,
+            destination_branch=b2,
+        )
+        Schedule.objects.create(
+            start_time="2025-03-01 08:00:00.5",
+            end_time="2025-03-01 09:00:00",
+            car_id=c2,
+            origin_branch=b2,
+            destination_branch=b2,
+        )
+
+    def assertSameBytes(self, queryset, serializer_class):
+        expected = JSONRenderer().render(serializer_class(queryset, many=True).data)
+
+        fast = FastJSONRenderer().render(serialize_values(queryset, serializer_class))
+
+        self.assertEqual(expected, fast)
+
+    def test_matches_model_serializers(self):
+        for model, serializer_class in [
+            (Car, CarSerializer),
+            (Schedule, ScheduleSerializer),
+            (Branch, BranchSerializer),
+        ]:
+            with self.subTest(model=model.__name__):
+                self.assertSameBytes(model.objects.order_by("pk"), serializer_class)
+
+    def test_matches_without_orjson(self):
+        with patch("car_api.renderers.orjson", None):
+            self.assertSameBytes(Schedule.objects.order_by("pk"), ScheduleSerializer)
+
+    def test_indent_falls_back(self):
+        data = serialize_values(Branch.objects.order_by("pk"), BranchSerializer)
+
+        rendered = FastJSONRenderer().render(data, "application/json; indent=2")
+
+        self.assertEqual(
+            JSONRenderer().render(data, "application/json; indent=2"), rendered
+        )
+
+    def test_integer_keys_stay_on_the_fast_path(self):
+        data = {"branches": {1: ["C1"], 20: []}, "in_transit": ["C2"]}
+
+        with patch.object(
+            JSONRenderer, "render", side_effect=AssertionError("fell back")
+        ):
+            rendered = FastJSONRenderer().render(data)
+
+        self.assertEqual(
+            b'{"branches":{"1":["C1"],"20":[]},"in_transit":["C2"]}', rendered
+        )
@@ -0,0 +1,101 @@
+import json
+import re
+from time import sleep
+
+from django.test import TestCase, TransactionTestCase
+
+from . import reset_inventory
+from .. import timing
+from ..models import Car, Branch
+
+
+def parse_server_timing(header):
+    metrics = {}
+    for metric in header.split(", "):
+        name, *params = metric.split(";")
+        metrics[name] = dict(param.split("=", 1) for param in params)
+    return metrics
+
+
+class ServerTimingTests(TestCase):
+    def setUp(self):
+        reset_inventory()
+        self.b1 = Branch.objects.create(name="Prague")
+        Car.objects.create(
+            id="C1", make="test_make", model="test_model", branch=self.b1
+        )
+        Car.objects.create(
+            id="C2", make="test_make", model="test_model", branch=self.b1
+        )
+
+    def test_header(self):
+        response = self.client.get("/api/cars/")
+
+        metrics = parse_server_timing(response["Server-Timing"])
+        self.assertEqual(["db", "serialize", "render", "view", "total"], list(metrics))
+        # The ETag version and the list.
+        self.assertEqual('"2 queries"', metrics["db"]["desc"])
+        for name, params in metrics.items():
+            self.assertRegex(params["dur"], r"^\d+\.\d\d$", name)
+        parts = sum(float(metrics[name]["dur"]) for name in list(metrics)[:-1])
+        self.assertAlmostEqual(float(metrics["total"]["dur"]), parts, delta=0.05)
+
+    def test_counts_queries_with_debug_off(self):
+        # The version bump waits for a commit, which never comes in a test.
+        with self.settings(DEBUG=False), self.assertNumQueries(3):
+            response = self.client.post(
+                "/api/cars/",
+                {
+                    "id": "C3",
+                    "make": "test_make",
+                    "model": "test_model",
+                    "branch": self.b1.pk,
+                },
+                content_type="application/json",
+            )
+
+        metrics = parse_server_timing(response["Server-Timing"])
+        self.assertEqual('"3 queries"', metrics["db"]["desc"])
+
+    def test_log_line(self):
+        with self.assertLogs("car_api.timing", "INFO") as logs:
+            self.client.get("/api/cars/C1/")
+
+        line = json.loads(logs.records[0].getMessage())
+        self.assertEqual("GET", line["method"])
+        self.assertEqual("/api/cars/C1/", line["path"])
+        self.assertEqual(200, line["status"])
+        self.assertEqual(2, line["queries"])
+        self.assertEqual(
+            {"db_ms", "serialize_ms", "render_ms", "view_ms", "total_ms"},
+            {key for key in line if key.endswith("_ms")},
+        )
+
+    def test_spans_do_not_overlap(self):
+        timings = timing.Timings()
+        with timings.span("outer"):
+            sleep(0.01)
+            with timings.span("inner"):
+                sleep(0.02)
+        timings.total = 0.05
+
+        self.assertAlmostEqual(0.01, timings.durations["outer"], delta=0.005)
+        self.assertAlmostEqual(0.02, timings.durations["inner"], delta=0.005)
+        self.assertAlmostEqual(0.02, timings.view, delta=0.005)
+
+    def test_nothing_recorded_outside_a_request(self):
+        with timing.span("serialize"):
+            Car.objects.count()
+
+        self.assertIsNone(timing.current.get())
+
+
+class AsyncServerTimingTests(TransactionTestCase):
+    def setUp(self):
+        b1 = Branch.objects.create(name="Prague")
+        Car.objects.create(id="C1", make="test_make", model="test_model", branch=b1)
+
+    async def test_async_view(self):
+        response = await self.async_client.get("/api/async/cars/")
+
+        self.assertRegex(response["Server-Timing"], re.escape('desc="1 query"'))
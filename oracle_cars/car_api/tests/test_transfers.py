@@ -0,0 +1,215 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils.dateparse import parse_datetime
+from rest_framework.test import APIClient
+from unittest.mock import patch
+
+from . import DEFAULT_NOW, reset_inventory
+from .. import etags, transfers
+from ..models import Car, Schedule, Branch, TransferTime
+from ..utils import get_free_car_ids, get_free_car_ids_bulk, is_car_free
+
+
+@patch("car_api.utils.now", return_value=DEFAULT_NOW)
+class TransferTimeTests(TestCase):
+    def setUp(self):
+        reset_inventory()
+        self.b1 = Branch.objects.create(name="Prague")
+        self.b2 = Branch.objects.create(name="Brno")
+        self.c1 = Car.objects.create(
+            id="C1", make="Honda", model="Civic", branch=self.b1
+        )
+        self.c2 = Car.objects.create(
+            id="C2", make="Honda", model="Civic", branch=self.b1
+        )
+        # C1 has to be back at Prague on the 3rd for its next booking.
+        Schedule.objects.create(
+            start_time=parse_datetime("2025-02-03 12:00"),
+            end_time=parse_datetime("2025-02-03 18:00"),
+            car_id=self.c1,
+            origin_branch=self.b1,
+            destination_branch=self.b1,
+        )
+        self.client = APIClient()
+
+    def free(self, end, destination=None):
+        return get_free_car_ids(
+            self.b1,
+            parse_datetime("2025-02-02 08:00"),
+            parse_datetime(end),
+            destination,
+        )
+
+    def test_between(self, _):
+        TransferTime.objects.create(
+            origin=self.b2, destination=self.b1, duration=timedelta(hours=3)
+        )
+
+        self.assertEqual(timedelta(hours=3), transfers.between(self.b2.pk, self.b1.pk))
+        self.assertEqual(timedelta(0), transfers.between(self.b1.pk, self.b2.pk))
+        self.assertEqual(timedelta(0), transfers.between(self.b1.pk, self.b1.pk))
+        self.assertEqual(timedelta(hours=3), transfers.longest())
+
+    def test_without_transfer_times(self, _):
+        self.assertEqual(["C1", "C2"], self.free("2025-02-03 10:00", self.b2))
+
+    def test_next_booking_out_of_reach(self, _):
+        TransferTime.objects.create(
+            origin=self.b2, destination=self.b1, duration=timedelta(hours=3)
+        )
+
+        # Dropped at Brno at 10:00, three hours from Prague: C1 would be late.
+        self.assertEqual(["C2"], self.free("2025-02-03 10:00", self.b2))
+        self.assertEqual(["C1", "C2"], self.free("2025-02-03 08:00", self.b2))
+        # Round trips and trips ending where the next booking leaves are fine.
+        self.assertEqual(["C1", "C2"], self.free("2025-02-03 10:00"))
+        self.assertEqual(["C1", "C2"], self.free("2025-02-03 10:00", self.b1))
+
+    def test_transfer_time_changes_drop_cached_answers(self, _):
+        self.assertEqual(["C1", "C2"], self.free("2025-02-03 10:00", self.b2))
+
+        transfer = TransferTime.objects.create(
+            origin=self.b2, destination=self.b1, duration=timedelta(hours=3)
+        )
+        self.assertEqual(["C2"], self.free("2025-02-03 10:00", self.b2))
+
+        transfer.duration = timedelta(hours=1)
+        transfer.save()
+        self.assertEqual(["C1", "C2"], self.free("2025-02-03 10:00", self.b2))
+
+    def test_matrix_kept_in_memory(self, _):
+        TransferTime.objects.create(
+            origin=self.b2, destination=self.b1, duration=timedelta(hours=3)
+        )
+        transfers.matrix()
+
+        # Only the version is checked.
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                timedelta(hours=3), transfers.between(self.b2.pk, self.b1.pk)
+            )
+
+    def test_bulk_single_booking_query(self, _):
+        TransferTime.objects.create(
+            origin=self.b2, destination=self.b1, duration=timedelta(hours=3)
+        )
+        transfers.matrix()
+        windows = [
+            (
+                self.b1.pk,
+                parse_datetime(f"2025-02-02 {hour:02}:00"),
+                parse_datetime(f"2025-02-03 {hour:02}:00"),
+                self.b2.pk,
+            )
+            for hour in range(0, 24, 2)
+        ]
+
+        # Home cars and segments, the transfer times' version, then the
+        # bookings and next bookings.
+        with self.assertNumQueries(4):
+            free = get_free_car_ids_bulk(windows)
+
+        self.assertEqual([["C1", "C2"]] * 5 + [["C2"]] * 7, free)
+
+    def test_version_checked_once_per_lookup(self, _):
+        TransferTime.objects.create(
+            origin=self.b2, destination=self.b1, duration=timedelta(hours=3)
+        )
+        windows = [
+            (self.b1.pk, parse_datetime("2025-02-02 08:00"), end, self.b2.pk)
+            for end in [
+                parse_datetime("2025-02-03 08:00"),
+                parse_datetime("2025-02-03 10:00"),
+            ]
+        ]
+
+        with patch.object(etags, "versions", wraps=etags.versions) as versions:
+            self.assertEqual([["C1", "C2"], ["C2"]], get_free_car_ids_bulk(windows))
+
+        self.assertEqual(1, versions.call_count)
+
+    def test_recheck_under_lock_uses_transfer_times(self, _):
+        TransferTime.objects.create(
+            origin=self.b2, destination=self.b1, duration=timedelta(hours=3)
+        )
+        start = parse_datetime("2025-02-02 08:00")
+        end = parse_datetime("2025-02-03 10:00")
+
+        self.assertFalse(is_car_free("C1", self.b1.pk, start, end, self.b2.pk))
+        self.assertTrue(is_car_free("C1", self.b1.pk, start, end))
+        self.assertTrue(is_car_free("C2", self.b1.pk, start, end, self.b2.pk))
+
+        # An answer from before the transfer time was known still offers C1.
+        with patch(
+            "car_api.views.schedule_views.get_free_car_ids",
+            return_value=["C1", "C2"],
+        ):
+            response = self.client.post(
+                "/api/schedules/",
+                data={
+                    "start_time": "2025-02-02 08:00:00",
+                    "end_time": "2025-02-03 10:00:00",
+                    "origin_branch": self.b1.pk,
+                    "destination_branch": self.b2.pk,
+                    "car_id": "C1",
+                },
+                format="json",
+            )
+
+        self.assertEqual(400, response.status_code)
+        self.assertFalse(Schedule.objects.filter(end_time=end).exists())
+
+    def test_post_skips_car_that_cant_make_it(self, _):
+        TransferTime.objects.create(
+            origin=self.b2, destination=self.b1, duration=timedelta(hours=3)
+        )
+
+        response = self.client.post(
+            "/api/schedules/",
+            data={
+                "start_time": "2025-02-02 08:00:00",
+                "end_time": "2025-02-03 10:00:00",
+                "origin_branch": self.b1.pk,
+                "destination_branch": self.b2.pk,
+            },
+            format="json",
+        )
+
+        self.assertEqual("C2", response.json()["car_id"])
+
+    def test_availability_destination(self, _):
+        TransferTime.objects.create(
+            origin=self.b2, destination=self.b1, duration=timedelta(hours=3)
+        )
+        booking = {
+            "start_time": "2025-02-02 08:00:00",
+            "end_time": "2025-02-03 10:00:00",
+            "origin_branch": self.b1.pk,
+        }
+
+        response = self.client.post(
+            "/api/availability/",
+            data=[booking, {**booking, "destination_branch": self.b2.pk}],
+            format="json",
+        )
+
+        self.assertEqual(
+            [["C1", "C2"], ["C2"]], [r["car_ids"] for r in response.json()]
+        )
+
+    def test_availability_unknown_destination(self, _):
+        response = self.client.post(
+            "/api/availability/",
+            data=[
+                {
+                    "start_time": "2025-02-02 08:00:00",
+                    "end_time": "2025-02-03 10:00:00",
+                    "origin_branch": self.b1.pk,
+                    "destination_branch": 999,
+                }
+            ],
+            format="json",
+        )
+
+        self.assertEqual([{"error": "Branch does not exist."}], response.json())
@@ -2,7 +2,7 @@ from django.test import TestCase
 from django.utils.dateparse import parse_datetime
 from unittest.mock import patch
 
-from . import DEFAULT_NOW
+from . import DEFAULT_NOW, reset_inventory
 from ..models import Car, Schedule, Branch
 from ..utils import get_inventory_at_date, get_free_car_ids
 
@@ -10,6 +10,7 @@ from ..utils import get_inventory_at_date, get_free_car_ids
 @patch("car_api.utils.now", return_value=DEFAULT_NOW)
 class LibTest(TestCase):
     def setUp(self):
+        reset_inventory()
         self.b1 = Branch.objects.create(name="Prague")
         self.b2 = Branch.objects.create(name="Brno")
 
@@ -0,0 +1,69 @@
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+
+# Where each request's time goes: SQL, serializers and renderers, the rest of
+# the view. ServerTimingMiddleware (middleware.py) starts a Timings for every
+# request and reports it; the code being measured only calls span(), which
+# does nothing outside a request. Queries are counted by an execute wrapper
+# on every connection, so this works with DEBUG off, and the context variable
+# follows the request into the threads the async views run their queries in.
+
+current = ContextVar("car_api_timings", default=None)
+
+
+class Timings:
+    def __init__(self):
+        self.durations = defaultdict(float)
+        self.queries = 0
+        self.total = 0.0
+        self._open = []
+
+    @contextmanager
+    def span(self, name):
+        """
+        Add the time spent in the block to durations[name], less the time of
+        any spans opened inside it, so the durations never overlap.
+        """
+        nested = [0.0]
+        self._open.append(nested)
+        started = perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = perf_counter() - started
+            self._open.pop()
+            self.durations[name] += elapsed - nested[0]
+            if self._open:
+                self._open[-1][0] += elapsed
+
+    @property
+    def view(self):
+        """The request's time not spent in any span."""
+        return max(0.0, self.total - sum(self.durations.values()))
+
+
+@contextmanager
+def span(name):
+    timings = current.get()
+    if timings is None:
+        yield
+        return
+    with timings.span(name):
+        yield
+
+
+def record_query(execute, sql, params, many, context):
+    timings = current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    timings.queries += 1
+    with timings.span("db"):
+        return execute(sql, params, many, context)
+
+
+def install(sender, connection, **kwargs):
+    """connection_created receiver adding record_query to new connections."""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, record_query)
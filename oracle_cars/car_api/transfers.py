@@ -0,0 +1,68 @@
+import threading
+from datetime import timedelta
+
+from . import etags
+from .models import TransferTime
+
+# The branch to branch transfer time matrix, read from the TransferTime table
+# once and kept in memory in each worker. Writes to the table bump its ETag
+# version (see signals.py). current() compares that version with the loaded
+# one and reloads the matrix if it moved, so callers checking many cars take
+# one TransferTimes from it and use that, rather than checking the version
+# for each car.
+
+_lock = threading.Lock()
+_loaded = (None, None)  # (version, TransferTimes)
+
+
+class TransferTimes:
+    """One loaded version of the transfer time matrix."""
+
+    def __init__(self, matrix):
+        self.matrix = matrix
+        # The longest transfer there is, nothing further ahead can be missed.
+        self.longest = max(matrix.values(), default=timedelta(0))
+
+    def between(self, origin, destination):
+        """How long moving a car from origin to destination takes."""
+        if origin == destination:
+            return timedelta(0)
+        return self.matrix.get((origin, destination), timedelta(0))
+
+
+def current():
+    """The transfer times as of now, reloaded if the table has changed."""
+    global _loaded
+    # Read before the table, so a write racing with the load can only make
+    # the version older than the matrix and get it reloaded next time.
+    (version,) = etags.versions(TransferTime)
+    loaded = _loaded
+    if loaded[0] != version:
+        with _lock:
+            loaded = _loaded = (
+                version,
+                TransferTimes(
+                    {
+                        (origin, destination): duration
+                        for origin, destination, duration in TransferTime.objects.values_list(
+                            "origin", "destination", "duration"
+                        )
+                    }
+                ),
+            )
+    return loaded[1]
+
+
+def matrix():
+    """Transfer durations by (origin, destination) branch ID."""
+    return current().matrix
+
+
+def between(origin, destination):
+    """How long moving a car from origin to destination takes."""
+    return current().between(origin, destination)
+
+
+def longest():
+    """The longest transfer there is, nothing further ahead can be missed."""
+    return current().longest
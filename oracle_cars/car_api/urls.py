@@ -8,17 +8,73 @@ urlpatterns = [
     path("", SpectacularSwaggerView.as_view(url_name="schema"), name="swagger-ui"),
     path("cars/", views.CarView.as_view(), name="cars"),
     path("cars/<str:pk>/", views.CarDetailView.as_view(), name="car-details"),
+    path(
+        "cars/<str:pk>/calendar",
+        views.CarCalendarView.as_view(),
+        name="car-calendar",
+    ),
     path("schedules/", views.ScheduleView.as_view(), name="schedules"),
+    path(
+        "schedules/batch/",
+        views.ScheduleBatchView.as_view(),
+        name="schedule-batch",
+    ),
+    path(
+        "schedules/export/",
+        views.ScheduleExportView.as_view(),
+        name="schedule-export",
+    ),
     path(
         "schedules/<str:pk>/",
         views.ScheduleDetailView.as_view(),
         name="schedule-details",
     ),
+    path("availability/", views.AvailabilityView.as_view(), name="availability"),
+    path(
+        "reports/utilization/",
+        views.UtilizationReportView.as_view(),
+        name="utilization-report",
+    ),
+    path("inventory", views.FleetInventoryView.as_view(), name="fleet-inventory"),
     path("branches/", views.BranchView.as_view(), name="branches"),
+    path(
+        "branches/occupancy/",
+        views.BranchOccupancyView.as_view(),
+        name="branch-occupancy",
+    ),
     path("branches/<str:pk>/", views.BranchDetailView.as_view(), name="branch-details"),
     path(
         "branches/<str:pk>/inventory",
         views.BranchInventoryView.as_view(),
         name="branch-details",
     ),
+    # Async variants of the read endpoints, see views/async_views.py.
+    path("async/cars/", views.async_views.car_list, name="async-cars"),
+    path(
+        "async/cars/<str:pk>/",
+        views.async_views.car_detail,
+        name="async-car-details",
+    ),
+    path("async/branches/", views.async_views.branch_list, name="async-branches"),
+    path(
+        "async/branches/<str:pk>/",
+        views.async_views.branch_detail,
+        name="async-branch-details",
+    ),
+    path(
+        "async/branches/<str:pk>/inventory",
+        views.async_views.branch_inventory,
+        name="async-branch-inventory",
+    ),
+    path("async/schedules/", views.async_views.schedule_list, name="async-schedules"),
+    path(
+        "async/schedules/<str:pk>/",
+        views.async_views.schedule_detail,
+        name="async-schedule-details",
+    ),
+    path(
+        "inventory-cache/",
+        views.InventoryCacheStatsView.as_view(),
+        name="inventory-cache",
+    ),
 ]
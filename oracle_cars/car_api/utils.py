@@ -1,90 +1,270 @@
+import threading
+from bisect import bisect_right
+from contextlib import ExitStack, contextmanager
 from functools import wraps
 
 from django.core.exceptions import ObjectDoesNotExist
+from django.db import transaction
 from rest_framework.response import Response
 from datetime import datetime
 from django.db.models import Q
 
-from .models import Car, Schedule
+from . import allocation, inventory_cache, locations, transfers
+from .models import Branch, Car, Schedule
 
 # Mix of utility functions and business logic. I'd split this into two files if
 # it got longer over time.
 
+# Most time frames checked against bookings with a single OR'd query.
+MAX_OVERLAP_TERMS = 100
+
+# Striped in-process locks for lock_cars, so we don't keep one lock per car.
+CAR_LOCKS = [threading.Lock() for _ in range(64)]
+
 
 def now():
     """Utility function for unittest mocking."""
     return datetime.now()
 
 
-def get_free_car_ids(origin, start_time, end_time):
+def get_overlapping_schedules(*timeframes):
+    """
+    Schedules that overlap any of the given (start_time, end_time) time
+    frames, touching endpoints included. Written as plain range predicates so
+    the schedule time indexes apply.
+    """
+    overlaps = Q()
+    for start_time, end_time in timeframes:
+        overlaps |= Q(start_time__lte=end_time, end_time__gte=start_time)
+    return Schedule.objects.filter(overlaps)
+
+
+def filter_schedules(
+    schedules,
+    car=None,
+    origin_branch=None,
+    destination_branch=None,
+    start_time=None,
+    end_time=None,
+):
+    """
+    Narrow schedules down to one car, origin or destination branch, and to
+    the ones running at some point between start_time and end_time. Each
+    filter is optional. All of them are equality or range predicates on
+    indexed columns, so the car, branch and time indexes apply.
+    """
+    filters = {}
+    if car:
+        filters["car_id"] = car
+    if origin_branch is not None:
+        filters["origin_branch"] = origin_branch
+    if destination_branch is not None:
+        filters["destination_branch"] = destination_branch
+    if start_time is not None:
+        filters["end_time__gt"] = start_time
+    if end_time is not None:
+        filters["start_time__lt"] = end_time
+    return schedules.filter(**filters)
+
+
+def get_free_car_ids(origin, start_time, end_time, destination=None):
     """
     Given a branch and a start and end time, return a list which cars are
     available for booking. Finds cars that would be at the start location
     given the start time, then exclude those that already have a booking
-    within the  time frame
+    within the  time frame, or that couldn't be moved from the destination
+    (the origin if not given) to where their next booking leaves from in
+    time. Answers are cached, see inventory_cache.
     """
-    available_at_start_loc = [c.id for c in get_inventory_at_date(origin, start_time)]
+    branch_id = Branch._meta.pk.to_python(getattr(origin, "pk", origin))
+    if destination is not None:
+        destination = Branch._meta.pk.to_python(getattr(destination, "pk", destination))
+    return inventory_cache.read_through(
+        "free_cars",
+        branch_id,
+        start_time,
+        (start_time, end_time, destination),
+        lambda: get_free_car_ids_bulk([(branch_id, start_time, end_time, destination)])[
+            0
+        ],
+        now(),
+    )
+
+
+def get_free_car_ids_bulk(windows, car_ids=None):
+    """
+    Given a list of (branch, start_time, end_time) windows, return the list of
+    free car IDs for each of them, in the same order. A window can have a
+    destination branch as a fourth item, without one (or with None) the car
+    comes back to the branch. The candidates come from the car location
+    segments, narrowed down to car_ids if given, and the bookings for every
+    window, along with the ones soon enough after it to be missed through the
+    transfer time, are fetched in a single query.
+    """
+    windows = [
+        (o, s, e, rest[0] if rest and rest[0] is not None else o)
+        for o, s, e, *rest in windows
+    ]
+    candidates = locations.car_ids_at_many([(o, s) for o, s, _, _ in windows], now())
+    if car_ids is not None:
+        candidates = [cars & set(car_ids) for cars in candidates]
+    candidate_ids = set().union(*candidates)
+    if not candidate_ids:
+        return [[] for _ in windows]
 
-    booked_cars = (
-        Schedule.objects.exclude(start_time__gt=end_time)
-        .exclude(end_time__lt=start_time)
-        .values("car_id")
+    # A booking starting further than the longest transfer after a window
+    # ends can always be made.
+    transfer_times = transfers.current()
+    timeframes = {(s, e + transfer_times.longest) for _, s, e, _ in windows}
+    if len(timeframes) > MAX_OVERLAP_TERMS:
+        # Long OR chains run into the SQLite expression depth limit, so fetch
+        # the bookings over the span of every window instead.
+        timeframes = {(min(s for s, _ in timeframes), max(e for _, e in timeframes))}
+    booked = (
+        get_overlapping_schedules(*timeframes)
+        .filter(car_id__in=candidate_ids)
+        .order_by("start_time")
+        .values_list("car_id", "start_time", "end_time", "origin_branch")
     )
 
-    free_cars = Car.objects.exclude(id__in=booked_cars).filter(
-        id__in=available_at_start_loc
+    # Per car: booking starts, the running max of their ends and where they
+    # leave from, so checking a window is a bisect rather than a scan over the
+    # car's bookings.
+    bookings = {}
+    for car, start, end, origin in booked:
+        starts, max_ends, origins = bookings.setdefault(car, ([], [], []))
+        starts.append(start)
+        max_ends.append(max(end, max_ends[-1]) if max_ends else end)
+        origins.append(origin)
+
+    def is_booked(car, start_time, end_time, destination):
+        if car not in bookings:
+            return False
+        starts, max_ends, origins = bookings[car]
+        i = bisect_right(starts, end_time)
+        if i > 0 and max_ends[i - 1] >= start_time:
+            return True
+        # The next booking has to be reachable from where this one ends.
+        return i < len(starts) and (
+            end_time + transfer_times.between(destination, origins[i]) >= starts[i]
+        )
+
+    return [
+        sorted(c for c in cars if not is_booked(c, start_time, end_time, destination))
+        for cars, (_, start_time, end_time, destination) in zip(candidates, windows)
+    ]
+
+
+def allocate_car_ids(bookings):
+    """
+    Given a list of (branch, start_time, end_time, destination, car_id)
+    bookings, pick a free car for each one, or None if there isn't one. A
+    requested car_id is only checked for availability, otherwise the free cars
+    are tried in the order the allocation policy ranks them. Cars handed out
+    earlier in the list aren't reused for overlapping bookings, and a car sent
+    on a one-way trip isn't reused at all since its location changes.
+    """
+    free_cars = get_free_car_ids_bulk([(o, s, e, d) for o, s, e, d, _ in bookings])
+    ranked = allocation.get_policy().rank(
+        [
+            (o, s, e, d, free)
+            for (o, s, e, d, requested), free in zip(bookings, free_cars)
+            if not requested
+        ]
+    )
+    ranked = iter(ranked)
+    taken = {}  # car -> [(start_time, end_time, one_way)]
+
+    def clashes(car, start_time, end_time, one_way):
+        return any(
+            one_way or moved or (start <= end_time and end >= start_time)
+            for start, end, moved in taken.get(car, ())
+        )
+
+    allocated = []
+    for (origin, start_time, end_time, destination, requested), free in zip(
+        bookings, free_cars
+    ):
+        one_way = origin != destination
+        available = set(free)
+        candidates = [requested] if requested else next(ranked)
+        car = next(
+            (
+                c
+                for c in candidates
+                if c in available and not clashes(c, start_time, end_time, one_way)
+            ),
+            None,
+        )
+        if car:
+            taken.setdefault(car, []).append((start_time, end_time, one_way))
+        allocated.append(car)
+    return allocated
+
+
+def is_car_free(car_id, origin, start_time, end_time, destination=None):
+    """
+    Check a single car is still free with the same checks as
+    get_free_car_ids_bulk, for re-checking an allocation while holding
+    lock_cars: it's at the origin branch, has no overlapping booking and can
+    make its next booking from the destination.
+    """
+    free = get_free_car_ids_bulk(
+        [(origin, start_time, end_time, destination)], car_ids={car_id}
     )
+    return car_id in free[0]
 
-    # Doesn't account for follow up schedules and transfer time between
-    # branches.
-    # for cars in free_cars:
-    # if car has no more schedules or closest schedule.orgin_branch = origin:
-    # return car
-    # all cars have schedules, none start here
-    # for car in free_cars:
-    # if end_time + transfer_duration > closest schedule
-    # remove car from free cars
-    return [c.id for c in free_cars]
+
+@contextmanager
+def lock_cars(car_ids):
+    """
+    Serialize bookings per car, for the check-then-insert of a booking. Holds
+    an in-process lock for each car, which covers the threads of this worker
+    and SQLite (it has no row locks), then locks the car rows with
+    select_for_update inside a transaction so other workers wait as well.
+    """
+    car_ids = sorted(set(car_ids))
+    stripes = sorted({hash(c) % len(CAR_LOCKS) for c in car_ids})
+    with ExitStack() as stack:
+        for stripe in stripes:
+            stack.enter_context(CAR_LOCKS[stripe])
+        with transaction.atomic():
+            list(
+                Car.objects.select_for_update()
+                .filter(pk__in=car_ids)
+                .order_by("pk")
+                .values_list("pk", flat=True)
+            )
+            yield
+
+
+def get_inventory_car_ids(branch, cutoff_time):
+    """
+    Given a branch and a cutoff time, return the IDs of the cars that would
+    be at the branch at that time. Answered from the car location segments
+    rather than replaying the schedules on each call.
+    """
+    branch_id = Branch._meta.pk.to_python(getattr(branch, "pk", branch))
+    cars = locations.cars_at(branch_id, cutoff_time, now())
+    return set(cars.values_list("pk", flat=True))
 
 
 def get_inventory_at_date(branch, cutoff_time):
     """
     Given a cutoff time, determine which cars would be assigned to
-    this branch based on all the relevant schedules. This algorithm is a bit
-    bruteforce-y, as it considers all schedules.
-    """
-    current_inventory = list(Car.objects.filter(branch=branch))
-    start_time = now()
-
-    # Get all the schedules relevant to us. Schedules may be in progress.
-    # SELECT * from Schedules WHERE end_time > now AND start_time < cutoff_time
-    #     AND (origin_branch = branch OR destination_branch = branch)
-    try:
-        schedules = Schedule.objects.filter(
-            Q(end_time__gt=start_time),
-            Q(start_time__lt=cutoff_time),
-            Q(origin_branch=branch) | Q(destination_branch=branch),
-        ).order_by("-end_time")
-    except ObjectDoesNotExist:
-        schedules = []
-
-    for s in list(schedules):
-        # ends at our branch. we don't care about the origin.
-        if (
-            s.destination_branch == branch
-            and s.car_id not in current_inventory
-            and s.end_time < cutoff_time
-        ):
-            current_inventory.append(s.car_id)
-        # if the start branch is ours, the car shooould be there.
-        elif (
-            s.origin_branch == branch
-            and s.destination_branch != branch
-            and s.car_id in current_inventory
-        ):
-            current_inventory.remove(s.car_id)
-
-    return list(current_inventory)
+    this branch based on all the relevant schedules. Cars based at the branch
+    come first, followed by the ones that were brought in by a schedule.
+    Answers are cached, see inventory_cache.
+    """
+    branch_id = Branch._meta.pk.to_python(getattr(branch, "pk", branch))
+
+    def load_cars():
+        cars = locations.cars_at(branch_id, cutoff_time, now()).order_by("id")
+        return sorted(cars, key=lambda c: c.branch_id != branch_id)
+
+    return inventory_cache.read_through(
+        "inventory", branch_id, cutoff_time, cutoff_time, load_cars, now()
+    )
 
 
 def DoesNotExist_to_404(fn):
@@ -1,3 +1,18 @@
-from .branch_views import BranchView, BranchDetailView, BranchInventoryView
-from .car_views import CarView, CarDetailView
-from .schedule_views import ScheduleView, ScheduleDetailView
+from .branch_views import (
+    BranchView,
+    BranchDetailView,
+    BranchInventoryView,
+    BranchOccupancyView,
+    FleetInventoryView,
+    InventoryCacheStatsView,
+)
+from .car_views import CarView, CarDetailView, CarCalendarView
+from .schedule_views import (
+    ScheduleView,
+    ScheduleDetailView,
+    ScheduleBatchView,
+    ScheduleExportView,
+    AvailabilityView,
+)
+from .report_views import UtilizationReportView
+from . import async_views
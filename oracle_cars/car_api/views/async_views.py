@@ -0,0 +1,136 @@
+import json
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ObjectDoesNotExist
+from django.http import HttpResponse, QueryDict
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_http_methods
+
+from ..forms import InventoryForm
+from ..models import Car, Branch, Schedule
+from ..renderers import FastJSONRenderer
+from ..serializers import CarSerializer, BranchSerializer, ScheduleSerializer
+from ..utils import get_inventory_at_date
+
+# Async counterparts of the hot read endpoints, for running under an ASGI
+# server (oracle_cars/asgi.py) so a slow query doesn't hold a worker thread
+# for the whole request. DRF's APIView is sync only, so these are plain
+# Django views on the async ORM. They use the same serializers and renderer
+# as the sync views, so a response has the same bytes, but they always
+# answer in JSON and take no query parameters: no filters, ordering, paging
+# or streaming, and no ETags or 304s.
+
+renderer = FastJSONRenderer()
+
+
+def render(data, status=200):
+    return HttpResponse(
+        renderer.render(data), content_type=renderer.media_type, status=status
+    )
+
+
+def DoesNotExist_to_404(fn):
+    """Async version of utils.DoesNotExist_to_404."""
+
+    @wraps(fn)
+    async def wrapped_fn(*args, **kwargs):
+        try:
+            return await fn(*args, **kwargs)
+        except ObjectDoesNotExist as e:
+            return render({"error": str(e)}, status=404)
+
+    return wrapped_fn
+
+
+async def serialize_all(queryset, serializer_class):
+    """Async version of serializers.serialize_values, rendered."""
+    fields = list(serializer_class().fields)
+    return render(
+        [dict(zip(fields, row)) async for row in queryset.values_list(*fields)]
+    )
+
+
+def request_data(request):
+    # What DRF's parsers would make of the body, for the JSON and form
+    # encodings.
+    if request.content_type == "application/json":
+        try:
+            data = json.loads(request.body or b"{}")
+        except ValueError:
+            return None
+        return data if isinstance(data, dict) else None
+    if request.content_type == "application/x-www-form-urlencoded":
+        return request.POST
+    return QueryDict()
+
+
+@require_GET
+async def car_list(request):
+    """Display all :model:`car_api.models.Car`s."""
+    return await serialize_all(Car.objects.all(), CarSerializer)
+
+
+@require_GET
+@DoesNotExist_to_404
+async def car_detail(request, pk):
+    """Display a single :model:`car_api.models.Car` based on ID."""
+    car = await Car.objects.aget(pk=pk)
+    return render(CarSerializer(car).data)
+
+
+@require_GET
+async def branch_list(request):
+    """Get all :model:`car_api.models.Branch`s."""
+    return await serialize_all(Branch.objects.all(), BranchSerializer)
+
+
+@require_GET
+@DoesNotExist_to_404
+async def branch_detail(request, pk):
+    """Display a single :model:`car_api.models.Branch`."""
+    branch = await Branch.objects.aget(pk=pk)
+    return render(BranchSerializer(branch).data)
+
+
+@csrf_exempt
+@require_http_methods(["GET", "POST"])
+@DoesNotExist_to_404
+async def branch_inventory(request, pk):
+    """
+    GET: get a list of :model:`car_api.models.Car`s that are currently
+    assigned to this :model:`car_api.models.Branch`.
+
+    POST: get a list of :model:`car_api.models.Car`s that will be at this
+    :model:`car_api.models.Branch` at POST['at_time'].
+    """
+    branch = await Branch.objects.aget(pk=pk)  # For 404
+    if request.method == "GET":
+        return await serialize_all(Car.objects.filter(branch=pk), CarSerializer)
+
+    data = request_data(request)
+    form = InventoryForm(data)
+    if data is None or not form.is_valid():
+        return render({"error": "valid 'at_time' value is required."}, status=400)
+    # The inventory cache isn't async, so this one runs in a thread.
+    available_cars = await sync_to_async(get_inventory_at_date)(
+        branch, form.cleaned_data["at_time"]
+    )
+    if available_cars:
+        return render(CarSerializer(available_cars, many=True).data)
+    return render({"error": "No cars available for this time."}, status=400)
+
+
+@require_GET
+async def schedule_list(request):
+    """Display all :model:`car_api.models.Schedule`s."""
+    # In ID order, as the sync list has them.
+    return await serialize_all(Schedule.objects.order_by("id"), ScheduleSerializer)
+
+
+@require_GET
+@DoesNotExist_to_404
+async def schedule_detail(request, pk):
+    """Display a :model:`car_api.models.Schedule`."""
+    schedule = await Schedule.objects.aget(pk=pk)
+    return render(ScheduleSerializer(schedule).data)
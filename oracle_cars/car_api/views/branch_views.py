@@ -1,23 +1,37 @@
 from django.utils.dateparse import parse_datetime
+from django.utils.duration import duration_string
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from .. import inventory_cache, locations, occupancy, utils
+from ..forms import InventoryForm, OccupancyForm
+from ..etags import etag_from_versions, row, versions
 from ..models import Car, Branch
-from ..serializers import CarSerializer, BranchSerializer
+from ..serializers import CarSerializer, BranchSerializer, serialize_values
+from ..pagination import OptInCursorPagination
 from ..utils import DoesNotExist_to_404, get_inventory_at_date
 
 
 class BranchView(APIView):
     serializer_class = BranchSerializer
 
+    @etag_from_versions(lambda: versions(Branch))
     def get(self, request, *args, **kwargs):
         """
         Get all :model:`car_api.models.Branch`s.
+
+        GET parameters:
+        GET['page_size'], GET['cursor'] : page through the list by primary key
+        instead of getting it all at once.
         """
         branches = Branch.objects.all()
-        seralizer = BranchSerializer(branches, many=True)
-        return Response(seralizer.data)
+        paginator = OptInCursorPagination()
+        if paginator.is_requested(request):
+            page = paginator.paginate_queryset(branches, request, view=self)
+            seralizer = BranchSerializer(page, many=True)
+            return paginator.get_paginated_response(seralizer.data)
+        return Response(serialize_values(branches, BranchSerializer))
 
     def post(self, request, *args, **kwargs):
         """
@@ -34,6 +48,7 @@ class BranchDetailView(APIView):
     serializer_class = BranchSerializer
 
     @DoesNotExist_to_404
+    @etag_from_versions(lambda pk: row(Branch, pk))
     def get(self, request, pk, *args, **kwargs):
         """
         Display a single :model:`car_api.models.Branch`.
@@ -54,6 +69,7 @@ class BranchDetailView(APIView):
 
 class BranchInventoryView(APIView):
     @DoesNotExist_to_404
+    @etag_from_versions(lambda pk: row(Branch, pk) + versions(Car))
     def get(self, request, pk, *args, **kwargs):
         """
         Get a list of :model:`car_api.models.Car`s that are currently assigned
@@ -87,3 +103,82 @@ class BranchInventoryView(APIView):
         return Response(
             {"error": "No cars available for this time."}, status.HTTP_400_BAD_REQUEST
         )
+
+
+class BranchOccupancyView(APIView):
+    @DoesNotExist_to_404
+    def get(self, request, *args, **kwargs):
+        """
+        How many :model:`car_api.models.Car`s each
+        :model:`car_api.models.Branch` has over a time range, sampled at the
+        start of each bucket. 'counts' has a row per branch, in the order of
+        'branches', with a count per bucket.
+
+        GET parameters:
+        GET['from'], GET['to'] : the time range.
+        GET['step'] : the bucket size, an hour by default.
+        GET['branch'] : only this :model:`car_api.models.Branch`.
+        """
+        form = OccupancyForm(request.query_params)
+        if not form.is_valid():
+            return Response(
+                {"error": "from, to and step could not be parsed properly."},
+                status.HTTP_400_BAD_REQUEST,
+            )
+        start_time, end_time = form.cleaned_data["from"], form.cleaned_data["to"]
+        step = form.cleaned_data["step"] or occupancy.DEFAULT_STEP
+        if occupancy.bucket_count(start_time, end_time, step) > occupancy.MAX_BUCKETS:
+            return Response(
+                {"error": "Too many buckets, use a longer step or a shorter range."},
+                status.HTTP_400_BAD_REQUEST,
+            )
+        branch_ids = None
+        if form.cleaned_data["branch"] is not None:
+            branch_ids = [Branch.objects.get(pk=form.cleaned_data["branch"]).pk]
+
+        branch_ids, counts = occupancy.counts(
+            start_time, end_time, step, utils.now(), branch_ids
+        )
+        return Response(
+            {
+                "from": start_time,
+                "to": end_time,
+                "step": duration_string(step),
+                "branches": branch_ids,
+                "counts": counts,
+            }
+        )
+
+
+class FleetInventoryView(APIView):
+    def get(self, request, *args, **kwargs):
+        """
+        The IDs of the :model:`car_api.models.Car`s that will be at each
+        :model:`car_api.models.Branch` at a given point of time, the same as
+        the branch inventory gives for each of them, and of the cars that are
+        out on a one-way schedule then.
+
+        GET parameters:
+        GET['at_time'] : the time to take the snapshot at.
+        """
+        form = InventoryForm(request.query_params)
+        if not form.is_valid():
+            return Response(
+                {"error": "valid 'at_time' value is required."},
+                status.HTTP_400_BAD_REQUEST,
+            )
+        at_time = form.cleaned_data["at_time"]
+
+        branches, in_transit = locations.fleet_at(at_time, utils.now())
+        return Response(
+            {"at_time": at_time, "branches": branches, "in_transit": in_transit}
+        )
+
+
+class InventoryCacheStatsView(APIView):
+    def get(self, request, *args, **kwargs):
+        """
+        Hit and miss counts of the inventory cache, for inventory lookups
+        and free car lookups, in the worker answering the request.
+        """
+        return Response(inventory_cache.stats())
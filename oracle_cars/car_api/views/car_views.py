@@ -3,21 +3,39 @@ from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from .. import calendars, utils
+from ..etags import etag_from_versions, row, versions
+from ..forms import TimeWindowForm
 from ..models import Car
-from ..serializers import CarSerializer
+from ..serializers import CarSerializer, serialize_values
+from ..pagination import OptInCursorPagination
+from ..streaming import is_stream_requested, stream_json_response
 from ..utils import DoesNotExist_to_404, update_model_from_form
 
 
 class CarView(APIView):
     serializer_class = CarSerializer
 
+    @etag_from_versions(lambda: versions(Car))
     def get(self, request, *args, **kwargs):
         """
         Display all :model:`car_api.models.Car`s.
+
+        GET parameters:
+        GET['page_size'], GET['cursor'] : page through the list by primary key
+        instead of getting it all at once.
+        GET['stream'] : set to 1 to stream the full list as it's read from the
+        database.
         """
         cars = Car.objects.all()
-        seralizer = CarSerializer(cars, many=True)
-        return Response(seralizer.data)
+        if is_stream_requested(request):
+            return stream_json_response(cars, CarSerializer)
+        paginator = OptInCursorPagination()
+        if paginator.is_requested(request):
+            page = paginator.paginate_queryset(cars, request, view=self)
+            seralizer = CarSerializer(page, many=True)
+            return paginator.get_paginated_response(seralizer.data)
+        return Response(serialize_values(cars, CarSerializer))
 
     def post(self, request, *args, **kwargs):
         """
@@ -34,6 +52,7 @@ class CarDetailView(APIView):
     serializer_class = CarSerializer
 
     @DoesNotExist_to_404
+    @etag_from_versions(lambda pk: row(Car, pk))
     def get(self, request, pk, *args, **kwargs):
         """
         Display a single :model:`car_api.models.Car` based on ID.
@@ -63,3 +82,51 @@ class CarDetailView(APIView):
         car = Car.objects.get(pk=pk)
         car.delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class CarCalendarView(APIView):
+    @DoesNotExist_to_404
+    def get(self, request, pk, *args, **kwargs):
+        """
+        When a :model:`car_api.models.Car` is busy and free, with the
+        :model:`car_api.models.Branch` it's at when each free gap starts and
+        the one it has to be at when the gap ends.
+
+        GET parameters:
+        GET['from'], GET['to'] : the time window, from now and a month on if
+        not given.
+        """
+        window = TimeWindowForm(request.query_params)
+        if not window.is_valid():
+            return Response(
+                {"error": "from and to could not be parsed properly."},
+                status.HTTP_400_BAD_REQUEST,
+            )
+        car = Car.objects.get(pk=pk)
+        start_time = window.cleaned_data["from"] or utils.now()
+        end_time = window.cleaned_data["to"] or start_time + calendars.CALENDAR_SPAN
+        if start_time > end_time:
+            return Response(
+                {"error": "from cannot be after to."}, status.HTTP_400_BAD_REQUEST
+            )
+
+        busy, free = calendars.car_calendar(car, start_time, end_time)
+        return Response(
+            {
+                "car_id": car.pk,
+                "from": start_time,
+                "to": end_time,
+                "busy": [
+                    {"start_time": start, "end_time": end} for start, end, _, _ in busy
+                ],
+                "free": [
+                    {
+                        "start_time": start,
+                        "end_time": end,
+                        "start_branch": start_branch,
+                        "end_branch": end_branch,
+                    }
+                    for start, end, start_branch, end_branch in free
+                ],
+            }
+        )
@@ -0,0 +1,50 @@
+from django.http import HttpResponse
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .. import reports
+from ..forms import UtilizationForm
+
+
+class UtilizationReportView(APIView):
+    def perform_content_negotiation(self, request, force=False):
+        # The format comes from GET['output'], not the Accept header.
+        return super().perform_content_negotiation(request, force=True)
+
+    def get(self, request, *args, **kwargs):
+        """
+        Utilization of each :model:`car_api.models.Car`, or of the cars of
+        each :model:`car_api.models.Branch`, over a time window: the hours
+        booked out of the hours in the window, the number of trips and their
+        average length.
+
+        GET parameters:
+        GET['from'], GET['to'] : the time window.
+        GET['by'] : car (the default) or branch.
+        GET['output'] : json (the default) or csv for a download.
+        """
+        form = UtilizationForm(request.query_params)
+        if not form.is_valid():
+            return Response(
+                {"error": "report parameters could not be parsed properly."},
+                status.HTTP_400_BAD_REQUEST,
+            )
+        start_time, end_time = form.cleaned_data["from"], form.cleaned_data["to"]
+        if start_time == end_time:
+            return Response(
+                {"error": "to must be after from."}, status.HTTP_400_BAD_REQUEST
+            )
+        by = form.cleaned_data["by"] or "car"
+
+        rows = reports.utilization(start_time, end_time, by)
+        if form.cleaned_data["output"] != "csv":
+            return Response(rows)
+        fields = reports.CAR_FIELDS if by == "car" else reports.BRANCH_FIELDS
+        response = HttpResponse(
+            reports.render_csv(rows, fields), content_type="text/csv"
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="utilization-by-{by}.csv"'
+        )
+        return response
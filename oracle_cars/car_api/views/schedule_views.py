@@ -1,23 +1,89 @@
+from django.core.exceptions import ValidationError
+from django.http import StreamingHttpResponse
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from .. import allocation, exports
+from ..etags import etag_from_versions, row, versions
 from ..models import Schedule, Branch
-from ..serializers import ScheduleSerializer
-from ..forms import TimeframeForm
-from ..utils import get_free_car_ids, DoesNotExist_to_404
+from ..serializers import ScheduleSerializer, serialize_values
+from ..pagination import OptInCursorPagination
+from ..streaming import is_stream_requested, stream_json_response
+from ..forms import (
+    TimeframeForm,
+    AvailabilityForm,
+    BookingForm,
+    ScheduleExportForm,
+    ScheduleFilterForm,
+)
+from ..signals import schedules_bulk_created
+from ..utils import (
+    filter_schedules,
+    get_free_car_ids,
+    get_free_car_ids_bulk,
+    allocate_car_ids,
+    is_car_free,
+    lock_cars,
+    DoesNotExist_to_404,
+)
+
+# Most objects a batch or availability request may hold.
+MAX_BATCH_SIZE = 1000
+
+
+def bind_each(form_class, items):
+    # Anything in the list that isn't an object is reported the same as an
+    # object that doesn't parse.
+    return [form_class(item if isinstance(item, dict) else {}) for item in items]
 
 
 class ScheduleView(APIView):
     serializer_class = ScheduleSerializer
 
+    @etag_from_versions(lambda: versions(Schedule))
     def get(self, request, *args, **kwargs):
         """
         Display all :model:`car_api.models.Schedule`s.
+
+        GET parameters:
+        GET['car'], GET['origin_branch'], GET['destination_branch'] : only
+        the schedules of this car, or leaving from or arriving at this branch.
+        GET['from'], GET['to'] : only the schedules running at some point
+        between these times.
+        GET['ordering'] : id, start_time or end_time, with a leading - for
+        descending order.
+        GET['page_size'], GET['cursor'] : page through the list in that order
+        instead of getting it all at once.
+        GET['stream'] : set to 1 to stream the full list as it's read from the
+        database.
         """
-        schedules = Schedule.objects.all()
-        seralizer = ScheduleSerializer(schedules, many=True)
-        return Response(seralizer.data)
+        filters = ScheduleFilterForm(request.query_params)
+        if not filters.is_valid():
+            return Response(
+                {"error": "filters could not be parsed properly."},
+                status.HTTP_400_BAD_REQUEST,
+            )
+        schedules = filter_schedules(
+            Schedule.objects.all(),
+            filters.cleaned_data["car"],
+            filters.cleaned_data["origin_branch"],
+            filters.cleaned_data["destination_branch"],
+            filters.cleaned_data["from"],
+            filters.cleaned_data["to"],
+        )
+        # The ID breaks ties, so the order is the same on every request.
+        ordering = (filters.cleaned_data["ordering"] or "id", "pk")
+        schedules = schedules.order_by(*ordering)
+        if is_stream_requested(request):
+            return stream_json_response(schedules, ScheduleSerializer)
+        paginator = OptInCursorPagination()
+        paginator.ordering = ordering
+        if paginator.is_requested(request):
+            page = paginator.paginate_queryset(schedules, request, view=self)
+            seralizer = ScheduleSerializer(page, many=True)
+            return paginator.get_paginated_response(seralizer.data)
+        return Response(serialize_values(schedules, ScheduleSerializer))
 
     def post(self, request, *args, **kwargs):
         """
@@ -35,8 +101,14 @@ class ScheduleView(APIView):
 
         # Move this into a function and raise errors if it fails.
         Branch.objects.get(pk=request.data["origin_branch"])  # trigger 404
+        try:
+            destination = Branch._meta.pk.to_python(
+                request.data.get("destination_branch")
+            )
+        except ValidationError:
+            destination = None  # the serializer turns it down below
         available_cars = get_free_car_ids(
-            request.data["origin_branch"], tff.start, tff.end
+            request.data["origin_branch"], tff.start, tff.end, destination
         )
 
         if not available_cars:
@@ -45,29 +117,215 @@ class ScheduleView(APIView):
                 status.HTTP_400_BAD_REQUEST,
             )
         # If the user supplied a car ID, check if it's free.
-        if (
-            request.data.get("car_id")
-            and request.data.get("car_id") not in available_cars
-        ):
+        requested = request.data.get("car_id")
+        if requested and requested not in available_cars:
             return Response(
                 {"error": "Requested car is not available for this time frame."},
                 status.HTTP_400_BAD_REQUEST,
             )
-        # we've got cars but haven't requested a specific one
-        elif not request.data.get("car_id"):
-            # No car provided, just use the first one in our list.
-            fill_data["car_id"] = available_cars[0]
-        serializer = ScheduleSerializer(data=fill_data)
-        if serializer.is_valid():
-            serializer.save()
-            return Response(serializer.data)
-        return Response(serializer.errors, status.HTTP_400_BAD_REQUEST)
+
+        # No car provided, go through our list, best car for the booking
+        # first. Another request may book the same car in the meantime, so
+        # each one is re-checked while it's locked and we move on to the next
+        # if it was taken.
+        if not requested:
+            available_cars = allocation.rank(
+                request.data["origin_branch"],
+                tff.start,
+                tff.end,
+                destination,
+                available_cars,
+            )
+        for car in [requested] if requested else available_cars:
+            fill_data["car_id"] = car
+            serializer = ScheduleSerializer(data=fill_data)
+            if not serializer.is_valid():
+                return Response(serializer.errors, status.HTTP_400_BAD_REQUEST)
+            with lock_cars([car]):
+                if is_car_free(
+                    car, request.data["origin_branch"], tff.start, tff.end, destination
+                ):
+                    serializer.save()
+                    return Response(serializer.data)
+
+        if requested:
+            return Response(
+                {"error": "Requested car is not available for this time frame."},
+                status.HTTP_400_BAD_REQUEST,
+            )
+        return Response(
+            {"error": "No cars available for this time frame."},
+            status.HTTP_400_BAD_REQUEST,
+        )
+
+
+class ScheduleBatchView(APIView):
+    def post(self, request, *args, **kwargs):
+        """
+        Create many :model:`car_api.models.Schedule`s in one request.
+
+        POST body: a list of objects shaped like a single schedule POST. Cars
+        are allocated across the whole batch before anything is written, and
+        the schedules that could be booked are inserted in one transaction
+        while their cars are locked.
+        The response has one entry per object, in the same order, holding the
+        created schedule or an error. At most MAX_BATCH_SIZE objects are
+        accepted.
+        """
+        if not isinstance(request.data, list):
+            return Response(
+                {"error": "a list of schedules is required."},
+                status.HTTP_400_BAD_REQUEST,
+            )
+        if len(request.data) > MAX_BATCH_SIZE:
+            return Response(
+                {"error": f"at most {MAX_BATCH_SIZE} schedules can be booked at once."},
+                status.HTTP_400_BAD_REQUEST,
+            )
+
+        bookings = bind_each(BookingForm, request.data)
+        valid = [b for b in bookings if b.is_valid()]
+        branch_ids = {b.cleaned_data["origin_branch"] for b in valid} | {
+            b.cleaned_data["destination_branch"] for b in valid
+        }
+        branches = set(
+            Branch.objects.filter(pk__in=branch_ids).values_list("pk", flat=True)
+        )
+        valid = [
+            b
+            for b in valid
+            if b.cleaned_data["origin_branch"] in branches
+            and b.cleaned_data["destination_branch"] in branches
+        ]
+        cars = allocate_car_ids(
+            [
+                (
+                    b.cleaned_data["origin_branch"],
+                    b.start,
+                    b.end,
+                    b.cleaned_data["destination_branch"],
+                    b.cleaned_data["car_id"],
+                )
+                for b in valid
+            ]
+        )
+        schedules = {
+            b: Schedule(
+                start_time=b.start,
+                end_time=b.end,
+                car_id_id=car,
+                origin_branch_id=b.cleaned_data["origin_branch"],
+                destination_branch_id=b.cleaned_data["destination_branch"],
+            )
+            for b, car in zip(valid, cars)
+            if car
+        }
+
+        booked_cars = {s.car_id_id for s in schedules.values()}
+        with lock_cars(booked_cars):
+            # Drop any booking a concurrent request got to first since we
+            # allocated, with the same checks the allocation made: still at
+            # the branch, not booked and able to make the next booking.
+            still_free = get_free_car_ids_bulk(
+                [
+                    (
+                        s.origin_branch_id,
+                        s.start_time,
+                        s.end_time,
+                        s.destination_branch_id,
+                    )
+                    for s in schedules.values()
+                ],
+                car_ids=booked_cars,
+            )
+            schedules = {
+                b: s
+                for (b, s), free in zip(schedules.items(), still_free)
+                if s.car_id_id in free
+            }
+            Schedule.objects.bulk_create(schedules.values())
+            schedules_bulk_created(list(schedules.values()))
+        if any(s.pk is None for s in schedules.values()):
+            # Some backends (MySQL) don't return primary keys from bulk inserts.
+            # A car can't have two bookings starting at the same time, so the
+            # car and start time find each one.
+            pks = {
+                (car, start): pk
+                for pk, car, start in Schedule.objects.filter(
+                    car_id__in={s.car_id_id for s in schedules.values()},
+                    start_time__in={s.start_time for s in schedules.values()},
+                ).values_list("pk", "car_id", "start_time")
+            }
+            for s in schedules.values():
+                s.pk = pks.get((s.car_id_id, s.start_time))
+
+        results = []
+        valid = set(valid)
+        for booking in bookings:
+            if not booking.is_valid():
+                results.append({"error": "timeframe could not be parsed properly."})
+            elif booking not in valid:
+                results.append({"error": "Branch does not exist."})
+            elif booking in schedules:
+                results.append(ScheduleSerializer(schedules[booking]).data)
+            elif booking.cleaned_data["car_id"]:
+                results.append(
+                    {"error": "Requested car is not available for this time frame."}
+                )
+            else:
+                results.append({"error": "No cars available for this time frame."})
+        return Response(results)
+
+
+class ScheduleExportView(APIView):
+    def perform_content_negotiation(self, request, force=False):
+        # The file format comes from GET['output'], not the Accept header.
+        return super().perform_content_negotiation(request, force=True)
+
+    def get(self, request, *args, **kwargs):
+        """
+        Download :model:`car_api.models.Schedule`s as a file, streamed as
+        they're read from the database.
+
+        GET parameters:
+        GET['output'] : csv (the default), or parquet or arrow (an Arrow IPC
+        stream) when pyarrow is installed.
+        GET['since'], GET['until'] : only schedules running at some point
+        between these times.
+        GET['branch'] : only schedules leaving from or arriving at this branch.
+        """
+        form = ScheduleExportForm(request.query_params)
+        if not form.is_valid():
+            return Response(
+                {"error": "export filters could not be parsed properly."},
+                status.HTTP_400_BAD_REQUEST,
+            )
+        fmt = form.cleaned_data["output"] or "csv"
+        if fmt not in exports.available_formats():
+            return Response(
+                {"error": f"{fmt} exports need pyarrow installed."},
+                status.HTTP_400_BAD_REQUEST,
+            )
+
+        schedules = exports.schedules(
+            form.cleaned_data["since"],
+            form.cleaned_data["until"],
+            form.cleaned_data["branch"],
+        )
+        response = StreamingHttpResponse(
+            exports.render(schedules, fmt), content_type=exports.CONTENT_TYPES[fmt]
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="schedules{exports.EXTENSIONS[fmt]}"'
+        )
+        return response
 
 
 class ScheduleDetailView(APIView):
     serializer_class = ScheduleSerializer
 
     @DoesNotExist_to_404
+    @etag_from_versions(lambda pk: row(Schedule, pk))
     def get(self, request, pk, *args, **kwargs):
         """
         Display a :model:`car_api.models.Schedule`.
@@ -75,3 +333,76 @@ class ScheduleDetailView(APIView):
         schedules = Schedule.objects.get(pk=pk)
         seralizer = ScheduleSerializer(schedules)
         return Response(seralizer.data)
+
+
+class AvailabilityView(APIView):
+    def post(self, request, *args, **kwargs):
+        """
+        Find the free :model:`car_api.models.Car`s for many time frames in one
+        request.
+
+        POST body: a list of objects with 'origin_branch', 'start_time',
+        either 'end_time' or 'duration', and 'destination_branch' if the car
+        isn't brought back to the origin. The response has one entry per
+        object, in the same order, holding the parsed time frame and the IDs
+        of the free cars, or an error. At most MAX_BATCH_SIZE objects are
+        accepted.
+        """
+        if not isinstance(request.data, list):
+            return Response(
+                {"error": "a list of time frames is required."},
+                status.HTTP_400_BAD_REQUEST,
+            )
+        if len(request.data) > MAX_BATCH_SIZE:
+            return Response(
+                {
+                    "error": f"at most {MAX_BATCH_SIZE} time frames can be checked at once."
+                },
+                status.HTTP_400_BAD_REQUEST,
+            )
+
+        timeframes = bind_each(AvailabilityForm, request.data)
+        valid = [f for f in timeframes if f.is_valid()]
+        branch_ids = {f.cleaned_data["origin_branch"] for f in valid} | {
+            f.cleaned_data["destination_branch"]
+            for f in valid
+            if f.cleaned_data["destination_branch"] is not None
+        }
+        branches = set(
+            Branch.objects.filter(pk__in=branch_ids).values_list("pk", flat=True)
+        )
+        valid = [
+            f
+            for f in valid
+            if f.cleaned_data["origin_branch"] in branches
+            and f.cleaned_data["destination_branch"] in branches | {None}
+        ]
+        free_cars = get_free_car_ids_bulk(
+            [
+                (
+                    f.cleaned_data["origin_branch"],
+                    f.start,
+                    f.end,
+                    f.cleaned_data["destination_branch"],
+                )
+                for f in valid
+            ]
+        )
+        answers = dict(zip(valid, free_cars))
+
+        results = []
+        for form in timeframes:
+            if not form.is_valid():
+                results.append({"error": "timeframe could not be parsed properly."})
+            elif form not in answers:
+                results.append({"error": "Branch does not exist."})
+            else:
+                results.append(
+                    {
+                        "origin_branch": form.cleaned_data["origin_branch"],
+                        "start_time": form.start,
+                        "end_time": form.end,
+                        "car_ids": answers[form],
+                    }
+                )
+        return Response(results)
@@ -16,6 +16,10 @@ docker network create --driver bridge car-net
 echo "Starting car database container"
 docker run --name car-db -p 3306:3306 -e MYSQL_ROOT_PASSWORD=secret -e MYSQL_DATABASE=api_db -v /tmp/car_db:/var/lib/mysql -d --network car-net mysql
 
+# start redis for the inventory cache shared by the api workers
+echo "Starting car cache container"
+docker run --name car-cache --network car-net -d redis
+
 # Give the db some time to be properly up and running
 sleep 5
 
@@ -24,6 +28,7 @@ echo "Starting car api container"
 docker run --name car-api -p 8000:8000 --network car-net \
   --env API_DB_USER=root --env API_DB_PASSWORD=secret \
   --env API_DB_HOST=car-db --env API_DB_PORT=3306 \
+  --env API_CACHE_URL=redis://car-cache:6379 \
   --env CAR_API_DEPLOYMENT=PROD -d car-api:latest
 
 
@@ -1,6 +1,6 @@
 # clean up after running the demo
-docker stop car-db car-api
-docker container rm car-db car-api
+docker stop car-db car-cache car-api
+docker container rm car-db car-cache car-api
 docker network rm car-net
 docker image rm car-api
 rm -rf /tmp/car_db/
\ No newline at end of file
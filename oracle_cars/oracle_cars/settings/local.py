@@ -45,6 +45,10 @@ INSTALLED_APPS = [
 
 REST_FRAMEWORK = {
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
+    "DEFAULT_RENDERER_CLASSES": [
+        "car_api.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
 }
 
 SPECTACULAR_SETTINGS = {
@@ -58,6 +62,8 @@ SPECTACULAR_SETTINGS = {
 }
 
 MIDDLEWARE = [
+    # First, so its total covers everything below it.
+    "car_api.middleware.ServerTimingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -65,6 +71,7 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "car_api.middleware.ProfilerMiddleware",
 ]
 
 ROOT_URLCONF = "oracle_cars.urls"
@@ -91,13 +98,43 @@ WSGI_APPLICATION = "oracle_cars.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
+# SQLite only has one writer at a time. Starting transactions as IMMEDIATE
+# makes concurrent bookings wait their turn instead of failing with "database
+# is locked", and a file-backed test database keeps that true in tests (the
+# in-memory one uses table locks that don't wait).
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
+        "OPTIONS": {"transaction_mode": "IMMEDIATE", "timeout": 20},
+        "TEST": {"NAME": BASE_DIR / "test_db.sqlite3"},
     }
 }
 
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+
+# Inventory answers are kept here (see car_api/inventory_cache.py). The local
+# memory cache is per process, which is fine for a single runserver process;
+# anything running several workers needs a shared backend, see prod.py.
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    }
+}
+
+# Which free car a booking without a car_id gets, see car_api/allocation.py.
+# car_api.allocation.FirstFreePolicy gives the lowest car ID.
+CAR_ALLOCATION_POLICY = "car_api.allocation.BestFitPolicy"
+
+# Requests sent with X-Profile: 1 or ?profile=1 are profiled, see
+# car_api.middleware.ProfilerMiddleware. Staff always can, PROFILER_OPEN lets
+# anyone.
+PROFILER_OPEN = DEBUG
+PROFILER_DIR = BASE_DIR / "profiles"
+PROFILER_SAMPLE_RATE = 1.0
+PROFILER_MAX_FILES = 50
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
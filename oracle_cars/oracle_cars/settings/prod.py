@@ -47,6 +47,10 @@ INSTALLED_APPS = [
 
 REST_FRAMEWORK = {
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
+    "DEFAULT_RENDERER_CLASSES": [
+        "car_api.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
 }
 
 SPECTACULAR_SETTINGS = {
@@ -60,6 +64,8 @@ SPECTACULAR_SETTINGS = {
 }
 
 MIDDLEWARE = [
+    # First, so its total covers everything below it.
+    "car_api.middleware.ServerTimingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -67,6 +73,7 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "car_api.middleware.ProfilerMiddleware",
 ]
 
 ROOT_URLCONF = "oracle_cars.urls"
@@ -108,8 +115,39 @@ if "test" in sys.argv:
     DATABASES["default"] = {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
+        "OPTIONS": {"transaction_mode": "IMMEDIATE", "timeout": 20},
+        "TEST": {"NAME": BASE_DIR / "test_db.sqlite3"},
     }
 
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+
+# Inventory answers are kept here (see car_api/inventory_cache.py); ETag
+# versions are in the database (see car_api/etags.py). Invalidation works by
+# writing new generations to the cache, so every gunicorn worker has to see
+# the same one: a per process cache would leave the other workers serving
+# cars that are already booked. Redis keeps a hit to two round trips; the
+# database cache would cost more than the lookups it saves, and the inventory
+# cache is skipped when it's configured.
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": os.environ.get("API_CACHE_URL", "redis://127.0.0.1:6379"),
+    }
+}
+
+# Which free car a booking without a car_id gets, see car_api/allocation.py.
+# car_api.allocation.FirstFreePolicy gives the lowest car ID.
+CAR_ALLOCATION_POLICY = "car_api.allocation.BestFitPolicy"
+
+# Requests sent with X-Profile: 1 or ?profile=1 are profiled, see
+# car_api.middleware.ProfilerMiddleware. Staff always can, PROFILER_OPEN lets
+# anyone.
+PROFILER_OPEN = False
+PROFILER_DIR = BASE_DIR / "profiles"
+PROFILER_SAMPLE_RATE = 1.0
+PROFILER_MAX_FILES = 50
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 